@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from core.metrics import record_cache_lookup
+
+# User fields copied into tokens when `JWT_EMBED_USER_CLAIMS` is enabled
+EMBEDDED_USER_CLAIMS = ('email', 'roles', 'is_staff', 'is_superuser', 'is_active')
+
+# User fields kept in the user cache: the claims, plus the names shown by the user's string representation in orders
+CACHED_USER_FIELDS = EMBEDDED_USER_CLAIMS + ('first_name', 'last_name')
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def invalidate_cached_users(user_ids):
+    """
+       Drop the cached users after a `QuerySet.update()` of users (e.g. a bulk deactivation), which sends no signals.
+    """
+    cache.delete_many([user_cache_key(user_id) for user_id in user_ids])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+       JWT authentication that avoids a user query per request.
+       - With `JWT_EMBED_USER_CLAIMS`, a token carrying the user claims is turned into a user
+         without touching the database. Fields not in the token are deferred and load on access.
+       - Otherwise users are read from the cache for `AUTH_USER_CACHE_TTL` seconds. Only
+         `CACHED_USER_FIELDS` are cached (never the password hash, only its digest when `CHECK_REVOKE_TOKEN`
+         is on); the others are deferred like above.
+       - `accounts.signals` drops the entry whenever the user is saved or deleted. `QuerySet.update()` sends
+         no signals, so bulk updates of users must call `invalidate_cached_users`, or the old state is used
+         for up to `AUTH_USER_CACHE_TTL` seconds.
+    """
+    def get_user(self, validated_token):
+        if settings.JWT_EMBED_USER_CLAIMS and not api_settings.CHECK_REVOKE_TOKEN:
+            user = self.get_user_from_claims(validated_token)
+            if user is not None:
+                if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+                    raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+                return user
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        cached = cache.get(user_cache_key(user_id))
+        record_cache_lookup('auth_user', cached is not None)
+        if cached is None:
+            user = super().get_user(validated_token)
+            cached = {field: getattr(user, field) for field in (api_settings.USER_ID_FIELD,) + CACHED_USER_FIELDS}
+            if api_settings.CHECK_REVOKE_TOKEN:
+                cached['password_digest'] = get_md5_hash_password(user.password)
+            cache.set(user_cache_key(user_id), cached, settings.AUTH_USER_CACHE_TTL)
+            return user
+
+        # The cached user passed these checks when stored, but the token may differ
+        if api_settings.CHECK_USER_IS_ACTIVE and not cached['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != cached.get('password_digest'):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return self.user_from_fields({field: cached[field] for field in (api_settings.USER_ID_FIELD,) + CACHED_USER_FIELDS})
+
+    def get_user_from_claims(self, validated_token):
+        """
+           Build a user from the embedded claims, or return None if the token does not carry them.
+        """
+        if api_settings.USER_ID_CLAIM not in validated_token or any(claim not in validated_token for claim in EMBEDDED_USER_CLAIMS):
+            return None
+        claims = {claim: validated_token[claim] for claim in EMBEDDED_USER_CLAIMS}
+        claims[api_settings.USER_ID_FIELD] = validated_token[api_settings.USER_ID_CLAIM]
+        return self.user_from_fields(claims)
+
+    def user_from_fields(self, values_by_field):
+        """
+           A user instance with these field values, the other fields deferred.
+        """
+        # from_db expects the values in model field order
+        field_names = [field.attname for field in self.user_model._meta.concrete_fields if field.attname in values_by_field]
+        values = [values_by_field[name] for name in field_names]
+        return self.user_model.from_db(router.db_for_read(self.user_model), field_names, values)
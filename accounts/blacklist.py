@@ -0,0 +1,124 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.cache import cache_is_shared
+
+# Shared counter bumped on every blacklisting so other workers know to sync
+GENERATION_CACHE_KEY = 'jwt:blacklist:generation'
+# How far back each sync re-reads blacklistings, a row committed late still carries its earlier timestamp
+SYNC_WINDOW = timedelta(minutes=5)
+
+
+class TokenBlacklistFilter:
+    """
+       In-memory set of blacklisted refresh token JTIs for one worker.
+       - Warmed from the database on first use with the blacklisted tokens that have not expired.
+       - Kept current by re-reading the rows blacklisted since the last sync (less `SYNC_WINDOW`), and only
+         when the shared generation counter in the cache has moved, so most checks never reach the database.
+       - Expired JTIs are dropped on each sync, since an expired token fails verification anyway.
+       The counter only reaches the other workers through a shared cache: with a per-process one, every
+       check queries the database instead.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._expiry_by_jti = {}
+        self._synced_at = None
+        self._generation = None
+        self._warmed = False
+
+    def _load(self, rows):
+        for jti, expires_at in rows:
+            self._expiry_by_jti[jti] = expires_at
+
+    def warm(self):
+        with self._lock:
+            self._generation = cache.get(GENERATION_CACHE_KEY)
+            self._expiry_by_jti = {}
+            self._synced_at = timezone.now()
+            self._load(
+                BlacklistedToken.objects.filter(token__expires_at__gt=self._synced_at)
+                .values_list('token__jti', 'token__expires_at')
+                .iterator(chunk_size=5000)
+            )
+            self._warmed = True
+
+    def sync(self, generation):
+        with self._lock:
+            since, self._synced_at = self._synced_at - SYNC_WINDOW, timezone.now()
+            self._load(
+                BlacklistedToken.objects.filter(blacklisted_at__gte=since)
+                .values_list('token__jti', 'token__expires_at')
+            )
+            now = timezone.now()
+            self._expiry_by_jti = {jti: expires_at for jti, expires_at in self._expiry_by_jti.items() if expires_at > now}
+            self._generation = generation
+
+    def add(self, jti, expires_at):
+        """
+           Record a token blacklisted by this worker and tell the other workers to sync.
+        """
+        with self._lock:
+            self._expiry_by_jti[jti] = expires_at
+        try:
+            cache.incr(GENERATION_CACHE_KEY)
+        except ValueError:
+            cache.set(GENERATION_CACHE_KEY, time.time_ns(), None)
+
+    def contains(self, jti):
+        if not cache_is_shared():
+            return BlacklistedToken.objects.filter(token__jti=jti).exists()
+        if not self._warmed:
+            self.warm()
+        generation = cache.get(GENERATION_CACHE_KEY)
+        if generation != self._generation:
+            self.sync(generation)
+        return jti in self._expiry_by_jti
+
+    def reset(self):
+        with self._lock:
+            self._warmed = False
+
+
+token_blacklist_filter = TokenBlacklistFilter()
+
+
+class FilteredRefreshToken(RefreshToken):
+    """
+       Refresh token whose blacklist check reads the in-memory filter instead of querying the database
+       (when the cache is shared, see `TokenBlacklistFilter`).
+    """
+    def check_blacklist(self):
+        if token_blacklist_filter.contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted, created = super().blacklist()
+        token_blacklist_filter.add(self.payload[api_settings.JTI_CLAIM], blacklisted.token.expires_at)
+        return blacklisted, created
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
+
+
+def purge_expired_tokens(batch_size=1000):
+    """
+       Delete expired outstanding tokens, and their blacklist entries, in batches.
+       Returns the number of outstanding tokens removed.
+    """
+    deleted = 0
+    while True:
+        ids = list(OutstandingToken.objects.filter(expires_at__lte=timezone.now()).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        BlacklistedToken.objects.filter(token_id__in=ids).delete()
+        deleted += OutstandingToken.objects.filter(id__in=ids).delete()[0]
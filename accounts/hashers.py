@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+       PBKDF2-SHA256 hasher whose work factor comes from `PASSWORD_PBKDF2_ITERATIONS`.
+       - Keeps the `pbkdf2_sha256` algorithm name so existing hashes verify unchanged.
+       - Hashes stored with a different iteration count are upgraded on the next successful login.
+    """
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
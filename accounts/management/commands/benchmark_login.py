@@ -0,0 +1,47 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+from accounts.views import UserLoginView
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Measure logins per second for one worker through UserLoginView, using a throwaway user.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Number of logins to run.')
+        parser.add_argument('--warmup', type=int, default=3, help='Logins run before timing starts.')
+
+    def handle(self, *args, **options):
+        hasher = get_hasher()
+        view = UserLoginView.as_view()
+        factory = APIRequestFactory()
+        credentials = {'email': 'login-benchmark@ruralmart.invalid', 'password': 'Benchmark@123'}
+
+        # Everything runs in a transaction that is rolled back, so no benchmark data is left behind
+        with transaction.atomic():
+            User.objects.create_user(phone_number='benchmark-login', **credentials)
+
+            for _ in range(options['warmup']):
+                view(factory.post('/users/auth/login/', credentials, format='json'))
+
+            started = time.perf_counter()
+            for _ in range(options['iterations']):
+                response = view(factory.post('/users/auth/login/', credentials, format='json'))
+                if response.status_code != 200:
+                    raise RuntimeError(f'Login failed with status {response.status_code}: {response.data}')
+            elapsed = time.perf_counter() - started
+
+            transaction.set_rollback(True)
+
+        per_login = elapsed / options['iterations']
+        work_factor = getattr(hasher, 'iterations', None) or getattr(hasher, 'time_cost', None) or getattr(hasher, 'rounds', None)
+        self.stdout.write(f'Hasher:          {hasher.algorithm} (work factor {work_factor})')
+        self.stdout.write(f'Logins:          {options["iterations"]}')
+        self.stdout.write(f'Mean latency:    {per_login * 1000:.1f} ms')
+        self.stdout.write(self.style.SUCCESS(f'Logins/sec/worker: {1 / per_login:.1f}'))
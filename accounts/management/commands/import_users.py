@@ -0,0 +1,25 @@
+import csv
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+User = get_user_model()
+
+USER_COLUMNS = ('email', 'first_name', 'last_name', 'phone_number', 'roles', 'password', 'address', 'bio')
+
+
+class Command(BaseCommand):
+    help = 'Bulk create users and their profiles from a CSV file, without per-row signals.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with email, first_name, last_name, phone_number, roles and optional password, address, bio columns.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of users inserted per query.')
+
+    def handle(self, *args, **options):
+        with open(options['path'], newline='', encoding='utf-8') as csv_file:
+            rows = [
+                {column: value for column, value in row.items() if column in USER_COLUMNS and value != ''}
+                for row in csv.DictReader(csv_file)
+            ]
+        created = User.objects.bulk_create_users(rows, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Created {len(created)} users.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from accounts.blacklist import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted JWT refresh tokens in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of tokens deleted per batch.')
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_tokens(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired tokens.'))
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def create_missing_profiles(apps, schema_editor):
+    """
+       Users created while profiles were only created on sign-up have none, give them one like
+       `UserManager.create_user` now does.
+    """
+    User = apps.get_model('accounts', 'User')
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    user_ids = User.objects.filter(userprofile__isnull=True).values_list('id', flat=True)
+    UserProfile.objects.bulk_create([UserProfile(user_id=user_id) for user_id in user_ids.iterator()], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_profiles, migrations.RunPython.noop),
+    ]
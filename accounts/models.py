@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.conf import settings
 
@@ -7,13 +7,16 @@ class UserManager(BaseUserManager):
     """"
          Create and return a user with an email and password.
     """
-    def create_user(self, email, password, **extra_fields):
+    def create_user(self, email, password, profile=None, **extra_fields):
         if not email:
             raise ValueError("The Email field must be set")
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
         user.set_password(password)
-        user.save(using=self._db)
+        # The profile is created with the user, with the `profile` fields if given
+        with transaction.atomic(using=self._db):
+            user.save(using=self._db)
+            UserProfile.objects.using(self._db).create(user=user, **(profile or {}))
         return user 
     
     # Create a super user
@@ -27,6 +30,39 @@ class UserManager(BaseUserManager):
             raise ValueError("Superuser must have is_superuser=True.")
 
         return self.create_user(email, password, **extra_fields)
+    
+    # Create many users at once (admin import)
+    def bulk_create_users(self, rows, batch_size=500):
+        """
+             Create users and their profiles with bulk inserts, without per-row signals.
+             - Each row is a dict of user fields plus optional `password`, `address` and `bio`.
+             - Rows without a password get an unusable one, so the user has to reset it.
+        """
+        users, profiles = [], []
+        for row in rows:
+            row = dict(row)
+            password = row.pop('password', None)
+            profile_fields = {field: row.pop(field) for field in ('address', 'bio') if field in row}
+            user = self.model(**{**row, 'email': self.normalize_email(row['email'])})
+            if password:
+                user.set_password(password)
+            else:
+                user.set_unusable_password()
+            users.append(user)
+            profiles.append(profile_fields)
+        
+        with transaction.atomic(using=self._db):
+            created = self.bulk_create(users, batch_size=batch_size)
+            if any(user.pk is None for user in created):
+                # Backends that do not return primary keys from bulk inserts
+                ids = dict(self.filter(email__in=[user.email for user in created]).values_list('email', 'id'))
+                for user in created:
+                    user.pk = ids[user.email]
+            UserProfile.objects.bulk_create(
+                [UserProfile(user=user, **profile_fields) for user, profile_fields in zip(created, profiles)],
+                batch_size=batch_size,
+            )
+        return created
 
 # Class for the User model inheriting from AbstractUser
 class User(AbstractUser):
@@ -51,6 +87,17 @@ class User(AbstractUser):
     
     def __str__(self):
         return f'Name:{self.first_name} {self.last_name}, Email:{self.email}'
+    
+    def get_profile(self):
+        """
+             Return the user's profile, creating it on first access for users created without one
+             (e.g. with `User.objects.create`).
+        """
+        try:
+            return self.userprofile
+        except UserProfile.DoesNotExist:
+            profile, created = UserProfile.objects.get_or_create(user=self)
+            return profile
 
 
 # Class for the User Profile inheriting from models
@@ -61,5 +108,32 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateField(auto_now=True)
     
+    # Fields whose changes are written by save()
+    TRACKED_FIELDS = ('user_id', 'address', 'bio')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {name: value for name, value in zip(field_names, values) if name in cls.TRACKED_FIELDS}
+        return instance
+    
+    def changed_fields(self):
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        return [name for name, value in loaded.items() if getattr(self, name) != value]
+    
+    def save(self, *args, **kwargs):
+        """
+             Only write the fields that changed since the profile was loaded, and skip the write when nothing did.
+        """
+        changed = self.changed_fields()
+        if self.pk and changed is not None and 'update_fields' not in kwargs and not kwargs.get('force_insert'):
+            if not changed:
+                return
+            kwargs['update_fields'] = [name.removesuffix('_id') for name in changed] + ['updated_at']
+        super().save(*args, **kwargs)
+        self._loaded_values = {name: getattr(self, name) for name in self.TRACKED_FIELDS}
+    
     def __str__(self):
         return f"Profile of {self.user.first_name} {self.user.last_name}" 
\ No newline at end of file
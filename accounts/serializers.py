@@ -36,14 +36,11 @@ class UserSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         """
-          Create user and associated profile if provided.
+          Create user and associated profile, with the provided fields if any.
           
         """
         userprofile_data = validated_data.pop('userprofile', None)
-        user = User.objects.create_user(**validated_data)
-        
-        if userprofile_data:
-            UserProfile.objects.create(user=user, **userprofile_data)
+        user = User.objects.create_user(profile=userprofile_data, **validated_data)
 
         return user
             
@@ -56,14 +53,12 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         """
-          Create and return a new user instance, with hashed password.
+          Create and return a new user instance, with hashed password, and its profile.
         
         """
         password = password = validated_data.pop('password')  # Extract the password from validated data
-        user = User(**validated_data) # Create user object without saving to DB yet
-        user.set_password(password) # Hash the password for security
         try:
-            user.save() # Save the user to the database
+            user = User.objects.create_user(password=password, **validated_data) # Hash the password and save the user with its profile
         except Exception as e:
             raise ValidationError(f"Error saving user: {e}")
         return user # Return the user instance
@@ -1,58 +1,29 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
-from .models import UserProfile
+from .authentication import invalidate_cached_user
 import logging
 
 # For handling error reporting
 logger = logging.getLogger(__name__)
 
-# Signal to automatically create a UserProfile when a new user is created
-@receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def create_user_profile(sender, instance, created, **kwargs):
-    """
-    This function is triggered after a User instance is saved. 
-    If the user is newly created (created=True), a corresponding UserProfile is also created.
-    
-    Args:
-        sender: The model class that sent the signal (in this case, the custom user model).
-        instance: The actual instance of the user model that was saved.
-        created: A boolean indicating whether the instance was created (True) or updated (False).
-    """
-    try:
-        if created:  # Only create the profile if the user is newly created
-            UserProfile.objects.create(user=instance)  # Create a new UserProfile associated with the user
-    except Exception as e:
-        logger.error(f"Error creating UserProfile for {instance}: {e}")
+# UserProfile rows are no longer created or saved from User signals:
+# - UserManager.create_user (sign-up, createsuperuser) and UserManager.bulk_create_users create
+#   the profile together with the user, in the same transaction,
+# - users created otherwise (e.g. User.objects.create) get one on first access through User.get_profile(),
+# - UserProfile.save() only writes fields that changed,
+# - deleting a user removes the profile through the CASCADE on UserProfile.user.
 
-# Signal to save the UserProfile whenever the associated User instance is saved
+# Drop the cached user used by CachedJWTAuthentication whenever the user changes
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def save_user_profile(sender, instance, **kwargs):
-    """
-    This function is triggered after a User instance is saved. 
-    It ensures that the associated UserProfile is saved whenever the User is saved.
-    
-    Args:
-        sender: The model class that sent the signal (in this case, the custom user model).
-        instance: The actual instance of the user model that was saved.
-    """
-    try:
-        instance.userprofile.save()  # Save the related UserProfile instance to reflect changes
-    except UserProfile.DoesNotExist:
-        logger.warning(f"UserProfile for {instance} does not exist, skipping save.")
-
-# Automatically delete UserProfile when CustomUser is deleted
 @receiver(post_delete, sender=settings.AUTH_USER_MODEL)
-def delete_user_profile(sender, instance, **kwargs):
+def invalidate_user_cache(sender, instance, **kwargs):
     """
-    This function is triggered after a User instance is deleted. 
-    It ensures that the associated UserProfile is deleted when the User is deleted.
+    This function is triggered after a User instance is saved or deleted.
+    It removes the cached copy of the user so the next authenticated request reloads it.
     
     Args:
         sender: The model class that sent the signal (in this case, the custom user model).
-        instance: The actual instance of the user model that was deleted.
+        instance: The user instance that was saved or deleted.
     """
-    try:
-        instance.userprofile.delete()  # Delete the associated UserProfile
-    except UserProfile.DoesNotExist:
-        logger.info(f"UserProfile for {instance} does not exist, nothing to delete.")  # Log if the profile doesn't exist
+    invalidate_cached_user(instance.pk)
@@ -1,5 +1,13 @@
+from unittest import mock
+
 from rest_framework.test import APITestCase
 from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password
+from django.test import override_settings
+from accounts.models import UserProfile
+
+User = get_user_model()
 
 # User Registration Test Case
 class UserRegistrationTestCase(APITestCase):
@@ -16,6 +24,22 @@ class UserRegistrationTestCase(APITestCase):
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertIn('The user registered successfully.', str(response.data))
+
+    def test_registered_user_has_a_profile(self):
+        data = {'first_name': 'John', 'last_name': 'Doe', 'email': 'johndoe@gmail.com', 'phone_number': '+254797086131', 'password': 'Password@123'}
+        self.client.post('/users/auth/register/', data, format='json')
+        user = User.objects.get(email='johndoe@gmail.com')
+
+        # The admin profile list shows it
+        admin = User.objects.create(email='admin@gmail.com', phone_number='0700000000', is_staff=True)
+        self.client.force_authenticate(user=admin)
+        response = self.client.get('/users/auth/profiles/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([profile['url'] for profile in response.data], [f'http://testserver/users/auth/profiles/{user.userprofile.pk}/'])
+
+    def test_users_created_by_the_manager_have_a_profile(self):
+        user = User.objects.create_superuser(email='admin@gmail.com', password='Admin@123', phone_number='0700000000')
+        self.assertTrue(UserProfile.objects.filter(user=user).exists())
         
 # User Login Test Case
 class UserLoginTestCase(APITestCase):
@@ -90,7 +114,7 @@ class UserLogoutTestCase(APITestCase):
         print(f"Response data: {response.data}")
 
         # Check if the logout was successful
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('User logged out successfully', str(response.data))
 
     def test_logout_failure_no_refresh_token(self):
@@ -118,3 +142,40 @@ class UserLogoutTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('Invalid refresh token or error blacklisting token', str(response.data))
  
+
+
+# Password hashing on login Test Case
+class UserLoginHashingTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name='John',
+            last_name='Doe',
+            email='johndoe@gmail.com',
+            phone_number='+254797086131',
+            password='Password@123'
+        )
+        self.login_data = {'email': 'johndoe@gmail.com', 'password': 'Password@123'}
+
+    def test_login_verifies_password_once(self):
+        with mock.patch('django.contrib.auth.base_user.check_password', wraps=check_password) as checker:
+            response = self.client.post('/users/auth/login/', self.login_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(checker.call_count, 1)
+
+    def test_login_rehashes_to_configured_work_factor(self):
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            self.user.set_password('Password@123')
+            self.user.save()
+        self.assertIn('$1000$', self.user.password)
+
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            response = self.client.post('/users/auth/login/', self.login_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertIn('$2000$', self.user.password)
+
+    def test_inactive_user_cannot_login(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post('/users/auth/login/', self.login_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,87 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from accounts.authentication import invalidate_cached_users, user_cache_key
+from accounts.tokens import generate_tokens
+
+User = get_user_model()
+
+
+# Test cases for the cached JWT authentication
+class CachedJWTAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            first_name='John',
+            last_name='Doe',
+            email='johndoe@gmail.com',
+            phone_number='1234567890',
+            password='Password@123'
+        )
+        self.url = '/v1/carts/'
+
+    def authorize(self):
+        token = generate_tokens(self.user)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_user_is_loaded_once(self):
+        """
+        Test that only the first request loads the user from the database.
+        """
+        self.authorize()
+        with self.assertNumQueries(2):  # User lookup and cart list
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(1):  # Cart list only
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_saving_the_user_invalidates_the_cache(self):
+        """
+        Test that a deactivated user is rejected on the next request.
+        """
+        self.authorize()
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cache_holds_no_password_hash(self):
+        """
+        Test that the cached user carries only the fields authentication needs.
+        """
+        self.authorize()
+        self.client.get(self.url)
+        cached = cache.get(user_cache_key(self.user.id))
+        self.assertIsInstance(cached, dict)
+        self.assertNotIn('password', cached)
+        self.assertNotIn(self.user.password, cached.values())
+
+    def test_bulk_updates_are_invalidated_explicitly(self):
+        """
+        Test that a user deactivated by a queryset update is rejected once the cache is invalidated.
+        """
+        self.authorize()
+        self.client.get(self.url)
+        User.objects.filter(id=self.user.id).update(is_active=False)
+        invalidate_cached_users([self.user.id])
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(JWT_EMBED_USER_CLAIMS=True)
+    def test_embedded_claims_need_no_user_query(self):
+        """
+        Test that a token carrying the user claims authenticates without a user query.
+        """
+        self.authorize()
+        with self.assertNumQueries(1):  # Cart list only
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(JWT_EMBED_USER_CLAIMS=True)
+    def test_embedded_claims_reject_inactive_user(self):
+        """
+        Test that an inactive flag in the token is rejected.
+        """
+        self.user.is_active = False
+        self.authorize()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,102 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from accounts.blacklist import token_blacklist_filter
+from accounts.tokens import blacklist_token, generate_tokens
+
+User = get_user_model()
+
+
+# Test cases for the in-memory refresh token blacklist
+class TokenBlacklistFilterTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        token_blacklist_filter.reset()
+        # The test cache is one process's memory, treat it as the shared cache of a deployment
+        patcher = mock.patch('accounts.blacklist.cache_is_shared', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(
+            first_name='John',
+            last_name='Doe',
+            email='johndoe@gmail.com',
+            phone_number='1234567890',
+            password='Password@123'
+        )
+        self.refresh = generate_tokens(self.user)['refresh']
+
+    def test_blacklisted_token_cannot_refresh(self):
+        """
+        Test that a refresh token stops working once it is blacklisted.
+        """
+        response = self.client.post('/users/auth/api/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertTrue(blacklist_token(self.refresh))
+        response = self.client.post('/users/auth/api/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_checks_skip_the_database_once_warm(self):
+        """
+        Test that blacklist checks only query the database to warm up or after a new blacklisting.
+        """
+        token_blacklist_filter.contains('unknown')
+        with self.assertNumQueries(0):
+            self.assertFalse(token_blacklist_filter.contains('unknown'))
+
+    def test_blacklisting_by_another_worker_is_picked_up(self):
+        """
+        Test that a token blacklisted elsewhere is seen after the generation counter moves.
+        """
+        token_blacklist_filter.contains('unknown')
+        outstanding = OutstandingToken.objects.get(user=self.user)
+        BlacklistedToken.objects.create(token=outstanding)  # Written by another worker
+        cache.set('jwt:blacklist:generation', 12345)
+        self.assertTrue(token_blacklist_filter.contains(outstanding.jti))
+
+    def test_blacklisting_committed_late_is_picked_up(self):
+        """
+        Test that a sync re-reads recent rows, not only those with a higher id than the last one seen.
+        """
+        token_blacklist_filter.contains('unknown')
+        late = OutstandingToken.objects.get(user=self.user)
+        generate_tokens(self.user)
+        blacklist_token(OutstandingToken.objects.exclude(id=late.id).get().token)
+        self.assertFalse(token_blacklist_filter.contains(late.jti))
+
+        # Inserted before the one above (a lower id) but committed after it
+        BlacklistedToken.objects.create(token=late, id=BlacklistedToken.objects.get().id - 1)
+        BlacklistedToken.objects.filter(token=late).update(blacklisted_at=timezone.now() - timedelta(seconds=5))
+        cache.incr('jwt:blacklist:generation')
+        self.assertTrue(token_blacklist_filter.contains(late.jti))
+
+    def test_process_local_cache_checks_the_database(self):
+        """
+        Test that without a shared cache, a token blacklisted by another worker is seen at once.
+        """
+        token_blacklist_filter.contains('unknown')
+        outstanding = OutstandingToken.objects.get(user=self.user)
+        BlacklistedToken.objects.create(token=outstanding)  # Written by another worker, whose counter is not seen
+        with mock.patch('accounts.blacklist.cache_is_shared', return_value=False):
+            self.assertTrue(token_blacklist_filter.contains(outstanding.jti))
+
+    def test_purge_expired_tokens(self):
+        """
+        Test that expired outstanding and blacklisted tokens are deleted.
+        """
+        blacklist_token(self.refresh)
+        generate_tokens(self.user)
+        OutstandingToken.objects.filter(id=OutstandingToken.objects.order_by('id').first().id).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        call_command('purge_expired_tokens', batch_size=1, stdout=StringIO())
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertFalse(BlacklistedToken.objects.exists())
@@ -134,4 +134,50 @@ class UserProfileModelTestCase(TestCase):
 #         self.assertTrue(hasattr(user, 'userprofile'))
 
         
-        
\ No newline at end of file
+        
+
+# Test cases for lazy, change-driven profile persistence
+class UserProfilePersistenceTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name='Test',
+            last_name='User',
+            email='testuser@gmail.com',
+            phone_number='1234567894',
+            password='Password123'
+        )
+
+    def test_user_writes_do_not_touch_the_profile(self):
+        # Creating a user creates its profile, and saving a user is a single UPDATE
+        self.assertTrue(UserProfile.objects.filter(user=self.user).exists())
+        with self.assertNumQueries(1):
+            self.user.save(update_fields=['last_login'])
+
+    def test_profile_is_created_on_first_access(self):
+        # Users not created through the manager have no profile until it is read
+        user = User.objects.create(email='other@gmail.com', phone_number='1234567895')
+        profile = user.get_profile()
+        self.assertEqual(profile.user, user)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.get_profile(), profile)
+
+    def test_unchanged_profile_is_not_saved(self):
+        self.user.get_profile()
+        profile = UserProfile.objects.get(user=self.user)
+        with self.assertNumQueries(0):
+            profile.save()
+        profile.bio = 'Farmer from Nakuru'
+        with self.assertNumQueries(1):
+            profile.save()
+        self.assertEqual(UserProfile.objects.get(user=self.user).bio, 'Farmer from Nakuru')
+
+    def test_bulk_create_users(self):
+        users = User.objects.bulk_create_users([
+            {'email': 'one@gmail.com', 'first_name': 'One', 'last_name': 'User', 'phone_number': '0700000001', 'password': 'Password123', 'address': 'Nakuru'},
+            {'email': 'two@GMAIL.com', 'first_name': 'Two', 'last_name': 'User', 'phone_number': '0700000002'},
+        ])
+        self.assertEqual(len(users), 2)
+        self.assertTrue(User.objects.get(email='one@gmail.com').check_password('Password123'))
+        self.assertFalse(User.objects.get(email='two@gmail.com').has_usable_password())
+        self.assertEqual(UserProfile.objects.get(user__email='one@gmail.com').address, 'Nakuru')
+        self.assertEqual(UserProfile.objects.filter(user__in=users).count(), 2)
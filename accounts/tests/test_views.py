@@ -29,7 +29,7 @@ class UserViewsTestCase(APITestCase):
         self.regular_user.save()
         
         # Create a UserProfile for the admin user if needed
-        self.user_profile = UserProfile.objects.create(user=self.admin_user)
+        self.user_profile = self.admin_user.get_profile()
     
     def test_user_list_view_as_admin(self):
         """
@@ -139,7 +139,7 @@ class UserViewsTestCase(APITestCase):
         )
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)  # Only one profile created in setUp
+        self.assertEqual(len(response.data), 2)  # One profile per user, created with it
         
     def test_user_profile_create_view(self):
         """
@@ -1,9 +1,18 @@
 from django.conf import settings
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from .authentication import EMBEDDED_USER_CLAIMS
+from .blacklist import FilteredRefreshToken
+import logging
+
+# For handling error reporting
+logger = logging.getLogger(__name__)
 
 def generate_tokens(user):
-    refresh = RefreshToken.for_user(user)
+    refresh = FilteredRefreshToken.for_user(user)
+    
+    # Embed the user claims so authentication and permission checks need no query
+    if settings.JWT_EMBED_USER_CLAIMS:
+        for claim in EMBEDDED_USER_CLAIMS:
+            refresh[claim] = getattr(user, claim)
     
     # Use the settings for token expiration times
     refresh.set_exp(lifetime=settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'])
@@ -17,10 +26,10 @@ def generate_tokens(user):
 # Function to blacklist token
 def blacklist_token(refresh_token):
     try:
-        # Create a new BlacklistedToken entry with the refresh token
-        BlacklistedToken.objects.create(token=refresh_token)
+        # Add the refresh token to the blacklist table and this worker's in-memory filter
+        FilteredRefreshToken(refresh_token).blacklist()
         return True
     except Exception as e:
         # Log the error for debugging
-        print(f"Error blacklisting token: {str(e)}")
-        return False
\ No newline at end of file
+        logger.warning(f"Error blacklisting token: {str(e)}")
+        return False
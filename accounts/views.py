@@ -1,6 +1,6 @@
 from rest_framework import status
 from .tokens import generate_tokens
-from django.contrib.auth.hashers import check_password
+from django.contrib.auth import authenticate
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.permissions import IsAuthenticated
@@ -27,6 +27,7 @@ class UserRegistrationView(CreateAPIView):
     """
     serializer_class = UserRegistrationSerializer
     permission_classes = [AllowAny]
+    throttle_scope = 'register'
     
     def post(self, request, *args, **kwargs):
         """
@@ -51,6 +52,7 @@ class UserLoginView(APIView):
         - Returns JWT tokens (access and refresh tokens) on successful login.
     """
     permission_classes = [AllowAny]
+    throttle_scope = 'login'
     
     def post(self, request, *args, **kwargs):
         # Extract email and password from request data
@@ -60,41 +62,30 @@ class UserLoginView(APIView):
         # Check if email and password are provided
         if not email or not password:
             raise ValidationError("Email and password are required fields.")
-            
-        try:
-            # Get the user by email
-            user = User.objects.get(email=email)   
-        except User.DoesNotExist:
-            return Response({'error': 'Invalid email or password'}, status=status.HTTP_401_UNAUTHORIZED)    
         
-        # Check the password manually
-        if not user.check_password(password):
+        # Look the user up and verify the password once; a changed hasher or work factor
+        # rehashes the password on success
+        user = authenticate(request, email=email, password=password)
+        if user is None:
             return Response({'error': 'Invalid email or password'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        # Generate the tokens for the authenticated user
-        if user and check_password(password, user.password):
-            # Create JWT tokens for the authenticated user
-            token = generate_tokens(user)
-            
-            # Return response with tokens and user details
-            return Response(
-                {
-                    'refresh': token['refresh'],
-                    'access': token['access'],
-                    'user': {
-                        'id': user.id,
-                        'email': user.email,
-                        'first_name': user.first_name,
-                        'last_name': user.last_name,
-                        'roles': user.roles
-                    }
-                },
-                status=status.HTTP_200_OK
-            )
-        # If authentication fails, return an error message    
+        # Create JWT tokens for the authenticated user
+        token = generate_tokens(user)
+        
+        # Return response with tokens and user details
         return Response(
-            {'detail': 'Incorrect email or password'},
-            status=status.HTTP_401_UNAUTHORIZED
+            {
+                'refresh': token['refresh'],
+                'access': token['access'],
+                'user': {
+                    'id': user.id,
+                    'email': user.email,
+                    'first_name': user.first_name,
+                    'last_name': user.last_name,
+                    'roles': user.roles
+                }
+            },
+            status=status.HTTP_200_OK
         )
         
         
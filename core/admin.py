@@ -0,0 +1,25 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import IdempotencyKey, Job
+
+# Idempotency key admin
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'user', 'method', 'path', 'response_status', 'created_at', 'expires_at')
+    search_fields = ('key', 'path')
+    list_filter = ('method', 'response_status')
+
+admin.site.register(IdempotencyKey, IdempotencyKeyAdmin)
+
+
+# Background job admin, failed jobs can be queued again from here
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'queue', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'created_at')
+    search_fields = ('task',)
+    list_filter = ('status', 'queue', 'task')
+    actions = ['retry_jobs']
+
+    @admin.action(description='Queue the selected jobs again')
+    def retry_jobs(self, request, queryset):
+        queryset.exclude(status=Job.RUNNING).update(status=Job.QUEUED, attempts=0, run_at=timezone.now(), locked_by='', locked_at=None)
+
+admin.site.register(Job, JobAdmin)
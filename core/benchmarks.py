@@ -0,0 +1,247 @@
+import json
+import math
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+from accounts.authentication import invalidate_cached_user
+from accounts.tokens import generate_tokens
+from orders.models import Order, OrderItem
+from payments.models import Payment, PaymentMethod
+from products.models import Cart, CartItem, Product
+from .middleware import QueryRecorder
+
+User = get_user_model()
+
+DEFAULT_BUDGETS_PATH = Path(__file__).resolve().parent / 'benchmark_budgets.json'
+
+# Orders and cart of the benchmark user; fixed so query counts do not depend on the dataset size
+FIXTURE_ORDERS = 20
+FIXTURE_ITEMS_PER_ORDER = 3
+FIXTURE_CART_ITEMS = 5
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class BenchmarkFixture:
+    """
+       A benchmark user with a fixed order history and cart, built on top of an existing (seeded) catalog.
+       Create it inside a transaction that is rolled back afterwards.
+    """
+    def __init__(self):
+        products = list(Product.objects.order_by('-rating_count', 'id')[:FIXTURE_ORDERS * FIXTURE_ITEMS_PER_ORDER])
+        if len(products) < FIXTURE_ITEMS_PER_ORDER * 2:
+            raise BenchmarkError('Not enough products to benchmark against, run `manage.py seed_marketplace` first.')
+        self.product = products[0]  # The most reviewed product
+        self.category_id = self.product.category_id
+        self.search_term = self.product.name.split()[1]
+
+        self.user = User.objects.create_user(
+            email='benchmark@ruralmart.invalid', phone_number='benchmark-user', password='Benchmark@123',
+            first_name='Bench', last_name='Mark',
+        )
+        self.access_token = generate_tokens(self.user)['access']
+        self.payment_method = PaymentMethod.objects.order_by('id').first() or PaymentMethod.objects.create(name='Card')
+
+        # Built with bulk inserts, Order.save and OrderItem.save keep recalculating totals
+        orders = Order.objects.bulk_create([Order(user=self.user, status='delivered') for _ in range(FIXTURE_ORDERS)])
+        items = []
+        for index, order in enumerate(orders):
+            for product in (products[(index + offset) % len(products)] for offset in range(FIXTURE_ITEMS_PER_ORDER)):
+                items.append(OrderItem(order=order, product=product, quantity=2, unit_price=product.price, total_price=product.price * 2))
+        OrderItem.objects.bulk_create(items)
+        self.cart = Cart.objects.create(user=self.user)
+        self.cart_items = CartItem.objects.bulk_create(
+            [CartItem(cart=self.cart, product=product, quantity=1) for product in products[:FIXTURE_CART_ITEMS]]
+        )
+        self.counter = 0
+
+    def next(self):
+        self.counter += 1
+        return self.counter
+
+    def new_order(self):
+        return Order.objects.bulk_create([Order(user=self.user, total_amount=Decimal('250.00'))])[0]
+
+    def new_payment(self):
+        reference = f'benchmark-{self.next()}'
+        payment = Payment.objects.create(
+            user=self.user, order=self.new_order(), amount=Decimal('250.00'), payment_method=self.payment_method,
+            transaction_reference=reference, payment_gateway='paystack',
+        )
+        return payment, reference
+
+
+# Scenarios: name -> (authenticated, prepare), where prepare(fixture) returns (method, path, data).
+# prepare runs before the timed request, so setup such as creating a fresh order is not measured.
+# Reads of the fixture user's orders run before the scenarios that create orders.
+SCENARIOS = {
+    'product_list': (False, lambda f: ('get', '/v1/products/', None)),
+    'product_search': (False, lambda f: ('get', f'/v1/products/?search={f.search_term}', None)),
+    'product_filter': (False, lambda f: ('get', f'/v1/products/?category={f.category_id}&min_price=1&max_price=500&ordering=-price', None)),
+    # The cart's products in one request, from the per-object cache once warmed up
+    'product_batch': (False, lambda f: ('get', f'/v1/products/?ids={",".join(str(item.product_id) for item in f.cart_items)}', None)),
+    'category_list': (False, lambda f: ('get', '/v1/categories/', None)),
+    'review_list': (False, lambda f: ('get', f'/v4/products/{f.product.id}/reviews/?sort=helpful', None)),
+    'cart_read': (True, lambda f: ('get', '/v1/carts/', None)),
+    'cart_write': (True, lambda f: ('patch', f'/v1/cart-items/{f.cart_items[0].id}/', {'quantity': f.next() % 5 + 1})),
+    'order_history': (True, lambda f: ('get', '/v2/orders/', None)),
+    'checkout': (True, lambda f: ('post', '/v2/orders/', {})),
+    'payment_create': (True, lambda f: ('post', '/v3/create-payment/', {'order_id': f.new_order().id, 'payment_method_id': f.payment_method.id})),
+    'payment_process': (True, lambda f: _process_payment_request(f)),
+}
+
+
+def _process_payment_request(fixture):
+    payment, reference = fixture.new_payment()
+    return 'post', '/v3/process-payment/', {'payment_id': payment.id, 'transaction_reference': reference}
+
+
+async def _stub_initialize(email, amount, order_id):
+    reference = f'benchmark-init-{order_id}'
+    return {'status': True, 'data': {'reference': reference, 'authorization_url': f'https://checkout.paystack.com/{reference}'}}
+
+
+def _stub_verify(reference):
+    return {'status': True, 'data': {'status': 'success', 'reference': reference}}
+
+
+def _percentile(sorted_values, percent):
+    return sorted_values[max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)]
+
+
+@contextmanager
+def _count_queries():
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+def run_scenario(client, fixture, name, iterations=30, warmup=3, alloc_iterations=3):
+    """
+       Run one scenario and return its latency percentiles (ms), the most queries one request ran and
+       the peak memory allocated by one request (KB, traced with tracemalloc in a separate pass).
+    """
+    authenticated, prepare = SCENARIOS[name]
+    if authenticated:
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {fixture.access_token}')
+    else:
+        client.credentials()
+
+    def request():
+        method, path, data = prepare(fixture)
+        with _count_queries() as recorder:
+            started = time.perf_counter()
+            response = getattr(client, method)(path, data, format='json')
+            elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise BenchmarkError(f'{name}: {method.upper()} {path} returned {response.status_code}: {response.content[:200]!r}')
+        return elapsed, recorder.count
+
+    latencies, queries = [], []
+    for index in range(warmup + iterations):
+        elapsed, count = request()
+        if index >= warmup:
+            latencies.append(elapsed * 1000)
+            queries.append(count)
+
+    peak_allocations = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations):
+            method, path, data = prepare(fixture)
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            getattr(client, method)(path, data, format='json')
+            peak_allocations.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(_percentile(latencies, 50), 2),
+        'p95_ms': round(_percentile(latencies, 95), 2),
+        'p99_ms': round(_percentile(latencies, 99), 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+        'queries': max(queries),
+        'peak_alloc_kb': round(max(peak_allocations, default=0) / 1024, 1),
+    }
+
+
+def run_benchmarks(names=None, iterations=30, warmup=3, alloc_iterations=3):
+    """
+       Run the scenarios against the current database. Must be called inside a transaction that is
+       rolled back, since the fixture and the write scenarios create rows.
+       Throttling is disabled and the Paystack calls are stubbed, so only this application is measured.
+    """
+    names = names or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise BenchmarkError(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+
+    fixture = BenchmarkFixture()
+    client = APIClient()
+    results = {}
+    try:
+        with override_settings(THROTTLE_BUCKETS={}, ALLOWED_HOSTS=['testserver']), \
+                mock.patch('payments.views.ainitialize_payment', _stub_initialize), \
+                mock.patch('payments.paystack_service.verify_payment', _stub_verify):
+            for name in names:
+                results[name] = run_scenario(client, fixture, name, iterations, warmup, alloc_iterations)
+    finally:
+        # The user is rolled back with the transaction, but its cache entry would outlive it
+        invalidate_cached_user(fixture.user.pk)
+    return results
+
+
+def load_budgets(path=DEFAULT_BUDGETS_PATH):
+    with open(path, encoding='utf-8') as budgets_file:
+        return json.load(budgets_file)
+
+
+def check_budgets(results, budgets, latency=True):
+    """
+       Compare results with the budgets and return a list of violations.
+       Query counts are deterministic and always checked; latency and allocation budgets depend on the
+       machine and can be skipped with `latency=False`.
+    """
+    violations = []
+    for name, result in results.items():
+        budget = budgets.get(name)
+        if budget is None:
+            violations.append(f'{name}: no budget')
+            continue
+        checks = [('queries', 'max_queries')]
+        if latency:
+            checks += [('p95_ms', 'p95_ms'), ('peak_alloc_kb', 'peak_alloc_kb')]
+        for measured, limit in checks:
+            if limit in budget and result[measured] > budget[limit]:
+                violations.append(f'{name}: {measured} {result[measured]} exceeds budget {budget[limit]}')
+    return violations
+
+
+def budgets_from_results(results, headroom=2.0, min_headroom_ms=10):
+    """
+       Budgets for the measured results: exact query counts, latency and allocations with headroom
+       (at least `min_headroom_ms` on latency, so fast endpoints do not fail on noise).
+    """
+    return {
+        name: {
+            'max_queries': result['queries'],
+            'p95_ms': round(max(result['p95_ms'] * headroom, result['p95_ms'] + min_headroom_ms), 1),
+            'peak_alloc_kb': round(result['peak_alloc_kb'] * headroom, 1),
+        }
+        for name, result in results.items()
+    }
@@ -0,0 +1,14 @@
+from django.conf import settings
+
+# Backends whose entries live in the memory of one process, unseen by the other workers
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def cache_is_shared(alias='default'):
+    """
+       Whether all the worker processes (and servers) see the same entries in this cache.
+    """
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
@@ -0,0 +1,20 @@
+from django.core.checks import Tags, Warning, register
+from .cache import cache_is_shared
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+       Production runs several workers, which must share the cache (`manage.py check --deploy`).
+    """
+    if cache_is_shared():
+        return []
+    return [Warning(
+        'The default cache is local to each process.',
+        hint=(
+            'Set REDIS_URL. Without a shared cache, each worker keeps its own cached users, token blacklist '
+            'generation, throttle buckets, replica stickiness, Paystack single-flight locks and cached products, '
+            'so a change made through one worker (e.g. a price) is not seen by the others until it expires.'
+        ),
+        id='core.W001',
+    )]
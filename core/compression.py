@@ -0,0 +1,106 @@
+import re
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Optional, responses are only gzipped without it
+    brotli = None
+
+# Compression levels suited to compressing every response on the fly; the top levels cost far more CPU for a few percent
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Responses worth compressing: JSON, MessagePack (binary, but with JSON's repeated keys), YAML, text, JavaScript, XML and SVG
+_COMPRESSIBLE_RE = re.compile(
+    r'^(?:text/|image/svg\+xml|application/(?:json|msgpack|javascript|xml|x-yaml|yaml|vnd\.oai\.openapi|[\w.+-]+\+(?:json|xml)))',
+    re.IGNORECASE,
+)
+
+
+def is_compressible(content_type):
+    return bool(_COMPRESSIBLE_RE.match(content_type or ''))
+
+
+def available_encodings():
+    # In order of preference when the client accepts several equally
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def negotiate_encoding(accept_encoding):
+    """
+       The encoding to use for a client's `Accept-Encoding` header, honouring q-values, or None for no compression.
+    """
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, parameters = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', parameters)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class Encoder:
+    """
+       Incremental gzip or brotli compressor.
+       `compress(data, flush=True)` returns output the client can decode right away, which streamed responses need.
+    """
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits=31 writes a gzip header (with a zero mtime, so equal content compresses to equal bytes)
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data, flush=False):
+        if self.encoding == 'br':
+            output = self._brotli.process(data)
+            return output + self._brotli.flush() if flush else output
+        output = self._zlib.compress(data)
+        return output + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else output
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def compress_bytes(data, encoding):
+    encoder = Encoder(encoding)
+    return encoder.compress(data) + encoder.finish()
+
+
+def compress_stream(chunks, encoding):
+    """
+       Compress a streamed response chunk by chunk. Each chunk is flushed so the client receives it right away;
+       streams that yield many tiny chunks compress better when they batch rows into larger ones.
+    """
+    encoder = Encoder(encoding)
+    for chunk in chunks:
+        output = encoder.compress(chunk, flush=True)
+        if output:
+            yield output
+    yield encoder.finish()
+
+
+async def acompress_stream(chunks, encoding):
+    encoder = Encoder(encoding)
+    async for chunk in chunks:
+        output = encoder.compress(chunk, flush=True)
+        if output:
+            yield output
+    yield encoder.finish()
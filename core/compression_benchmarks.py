@@ -0,0 +1,68 @@
+import time
+
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+from accounts.authentication import invalidate_cached_user
+from .benchmarks import SCENARIOS as API_SCENARIOS
+from .benchmarks import BenchmarkError, BenchmarkFixture, _percentile
+from .compression import available_encodings
+
+# Read scenarios of the API benchmark whose payloads are compared; the unpaginated product list and order history
+SCENARIOS = ('product_list', 'order_history', 'category_list', 'cart_read')
+DEFAULT_SCENARIOS = ('product_list', 'order_history')
+
+
+def _encodings():
+    return ('identity',) + available_encodings()
+
+
+def run_compression_benchmarks(names=None, iterations=20, bandwidth_kbps=750, rtt_ms=200):
+    """
+       Request each scenario's payload uncompressed, gzipped and brotli-compressed (when installed), and report
+       the bytes sent, the server time (p50, ms, including compression) and an estimate of the time a client on a
+       `bandwidth_kbps` link with `rtt_ms` round trips waits for the whole response.
+       Must be called inside a transaction that is rolled back, like `run_benchmarks`.
+    """
+    names = names or list(DEFAULT_SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise BenchmarkError(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+
+    fixture = BenchmarkFixture()
+    client = APIClient()
+    results = {}
+    try:
+        with override_settings(THROTTLE_BUCKETS={}, ALLOWED_HOSTS=['testserver']):
+            for name in names:
+                authenticated, prepare = API_SCENARIOS[name]
+                client.credentials(**({'HTTP_AUTHORIZATION': f'Bearer {fixture.access_token}'} if authenticated else {}))
+                _, path, _ = prepare(fixture)
+                results[name] = {
+                    encoding: _measure(client, path, encoding, iterations, bandwidth_kbps, rtt_ms) for encoding in _encodings()
+                }
+    finally:
+        invalidate_cached_user(fixture.user.pk)
+    return results
+
+
+def _measure(client, path, encoding, iterations, bandwidth_kbps, rtt_ms):
+    latencies = []
+    for _ in range(iterations + 1):
+        started = time.perf_counter()
+        response = client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise BenchmarkError(f'GET {path} returned {response.status_code}: {response.content[:200]!r}')
+    sent = response.get('Content-Encoding', 'identity')
+    if sent != encoding:
+        raise BenchmarkError(f'GET {path} was sent as {sent} instead of {encoding}, is it under COMPRESSION_MIN_BYTES?')
+
+    latencies = sorted(latencies[1:])  # The first request warms up
+    size = len(response.content)
+    transfer_ms = size * 8 / bandwidth_kbps
+    return {
+        'bytes': size,
+        'p50_ms': round(_percentile(latencies, 50), 2),
+        'transfer_ms': round(transfer_ms, 1),
+        'client_ms': round(_percentile(latencies, 50) + rtt_ms + transfer_ms, 1),
+    }
@@ -0,0 +1,129 @@
+import asyncio
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import httpx
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test.utils import override_settings
+from accounts.authentication import invalidate_cached_user
+from .benchmarks import BenchmarkError, BenchmarkFixture
+
+# Scenarios: name -> prepare(fixture, count), returning `count` (method, path, data) requests.
+# Requests are prepared up front, so e.g. creating the orders to pay for is not measured.
+SCENARIOS = {
+    'product_list': lambda f, count: [('GET', '/v1/products/', None)] * count,
+    'product_detail': lambda f, count: [('GET', f'/v1/products/{f.product.id}/', None)] * count,
+    'payment_status': lambda f, count: [('GET', f'/v3/payment-status/{f.new_payment()[0].id}/', None)] * count,
+    'payment_create': lambda f, count: [
+        ('POST', '/v3/create-payment/', {'order_id': f.new_order().id, 'payment_method_id': f.payment_method.id})
+        for _ in range(count)
+    ],
+}
+MODES = ('wsgi', 'asgi')
+
+
+def _stub_initialize(latency):
+    # Paystack replaced by a fixed delay, so the benchmark shows how each mode spends time waiting on it
+    async def initialize(email, amount, order_id):
+        await asyncio.sleep(latency)
+        reference = f'concurrency-{order_id}'
+        return {'status': True, 'data': {'reference': reference, 'authorization_url': f'https://checkout.paystack.com/{reference}'}}
+    return initialize
+
+
+def _percentile(sorted_values, percent):
+    return sorted_values[max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)]
+
+
+async def _drive(send, requests, concurrency):
+    """
+       Send the requests with at most `concurrency` in flight; latency includes time queued for the server.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def one(request):
+        async with semaphore:
+            started = time.perf_counter()
+            status_code = await send(request)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if status_code >= 400:
+                errors.append(status_code)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(request) for request in requests))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(requests),
+        'errors': len(errors),
+        'throughput_rps': round(len(requests) / elapsed, 1),
+        'p50_ms': round(_percentile(latencies, 50), 1),
+        'p95_ms': round(_percentile(latencies, 95), 1),
+        'max_ms': round(latencies[-1], 1),
+    }
+
+
+async def _run_wsgi(requests, concurrency, headers, threads):
+    # One WSGI worker with `threads` threads (gunicorn's gthread worker): a request holds its thread
+    # for its whole duration, including while the view waits on Paystack
+    application = get_wsgi_application()
+    loop = asyncio.get_running_loop()
+
+    def call(request):
+        method, path, data = request
+        try:
+            with httpx.Client(transport=httpx.WSGITransport(app=application), base_url='http://testserver', headers=headers) as client:
+                return client.request(method, path, json=data).status_code
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return await _drive(lambda request: loop.run_in_executor(pool, call, request), requests, concurrency)
+
+
+async def _run_asgi(requests, concurrency, headers):
+    # One ASGI worker: a single event loop, async views only use a thread for their ORM calls
+    application = get_asgi_application()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=application), base_url='http://testserver', headers=headers) as client:
+        async def send(request):
+            method, path, data = request
+            response = await client.request(method, path, json=data)
+            return response.status_code
+        return await _drive(send, requests, concurrency)
+
+
+def run_concurrency_benchmarks(names=None, modes=MODES, requests=200, concurrency=50, wsgi_threads=4, paystack_latency=0.2):
+    """
+       Compare how many concurrent requests one worker serves under WSGI and under ASGI.
+       The fixture rows are committed, since the servers' threads use their own connections, and deleted afterwards.
+       Throttling is disabled and Paystack is replaced by a `paystack_latency` second delay.
+    """
+    names = names or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise BenchmarkError(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+
+    fixture = BenchmarkFixture()
+    headers = {'Authorization': f'Bearer {fixture.access_token}'}
+    results = {}
+    try:
+        with override_settings(THROTTLE_BUCKETS={}, ALLOWED_HOSTS=['testserver']), \
+                mock.patch('payments.views.ainitialize_payment', _stub_initialize(paystack_latency)):
+            for name in names:
+                for mode in modes:
+                    prepared = SCENARIOS[name](fixture, requests)
+                    if mode == 'wsgi':
+                        result = asyncio.run(_run_wsgi(prepared, concurrency, headers, wsgi_threads))
+                    else:
+                        result = asyncio.run(_run_asgi(prepared, concurrency, headers))
+                    results.setdefault(name, {})[mode] = result
+    finally:
+        invalidate_cached_user(fixture.user.pk)
+        fixture.user.delete()
+    return results
@@ -0,0 +1,121 @@
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+# For handling error reporting
+logger = logging.getLogger(__name__)
+
+# Routing state of the current request; None outside requests, so commands and workers use the primary
+_routing = ContextVar('replica_routing', default=None)
+
+# Seconds behind the primary; 0 when the replica has replayed everything it received
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+# Last lag measurement per replica for this worker: alias -> (checked_at, healthy)
+_health = {}
+_health_lock = threading.Lock()
+
+
+class RequestRouting:
+    """
+       Per-request routing state set by `ReplicaRoutingMiddleware`.
+       `use_replica` is only true for safe-method requests from clients that have not written recently;
+       `wrote` records that the request wrote, so the client is pinned to the primary afterwards.
+    """
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+def start_request(use_replica):
+    state = RequestRouting(use_replica)
+    return state, _routing.set(state)
+
+
+def end_request(token):
+    _routing.reset(token)
+
+
+def replica_lag(alias):
+    """
+       How far a replica is behind the primary, in seconds.
+    """
+    with connections[alias].cursor() as cursor:
+        cursor.execute(REPLICA_LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+def replica_is_healthy(alias):
+    """
+       Whether a replica is reachable and within `REPLICA_MAX_LAG_SECONDS`, measured at most once per
+       `REPLICA_LAG_CHECK_INTERVAL` seconds per worker.
+    """
+    now = time.monotonic()
+    checked = _health.get(alias)
+    if checked and now - checked[0] < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return checked[1]
+
+    with _health_lock:
+        try:
+            lag = replica_lag(alias)
+            healthy = lag <= settings.REPLICA_MAX_LAG_SECONDS
+            if not healthy:
+                logger.warning(f"Replica {alias} is {lag:.1f}s behind, reading from the primary")
+        except DatabaseError as e:
+            healthy = False
+            logger.warning(f"Replica {alias} is unavailable, reading from the primary: {str(e)}")
+        _health[alias] = (now, healthy)
+    return healthy
+
+
+def reset_replica_health():
+    with _health_lock:
+        _health.clear()
+
+
+class ReplicaRouter:
+    """
+       Send reads to a read replica and everything else to the primary (`default`).
+       Reads use a replica only when all of these hold:
+       - the request was marked safe by `ReplicaRoutingMiddleware` (GET/HEAD/OPTIONS from a client without a recent write);
+       - nothing was written earlier in the same request, and the primary is not inside a transaction;
+       - the chosen replica is within `REPLICA_MAX_LAG_SECONDS` of the primary.
+    """
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if not settings.REPLICA_DATABASES or state is None or not state.use_replica:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        replicas = list(settings.REPLICA_DATABASES)
+        random.shuffle(replicas)
+        for alias in replicas:
+            if replica_is_healthy(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            # Reads after a write in the same request must see it
+            state.use_replica = False
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
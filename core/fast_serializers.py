@@ -0,0 +1,162 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .object_cache import get_cached_rows
+
+
+# Converters from `.values()` values to what the matching DRF field returns.
+# `compile(context)` runs once per response, so per-row work is a single function call.
+class DecimalString:
+    """
+       DRF `DecimalField` output: the value with exactly `decimal_places` decimals, as a string.
+    """
+    def __init__(self, decimal_places):
+        self.exponent = Decimal(1).scaleb(-decimal_places)
+
+    def compile(self, context):
+        exponent = self.exponent
+        return lambda value: None if value is None else f'{value.quantize(exponent):f}'
+
+
+class IsoDateTime:
+    """
+       DRF `DateTimeField` output: ISO 8601 in the current time zone, with `Z` for UTC.
+    """
+    def compile(self, context):
+        current = timezone.get_current_timezone()
+
+        def convert(value):
+            if value is None:
+                return None
+            if timezone.is_aware(value):
+                value = value.astimezone(current)
+            value = value.isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return convert
+
+
+class FileUrl:
+    """
+       DRF `FileField`/`ImageField` output: the file's URL, absolute when the request is known, or None.
+       URLs are built once per file name, catalog pages share few images (e.g. the default one).
+    """
+    def __init__(self, storage=default_storage):
+        self.storage = storage
+
+    def compile(self, context):
+        request = context.get('request')
+        urls = {}
+
+        def convert(name):
+            if not name:
+                return None
+            url = urls.get(name)
+            if url is None:
+                url = self.storage.url(name)
+                urls[name] = url = request.build_absolute_uri(url) if request is not None else url
+            return url
+        return convert
+
+
+class FastReadSerializer:
+    """
+       Read-only serializer for hot list endpoints. It builds the response dicts straight from `.values()` rows,
+       without instantiating models or going through DRF's per-field machinery, and must produce exactly what the
+       endpoint's `ModelSerializer` produces (each one has a contract test comparing both).
+       Subclasses declare `fields` as (output name, `values()` lookup, converter or None to pass the value through).
+    """
+    fields = ()
+
+    def __init__(self, context=None):
+        self.context = context or {}
+
+    @classmethod
+    def lookups(cls, prefix=''):
+        return [prefix + lookup for _, lookup, _ in cls.fields]
+
+    def values_queryset(self, queryset):
+        return queryset.values(*self.lookups())
+
+    def compile(self, prefix=''):
+        """
+           A function building one representation from a row; `prefix` reads the fields of a related model
+           from a row of another one (e.g. `product__`).
+        """
+        fields = [
+            (name, prefix + lookup, converter.compile(self.context) if converter else None)
+            for name, lookup, converter in self.fields
+        ]
+
+        def represent(row):
+            return {name: convert(row[lookup]) if convert else row[lookup] for name, lookup, convert in fields}
+        return represent
+
+    def represent(self, rows):
+        build = self.compile()
+        return [build(row) for row in rows]
+
+
+class BatchIdsError(ValueError):
+    pass
+
+
+def parse_ids(value):
+    """
+       The ids of an `?ids=1,2,3` multi-get, in the requested order without duplicates.
+    """
+    try:
+        ids = list(dict.fromkeys(int(part) for part in value.split(',') if part.strip()))
+    except ValueError:
+        raise BatchIdsError('ids must be a comma-separated list of integers.')
+    if not ids:
+        raise BatchIdsError('ids must list at least one id.')
+    if len(ids) > settings.BATCH_MAX_IDS:
+        raise BatchIdsError(f'ids can list at most {settings.BATCH_MAX_IDS} ids.')
+    return ids
+
+
+def fetch_by_ids(serializer, queryset, ids, use_cache=False):
+    """
+       The representations of the objects with these ids, in the requested order, and the ids that were not found.
+       Rows come from one `id__in` query, or from the per-object cache first with `use_cache`.
+    """
+    lookups = serializer.lookups()
+    if use_cache:
+        rows = get_cached_rows(queryset, ids, lookups)
+    else:
+        rows = {row['id']: row for row in queryset.filter(pk__in=ids).values(*lookups)}
+    return serializer.represent([rows[pk] for pk in ids if pk in rows]), [pk for pk in ids if pk not in rows]
+
+
+def batch_response(data, missing):
+    return Response({'results': data, 'missing': missing})
+
+
+class FastListMixin:
+    """
+       `list` action for viewsets that serializes with `fast_serializer_class`; everything else keeps using
+       `serializer_class`, which still describes the response in the schema.
+       `?ids=1,2,3` fetches those objects in one go instead (see `fetch_by_ids`); the other query parameters
+       are ignored then. `batch_cache` serves them from the per-object cache, for querysets not scoped to a user.
+    """
+    fast_serializer_class = None
+    batch_cache = False
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.fast_serializer_class(context=self.get_serializer_context())
+        if 'ids' in request.query_params:
+            try:
+                ids = parse_ids(request.query_params['ids'])
+            except BatchIdsError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return batch_response(*fetch_by_ids(serializer, self.get_queryset(), ids, self.batch_cache))
+
+        rows = serializer.values_queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.represent(page))
+        return Response(serializer.represent(rows))
@@ -0,0 +1,175 @@
+import functools
+import hashlib
+import json
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .metrics import record_cache_lookup
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+
+
+def request_fingerprint(request):
+    """
+       Hash the method, path and body of a request so a reused key with a different payload can be detected.
+    """
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    raw = f'{request.method}:{request.path}:{body}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _cache_key(user_id, key):
+    return f'idempotency:{user_id}:{key}'
+
+
+def _replay(stored):
+    response = Response(stored['body'], status=stored['status'])
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+class _Claim:
+    """
+       A key claimed by the current request; completed with the view's response or released if the view fails.
+    """
+    def __init__(self, record, user_id, fingerprint, ttl):
+        self.record = record
+        self.user_id = user_id
+        self.fingerprint = fingerprint
+        self.ttl = ttl
+
+    def release(self):
+        self.record.delete()
+
+    def complete(self, response):
+        # Server errors are not stored so the client can retry with the same key
+        if response.status_code >= 500:
+            self.release()
+            return response
+
+        body = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+        updated = IdempotencyKey.objects.filter(pk=self.record.pk).update(response_status=response.status_code, response_body=body)
+        if not updated:
+            # Ran past the claim timeout and the key was claimed again, the new claim stores its own response
+            return response
+
+        stored = {'fingerprint': self.fingerprint, 'status': response.status_code, 'body': body}
+        cache.set(_cache_key(self.user_id, self.record.key), stored, int(self.ttl.total_seconds()))
+        return response
+
+
+def _claim(request, key):
+    """
+       Claim `key` for this request, or return the response to send instead (a replay or an error).
+    """
+    if len(key) > 255:
+        return Response({'error': 'Idempotency-Key must be at most 255 characters.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    user = request.user if request.user.is_authenticated else None
+    user_id = user.pk if user else None
+    fingerprint = request_fingerprint(request)
+    ttl = settings.IDEMPOTENCY_KEY_TTL
+
+    # Completed keys are served straight from the cache
+    stored = cache.get(_cache_key(user_id, key))
+    record_cache_lookup('idempotency', stored is not None)
+    if stored is not None:
+        if stored['fingerprint'] != fingerprint:
+            return Response({'error': 'Idempotency-Key was already used with a different request.'}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return _replay(stored)
+
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is not None and (record.is_expired() or record.is_abandoned()):
+        record.delete()
+        record = None
+
+    if record is not None:
+        if record.fingerprint != fingerprint:
+            return Response({'error': 'Idempotency-Key was already used with a different request.'}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if not record.is_completed():
+            return Response({'error': 'A request with this Idempotency-Key is still being processed.'}, status=status.HTTP_409_CONFLICT)
+        return _replay({'status': record.response_status, 'body': record.response_body})
+
+    # Claim the key before running the view so concurrent retries cannot slip through
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                key=key,
+                user=user,
+                method=request.method,
+                path=request.path[:255],
+                fingerprint=fingerprint,
+                expires_at=timezone.now() + ttl,
+            )
+    except IntegrityError:
+        return Response({'error': 'A request with this Idempotency-Key is still being processed.'}, status=status.HTTP_409_CONFLICT)
+    return _Claim(record, user_id, fingerprint, ttl)
+
+
+def idempotent(view_method):
+    """
+       Decorator for `post`/`create` view methods that honours the `Idempotency-Key` header.
+       - Without the header the view runs as usual.
+       - The first request with a key runs the view and stores its response for `IDEMPOTENCY_KEY_TTL`.
+       - Replays with the same payload get the stored response without running the view again.
+       - Replays with a different payload get a 422, and replays while the first request is still running get a 409.
+         A claim older than `IDEMPOTENCY_CLAIM_TIMEOUT` that never completed is taken over by the next replay.
+       Works on async view methods too; the key bookkeeping then runs in a thread.
+    """
+    if iscoroutinefunction(view_method):
+        @functools.wraps(view_method)
+        async def async_wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return await view_method(self, request, *args, **kwargs)
+
+            claim = await sync_to_async(_claim)(request, key)
+            if isinstance(claim, Response):
+                return claim
+            try:
+                response = await view_method(self, request, *args, **kwargs)
+            except Exception:
+                await sync_to_async(claim.release)()
+                raise
+            return await sync_to_async(claim.complete)(response)
+
+        return async_wrapper
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        claim = _claim(request, key)
+        if isinstance(claim, Response):
+            return claim
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            claim.release()
+            raise
+        return claim.complete(response)
+
+    return wrapper
+
+
+def purge_expired_keys(batch_size=1000):
+    """
+       Delete expired idempotency keys in batches and return the number of rows removed.
+    """
+    deleted = 0
+    while True:
+        ids = list(IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core.benchmarks import BenchmarkError
+from core.compression_benchmarks import SCENARIOS, run_compression_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Compare the size and client-side time of API payloads sent plain, gzipped and brotli-compressed, against the current (seeded) database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=SCENARIOS, help='Scenario to run; repeat for several. Defaults to the product list and order history.')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per scenario and encoding.')
+        parser.add_argument('--bandwidth-kbps', type=float, default=750, help='Client link speed the transfer time is estimated for (750 is a weak 3G link).')
+        parser.add_argument('--rtt-ms', type=float, default=200, help='Client round trip time added to the estimate.')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        # The benchmark user is rolled back with the transaction
+        try:
+            with transaction.atomic():
+                results = run_compression_benchmarks(
+                    options['scenarios'], options['iterations'], options['bandwidth_kbps'], options['rtt_ms'],
+                )
+                transaction.set_rollback(True)
+        except BenchmarkError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(f'{"scenario":<16} {"encoding":<9} {"bytes":>9} {"ratio":>6} {"server ms":>10} {"transfer ms":>12} {"client ms":>10}')
+        for name, encodings in results.items():
+            plain = encodings['identity']['bytes']
+            for encoding, result in encodings.items():
+                self.stdout.write(
+                    f'{name:<16} {encoding:<9} {result["bytes"]:>9} {plain / result["bytes"]:>6.1f} {result["p50_ms"]:>10} '
+                    f'{result["transfer_ms"]:>12} {result["client_ms"]:>10}'
+                )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                json.dump(results, output_file, indent=2)
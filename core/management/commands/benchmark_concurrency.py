@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from core.benchmarks import BenchmarkError
+from core.concurrency_benchmarks import MODES, SCENARIOS, run_concurrency_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Compare the concurrency one worker sustains under WSGI (threads) and ASGI (event loop) against the current (seeded) database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=sorted(SCENARIOS), help='Scenario to run; repeat for several. Defaults to all.')
+        parser.add_argument('--mode', action='append', dest='modes', choices=MODES, help='Server mode to run; repeat for several. Defaults to both.')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario and mode.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight at once.')
+        parser.add_argument('--wsgi-threads', type=int, default=4, help='Threads of the WSGI worker (gunicorn --threads).')
+        parser.add_argument('--paystack-latency', type=float, default=0.2, help='Seconds the simulated Paystack call takes.')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        try:
+            results = run_concurrency_benchmarks(
+                options['scenarios'], options['modes'] or MODES, options['requests'], options['concurrency'],
+                options['wsgi_threads'], options['paystack_latency'],
+            )
+        except BenchmarkError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(f'{"scenario":<16} {"mode":<6} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"max ms":>8} {"errors":>7}')
+        for name, modes in results.items():
+            for mode, result in modes.items():
+                self.stdout.write(
+                    f'{name:<16} {mode:<6} {result["throughput_rps"]:>8} {result["p50_ms"]:>8} {result["p95_ms"]:>8} {result["max_ms"]:>8} {result["errors"]:>7}'
+                )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                json.dump(results, output_file, indent=2)
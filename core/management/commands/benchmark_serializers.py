@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core.benchmarks import BenchmarkError
+from core.serializer_benchmarks import SCENARIOS, run_serializer_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Compare the serialization throughput per core of the list endpoints with their DRF and fast read-only serializers, against the current (seeded) database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=list(SCENARIOS), help='Scenario to run; repeat for several. Defaults to all.')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed runs per scenario and serializer.')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        # The benchmark user is rolled back with the transaction
+        try:
+            with transaction.atomic():
+                results = run_serializer_benchmarks(options['scenarios'], options['iterations'])
+                transaction.set_rollback(True)
+        except BenchmarkError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(f'{"scenario":<16} {"serializer":<11} {"rows":>6} {"rows/cpu s":>11} {"p50 ms":>9}')
+        for name, result in results.items():
+            for serializer in ('drf', 'fast'):
+                self.stdout.write(
+                    f'{name:<16} {serializer:<11} {result[serializer]["rows"]:>6} {result[serializer]["rows_per_cpu_s"]:>11} '
+                    f'{result[serializer]["p50_ms"]:>9}'
+                )
+            self.stdout.write(f'{name:<16} {"speedup":<11} {result["speedup"]:>18}x')
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                json.dump(results, output_file, indent=2)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.schema import build_schema, is_current, read_manifest
+
+
+class Command(BaseCommand):
+    help = 'Generate the OpenAPI schema into content-hashed, gzipped files served by /api/schema/. Skipped when the sources are unchanged.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default=None, help='Directory for the schema files. Defaults to OPENAPI_SCHEMA_DIR.')
+        parser.add_argument('--force', action='store_true', help='Rebuild even if the sources did not change.')
+        parser.add_argument('--check', action='store_true', help='Only check that the built schema is up to date; exit with an error if not.')
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir'] or settings.OPENAPI_SCHEMA_DIR
+        if options['check']:
+            if not is_current(read_manifest(output_dir)):
+                raise CommandError(f'The OpenAPI schema in {output_dir} is missing or stale, run `manage.py build_schema`.')
+            self.stdout.write(self.style.SUCCESS('The OpenAPI schema is up to date.'))
+            return
+
+        manifest, rebuilt = build_schema(output_dir, force=options['force'])
+        files = ', '.join(manifest['files'].values())
+        if rebuilt:
+            self.stdout.write(self.style.SUCCESS(f'Built the OpenAPI schema in {output_dir}: {files}.'))
+        else:
+            self.stdout.write(f'The OpenAPI schema in {output_dir} is up to date: {files}.')
@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from core.startup import StartupProfileError, import_time_by_package, profile_startup
+
+
+class Command(BaseCommand):
+    help = 'Boot the application in a fresh interpreter and report the import time per package and the slowest imports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--asgi', action='store_true', help='Profile the ASGI application instead of the WSGI one.')
+        parser.add_argument('--top', type=int, default=20, help='Packages and imports to list.')
+        parser.add_argument('--output', help='Write every module\'s import time to this JSON file.')
+
+    def handle(self, *args, **options):
+        try:
+            profile = profile_startup(asgi=options['asgi'])
+        except StartupProfileError as error:
+            raise CommandError(str(error))
+
+        modules = profile['modules']
+        self.stdout.write(f'Boot time: {profile["boot_ms"]:.0f}ms, {len(modules)} modules imported')
+
+        self.stdout.write(f'\n{"package":<40} {"self ms":>9}')
+        for package, self_ms in import_time_by_package(modules)[:options['top']]:
+            self.stdout.write(f'{package:<40} {self_ms:>9.1f}')
+
+        self.stdout.write(f'\n{"import":<60} {"cumulative ms":>14}')
+        for module in sorted(modules, key=lambda module: module['cumulative_ms'], reverse=True)[:options['top']]:
+            self.stdout.write(f'{"  " * module["depth"] + module["module"]:<60} {module["cumulative_ms"]:>14.1f}')
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                json.dump(profile, output_file, indent=2)
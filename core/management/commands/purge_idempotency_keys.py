@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from core.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete expired Idempotency-Key records.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of rows deleted per query.')
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys.'))
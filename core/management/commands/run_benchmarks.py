@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core.benchmarks import (
+    DEFAULT_BUDGETS_PATH, SCENARIOS, BenchmarkError, budgets_from_results, check_budgets, load_budgets, run_benchmarks,
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the hot API paths against the current (seeded) database and compare the results with the checked-in budgets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=sorted(SCENARIOS), help='Scenario to run; repeat for several. Defaults to all.')
+        parser.add_argument('--iterations', type=int, default=30, help='Timed requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=3, help='Requests run before timing starts.')
+        parser.add_argument('--alloc-iterations', type=int, default=3, help='Requests traced for memory allocations.')
+        parser.add_argument('--budgets', default=str(DEFAULT_BUDGETS_PATH), help='Budgets JSON file.')
+        parser.add_argument('--no-latency-budgets', action='store_true', help='Only enforce query budgets (for noisy or slow machines).')
+        parser.add_argument('--write-budgets', action='store_true', help='Write budgets from this run instead of checking them.')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        # Everything runs in a transaction that is rolled back, so no benchmark data is left behind
+        try:
+            with transaction.atomic():
+                results = run_benchmarks(
+                    options['scenarios'], options['iterations'], options['warmup'], options['alloc_iterations'],
+                )
+                transaction.set_rollback(True)
+        except BenchmarkError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(f'{"scenario":<16} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8} {"alloc KB":>9}')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<16} {result["p50_ms"]:>8} {result["p95_ms"]:>8} {result["p99_ms"]:>8} {result["queries"]:>8} {result["peak_alloc_kb"]:>9}'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                json.dump(results, output_file, indent=2)
+
+        if options['write_budgets']:
+            with open(options['budgets'], 'w', encoding='utf-8') as budgets_file:
+                json.dump(budgets_from_results(results), budgets_file, indent=2)
+                budgets_file.write('\n')
+            self.stdout.write(self.style.SUCCESS(f'Wrote budgets to {options["budgets"]}.'))
+            return
+
+        violations = check_budgets(results, load_budgets(options['budgets']), latency=not options['no_latency_budgets'])
+        if violations:
+            raise CommandError('Benchmark budgets exceeded:\n  ' + '\n  '.join(violations))
+        self.stdout.write(self.style.SUCCESS('All benchmarks are within budget.'))
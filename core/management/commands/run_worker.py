@@ -0,0 +1,30 @@
+import signal
+
+from django.core.management.base import BaseCommand
+from core.tasks import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run background tasks queued in the database (see core/tasks.py) until stopped with SIGTERM or Ctrl+C.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='append', dest='queues', help='Queue to take jobs from; repeat for several. Defaults to all.')
+        parser.add_argument('--concurrency', type=int, default=1, help='Jobs run at once, each in its own thread and DB connection.')
+        parser.add_argument('--batch', type=int, default=10, help='Jobs claimed per query by each thread.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls while no job is due.')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due instead of waiting for more.')
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            queues=options['queues'], concurrency=options['concurrency'], batch=options['batch'],
+            poll_interval=options['poll_interval'], burst=options['burst'],
+        )
+
+        def stop(signum, frame):
+            self.stdout.write('Stopping once the running jobs finish...')
+            worker.stop()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        self.stdout.write(f'Worker {worker.name} running with {worker.concurrency} thread(s).')
+        worker.run()
@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from core.seeding import MarketplaceSeeder
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic synthetic marketplace (categories, products, users, carts, orders, payments, reviews) for scale testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed always generates the same data.')
+        parser.add_argument('--categories', type=int, default=60, help='Number of categories, including the root categories.')
+        parser.add_argument('--products', type=int, default=10000, help='Number of products.')
+        parser.add_argument('--users', type=int, default=2000, help='Number of users.')
+        parser.add_argument('--carts', type=int, default=500, help='Number of users with a cart.')
+        parser.add_argument('--orders', type=int, default=5000, help='Number of orders; each gets 1-6 items and, unless pending, a payment.')
+        parser.add_argument('--reviews', type=int, default=20000, help='Number of reviews.')
+        parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of product popularity; higher concentrates activity on fewer products.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Number of rows inserted per query.')
+        parser.add_argument('--password', default='Password@123', help='Password shared by all generated users.')
+
+    def handle(self, *args, **options):
+        if User.objects.filter(email__endswith=f'.s{options["seed"]}@seed.ruralmart.test').exists():
+            raise CommandError(f'Data for seed {options["seed"]} already exists, use another --seed.')
+
+        seeder = MarketplaceSeeder(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            skew=options['skew'],
+            password=options['password'],
+            log=self.stdout.write,
+        )
+        counts = seeder.run(
+            categories=options['categories'],
+            products=options['products'],
+            users=options['users'],
+            carts=options['carts'],
+            orders=options['orders'],
+            reviews=options['reviews'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Created {sum(counts.values())} rows.'))
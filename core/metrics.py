@@ -0,0 +1,88 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import REGISTRY, multiprocess
+
+# Prometheus metrics for the API.
+# Under gunicorn, `PROMETHEUS_MULTIPROC_DIR` is set (see gunicorn.conf.py) and every worker writes its
+# values to memory-mapped files in that directory; `/metrics` merges them, so any worker can serve it.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+REQUEST_LATENCY = Histogram(
+    'ruralmart_http_request_duration_seconds', 'Time spent handling a request',
+    ['endpoint', 'method'], buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    'ruralmart_http_requests_total', 'Requests handled, by response status',
+    ['endpoint', 'method', 'status'],
+)
+DB_TIME = Histogram(
+    'ruralmart_db_time_seconds', 'Database time per request',
+    ['endpoint'], buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'ruralmart_db_queries_per_request', 'Queries per request',
+    ['endpoint'], buckets=QUERY_COUNT_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    'ruralmart_cache_lookups_total', 'Cache lookups by result',
+    ['cache', 'result'],
+)
+PAYSTACK_LATENCY = Histogram(
+    'ruralmart_paystack_request_duration_seconds', 'Time spent in Paystack API calls',
+    ['operation', 'outcome'], buckets=LATENCY_BUCKETS,
+)
+THROTTLE_DECISIONS = Counter(
+    'ruralmart_throttle_decisions_total', 'Throttle decisions by scope',
+    ['scope', 'outcome'],
+)
+
+
+def observe_request(endpoint, method, status_code, duration):
+    REQUEST_LATENCY.labels(endpoint, method).observe(duration)
+    REQUESTS.labels(endpoint, method, str(status_code)).inc()
+
+
+def observe_queries(endpoint, count, duration):
+    DB_QUERIES.labels(endpoint).observe(count)
+    DB_TIME.labels(endpoint).observe(duration)
+
+
+def record_cache_lookup(cache_name, hit):
+    CACHE_LOOKUPS.labels(cache_name, 'hit' if hit else 'miss').inc()
+
+
+def record_throttle(scope, outcome):
+    THROTTLE_DECISIONS.labels(scope, outcome).inc()
+
+
+@contextmanager
+def time_paystack(operation):
+    """
+       Time a Paystack call; the outcome is `error` if it raised or returned an error payload.
+    """
+    start = time.perf_counter()
+    result = {'outcome': 'ok'}
+    try:
+        yield result
+    except Exception:
+        result['outcome'] = 'error'
+        raise
+    finally:
+        PAYSTACK_LATENCY.labels(operation, result['outcome']).observe(time.perf_counter() - start)
+
+
+def render_latest():
+    """
+       The current metrics in the Prometheus text format, merged across workers in multi-process mode.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
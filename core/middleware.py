@@ -0,0 +1,350 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .compression import acompress_stream, compress_bytes, compress_stream, is_compressible, negotiate_encoding
+from .db_router import end_request, start_request
+from .metrics import observe_queries, observe_request
+
+# For handling error reporting
+logger = logging.getLogger(__name__)
+
+# Query totals per endpoint for this worker
+_endpoint_stats = {}
+_endpoint_stats_lock = threading.Lock()
+
+# Collapse `IN (%s, %s, ...)` lists so batches of different sizes share a fingerprint
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def fingerprint(sql):
+    return _IN_LIST_RE.sub('IN (...)', sql)
+
+
+def endpoint_label(view_func, request):
+    """
+       Label a request by its view, with the viewset action when there is one (e.g. `CartViewSet.list`).
+    """
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+def endpoint_query_stats():
+    """
+       Snapshot of this worker's query totals per endpoint:
+       requests, queries, duplicate queries, DB time (seconds) and the most queries seen in one request.
+    """
+    with _endpoint_stats_lock:
+        return {endpoint: dict(stats) for endpoint, stats in _endpoint_stats.items()}
+
+
+def _record(endpoint, recorder):
+    with _endpoint_stats_lock:
+        stats = _endpoint_stats.setdefault(
+            endpoint, {'requests': 0, 'queries': 0, 'duplicates': 0, 'db_time': 0.0, 'max_queries': 0}
+        )
+        stats['requests'] += 1
+        stats['queries'] += recorder.count
+        stats['duplicates'] += recorder.duplicates
+        stats['db_time'] += recorder.duration
+        stats['max_queries'] = max(stats['max_queries'], recorder.count)
+
+
+def _project_stack():
+    """
+       Stack frames from the project's own code, outermost first.
+    """
+    base_dir = str(settings.BASE_DIR)
+    return [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(base_dir) and 'site-packages' not in frame.filename
+    ]
+
+
+class QueryRecorder:
+    """
+       Database execute wrapper that counts queries, their time and repeated SQL fingerprints.
+       The stack is only captured the second time a fingerprint runs, so plain requests pay a counter update per query.
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.stacks = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            key = fingerprint(sql)
+            self.fingerprints[key] += 1
+            if self.fingerprints[key] == 2:
+                self.stacks[key] = _project_stack()
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.fingerprints.values() if count > 1)
+
+    def repeated(self):
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count > 1]
+
+
+class HybridMiddleware:
+    """
+       Base for middleware that runs natively under both WSGI and ASGI.
+       Subclasses implement `handle` and `ahandle`; the one matching the rest of the stack is used,
+       so under ASGI requests do not hop to a thread and back at every middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.ahandle(request)
+        return self.handle(request)
+
+
+class QueryInstrumentationMiddleware(HybridMiddleware):
+    """
+       Record the query count, DB time and duplicate queries of every request.
+       - Totals are aggregated per endpoint (`endpoint_query_stats`).
+       - With `QUERY_DEBUG_HEADERS` the numbers are returned as `X-DB-*` response headers.
+       - Requests running more than `QUERY_COUNT_LOG_THRESHOLD` queries, or repeating one query more than
+         `QUERY_DUPLICATE_LOG_THRESHOLD` times, are logged with the repeated SQL and where it ran from.
+    """
+    def handle(self, request):
+        recorder = QueryRecorder()
+        with self.install(recorder):
+            response = self.get_response(request)
+        return self.finish(request, response, recorder)
+
+    async def ahandle(self, request):
+        # Connections are per thread; async views run their queries in the request's sync thread,
+        # so the wrappers are installed (and removed) there
+        recorder = QueryRecorder()
+        stack = await sync_to_async(self.install)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, recorder)
+
+    def install(self, recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def finish(self, request, response, recorder):
+        endpoint = getattr(request, '_query_endpoint', None)
+        if endpoint is None:
+            return response
+        _record(endpoint, recorder)
+        observe_queries(endpoint, recorder.count, recorder.duration)
+
+        if settings.QUERY_DEBUG_HEADERS:
+            response['X-DB-Query-Count'] = str(recorder.count)
+            response['X-DB-Query-Time-Ms'] = f'{recorder.duration * 1000:.1f}'
+            response['X-DB-Duplicate-Queries'] = str(recorder.duplicates)
+
+        repeated = recorder.repeated()
+        if recorder.count > settings.QUERY_COUNT_LOG_THRESHOLD or (
+            repeated and repeated[0][1] > settings.QUERY_DUPLICATE_LOG_THRESHOLD
+        ):
+            self.log_offender(request, endpoint, recorder, repeated)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_endpoint = endpoint_label(view_func, request)
+        return None
+
+    def log_offender(self, request, endpoint, recorder, repeated):
+        lines = [f"{endpoint} ({request.method} {request.path}) ran {recorder.count} queries in {recorder.duration * 1000:.1f}ms"]
+        for sql, count in repeated[:3]:
+            lines.append(f"  {count}x {sql[:300]}")
+            for frame in recorder.stacks.get(sql, [])[-5:]:
+                lines.append(f"      {frame.filename}:{frame.lineno} in {frame.name}")
+        logger.warning('\n'.join(lines))
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """
+       Export request latency and counts by endpoint, method and status to `/metrics`.
+       Requests that do not resolve to a view are grouped under `unmatched` to keep label cardinality bounded.
+       Placed first in MIDDLEWARE so the latency covers the whole middleware stack.
+    """
+    def handle(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, start)
+        return response
+
+    async def ahandle(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, start)
+        return response
+
+    def observe(self, request, response, start):
+        endpoint = getattr(request, '_metrics_endpoint', 'unmatched')
+        observe_request(endpoint, request.method, response.status_code, time.perf_counter() - start)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_endpoint = endpoint_label(view_func, request)
+        return None
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """
+       Let safe-method requests read from the replicas (see `core.db_router.ReplicaRouter`) with read-your-writes stickiness.
+       - Requests that write (any unsafe method, or a safe one that happened to write) pin their client to the primary
+         for `REPLICA_STICKY_SECONDS`, so e.g. the cart read after adding a cart item sees the new item.
+       - Clients are identified by a hash of their Authorization header (or session cookie), falling back to the
+         IP address, since authentication only runs inside the view.
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def handle(self, request):
+        if not settings.REPLICA_DATABASES:
+            return self.get_response(request)
+
+        sticky_key = self.sticky_key(request)
+        use_replica = request.method in self.SAFE_METHODS and not cache.get(sticky_key)
+        state, token = start_request(use_replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        if state.wrote or request.method not in self.SAFE_METHODS:
+            cache.set(sticky_key, 1, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    async def ahandle(self, request):
+        if not settings.REPLICA_DATABASES:
+            return await self.get_response(request)
+
+        # The routing state is a context variable, so it follows the request into sync_to_async threads
+        sticky_key = self.sticky_key(request)
+        use_replica = request.method in self.SAFE_METHODS and not await cache.aget(sticky_key)
+        state, token = start_request(use_replica)
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        if state.wrote or request.method not in self.SAFE_METHODS:
+            await cache.aset(sticky_key, 1, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    def sticky_key(self, request):
+        credentials = request.headers.get('Authorization') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if credentials:
+            client = hashlib.sha256(credentials.encode('utf-8')).hexdigest()
+        else:
+            client = request.META.get('REMOTE_ADDR', '')
+        return f'replica:sticky:{client}'
+
+
+class CompressionMiddleware(HybridMiddleware):
+    """
+       Compress text responses (JSON, YAML, ...) with brotli or gzip, whichever the client prefers.
+       - Responses under `COMPRESSION_MIN_BYTES` are sent as they are, compressing them saves less than it costs.
+       - Streamed responses (sync or async) are compressed chunk by chunk, so exports start arriving right away.
+       - Responses that are already encoded (e.g. the gzipped schema artifacts) or partial are left alone.
+       - Responses under `COMPRESSION_EXCLUDED_PATHS` are never compressed: they carry tokens, which the compressed
+         length would leak to an attacker able to reflect text into the same response (BREACH).
+    """
+    def handle(self, request):
+        return self.compress(request, self.get_response(request))
+
+    async def ahandle(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if (
+            not 200 <= response.status_code < 300 or response.status_code in (204, 206)
+            or response.has_header('Content-Encoding') or not is_compressible(response.get('Content-Type'))
+            or request.path.startswith(tuple(settings.COMPRESSION_EXCLUDED_PATHS))
+        ):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_BYTES:
+            return response
+
+        # Caches must keep the compressed and plain variants apart, whatever this client accepts
+        patch_vary_headers(response, ['Accept-Encoding'])
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(response.streaming_content, encoding)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, encoding)
+            # The compressed length is not known up front
+            del response['Content-Length']
+        else:
+            compressed = compress_bytes(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # The compressed body differs from the plain one byte for byte
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+       WhiteNoise, usable in an async middleware stack.
+       WhiteNoise's middleware is sync only, which under ASGI would run every request below it through a thread.
+       Lookups of collected files are in-memory, so only serving a file (or looking it up with autorefresh) uses a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.ahandle(request)
+        return super().__call__(request)
+
+    async def ahandle(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('key',), name='unique_anonymous_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+from django.db import models
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+
+# Idempotency key model to remember the outcome of retried write requests
+class IdempotencyKey(models.Model):
+    """
+       Stores the fingerprint and response of a request sent with an `Idempotency-Key` header.
+       - A replay with the same key and payload gets the stored response back.
+       - `response_status` stays empty while the original request is still running, for at most
+         `IDEMPOTENCY_CLAIM_TIMEOUT`: after that the request is taken to have died and the key can be claimed again.
+    """
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='idempotency_keys')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key'),
+            # NULLs never conflict, anonymous keys need their own constraint
+            models.UniqueConstraint(fields=['key'], condition=models.Q(user__isnull=True), name='unique_anonymous_idempotency_key'),
+        ]  # One stored outcome per key per user
+
+    def __str__(self):
+        return f'{self.method} {self.path} [{self.key}]'
+
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    def is_completed(self):
+        return self.response_status is not None
+
+    def is_abandoned(self):
+        return not self.is_completed() and self.created_at <= timezone.now() - settings.IDEMPOTENCY_CLAIM_TIMEOUT
+
+
+# Job model to store the background task queue (see core/tasks.py)
+class Job(models.Model):
+    """
+       One run of a background task, claimed by workers with `SELECT ... FOR UPDATE SKIP LOCKED`.
+       - `run_at` delays (schedules) a job; workers take due jobs by priority, then age.
+       - Succeeded jobs are deleted. Failed ones stay with their last traceback until retried or removed.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    ]
+    task = models.CharField(max_length=255)
+    queue = models.CharField(max_length=50, default='default')
+    payload = models.JSONField(encoder=DjangoJSONEncoder, default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    priority = models.SmallIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    locked_by = models.CharField(max_length=255, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Only queued jobs are scanned when claiming, so the index stays small however many jobs have failed
+            models.Index(fields=['queue', 'run_at'], condition=models.Q(status='queued'), name='job_queued_idx'),
+            models.Index(fields=['status', 'locked_at'], name='job_status_locked_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.task} #{self.pk} ({self.status})'
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.cache import cache
+from .metrics import record_cache_lookup
+
+
+def object_cache_key(model, pk):
+    return f'object:{model._meta.label_lower}:{pk}'
+
+
+def invalidate_cached_objects(model, pks):
+    cache.delete_many([object_cache_key(model, pk) for pk in pks])
+
+
+def get_cached_rows(queryset, ids, lookups):
+    """
+       `.values(*lookups)` rows of the objects with these primary keys, by primary key: read from the cache,
+       and the rest with one `pk__in` query whose rows are cached for `OBJECT_CACHE_TTL` seconds.
+       Missing objects are left out. `lookups` must include `id`.
+       Rows are cached per model, not per queryset, so only use it for querysets that are not scoped to a user.
+       Models using it drop their entries when saved or deleted (see `products.signals`); code updating rows
+       without saving them (`update()`, `bulk_update()`) calls `invalidate_cached_objects`.
+    """
+    model = queryset.model
+    keys = {pk: object_cache_key(model, pk) for pk in ids}
+    cached = cache.get_many(keys.values())
+    rows = {}
+    for pk, key in keys.items():
+        row = cached.get(key)
+        # Rows cached with other fields, e.g. before a serializer changed, are reloaded
+        hit = row is not None and row.keys() == set(lookups)
+        record_cache_lookup(model._meta.label_lower, hit)
+        if hit:
+            rows[pk] = row
+
+    missed = [pk for pk in ids if pk not in rows]
+    if missed:
+        loaded = {row['id']: row for row in queryset.filter(pk__in=missed).values(*lookups)}
+        cache.set_many({keys[pk]: row for pk, row in loaded.items()}, settings.OBJECT_CACHE_TTL)
+        rows.update(loaded)
+    return rows
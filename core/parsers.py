@@ -0,0 +1,15 @@
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+
+class ORJSONParser(JSONParser):
+    """
+       Drop-in replacement for DRF's `JSONParser` built on orjson. Like DRF's strict parser, it rejects
+       `NaN` and `Infinity`; bodies must be UTF-8, as JSON requires.
+    """
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,16 @@
+from storages.backends.s3 import S3Storage
+
+from .storage import IMMUTABLE_CACHE_CONTROL, ContentHashedStorageMixin, is_hashed_name
+
+
+# Kept apart from core.storage, which would otherwise import boto3 with the local storage too
+class HashedS3Storage(ContentHashedStorageMixin, S3Storage):
+    """
+       Content-hashed S3 storage; objects with hashed names are stored with an immutable Cache-Control,
+       which S3 (and any CDN in front of it) returns when serving them.
+    """
+    def get_object_parameters(self, name):
+        parameters = super().get_object_parameters(name)
+        if is_hashed_name(name):
+            parameters.setdefault('CacheControl', IMMUTABLE_CACHE_CONTROL)
+        return parameters
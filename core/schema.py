@@ -0,0 +1,174 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from importlib import import_module
+from pathlib import Path
+
+import django
+import rest_framework
+from django.apps import apps
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# For handling error reporting
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+# Formats the schema is rendered in: format -> (renderer, content type).
+# drf-spectacular is imported inside the functions only, workers do not load it at boot.
+SCHEMA_FORMATS = {
+    'yaml': ('drf_spectacular.renderers.OpenApiYamlRenderer', 'application/vnd.oai.openapi'),
+    'json': ('drf_spectacular.renderers.OpenApiJsonRenderer', 'application/vnd.oai.openapi+json'),
+}
+
+# Artifacts loaded by this worker: (directory, manifest mtime) -> artifacts, or None if unusable
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+class SchemaArtifact:
+    """
+       One rendering of the precompiled schema, held in memory with its gzipped copy.
+       `name` contains the content hash, so it is safe to cache forever under that name.
+    """
+    def __init__(self, name, content_type, content, compressed):
+        self.name = name
+        self.content_type = content_type
+        self.content = content
+        self.compressed = compressed
+        self.etag = f'"{name}"'
+
+
+def _schema_sources():
+    """
+       The project's Python sources the schema is generated from: views, serializers, filters, models,
+       URLconfs and settings. Tests, migrations and management commands are left out.
+    """
+    base_dir = Path(settings.BASE_DIR).resolve()
+    roots = [Path(import_module(settings.ROOT_URLCONF).__file__).resolve().parent]
+    roots += [Path(app_config.path).resolve() for app_config in apps.get_app_configs()]
+    for root in dict.fromkeys(roots):
+        if base_dir != root and base_dir not in root.parents:
+            continue
+        for path in root.rglob('*.py'):
+            parts = path.relative_to(root).parts
+            if parts[0] in ('migrations', 'tests', 'management') or path.name.startswith('test'):
+                continue
+            yield base_dir, path
+
+
+def source_fingerprint():
+    """
+       Hash of everything that affects the generated schema, so it is only rebuilt when one of them changes.
+    """
+    from drf_spectacular import __version__ as spectacular_version
+
+    digest = hashlib.sha256()
+    digest.update(f'{django.__version__}:{rest_framework.VERSION}:{spectacular_version}'.encode('utf-8'))
+    digest.update(json.dumps(settings.SPECTACULAR_SETTINGS, sort_keys=True, default=str).encode('utf-8'))
+    for base_dir, path in sorted(_schema_sources(), key=lambda source: str(source[1])):
+        digest.update(str(path.relative_to(base_dir)).encode('utf-8'))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def read_manifest(directory):
+    try:
+        with open(Path(directory) / MANIFEST_NAME, encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+
+
+def is_current(manifest):
+    """
+       Whether a manifest was built from the current sources.
+    """
+    return bool(manifest) and manifest.get('fingerprint') == source_fingerprint()
+
+
+def build_schema(directory=None, force=False):
+    """
+       Generate the schema and write it as content-hashed YAML and JSON files, each with a gzipped copy,
+       plus a manifest naming them. Does nothing if the manifest was built from the same sources, unless `force`.
+       Returns the manifest and whether it was rebuilt.
+    """
+    directory = Path(directory or settings.OPENAPI_SCHEMA_DIR)
+    manifest = read_manifest(directory)
+    if not force and is_current(manifest) and all((directory / name).exists() for name in manifest['files'].values()):
+        return manifest, False
+
+    from drf_spectacular.settings import spectacular_settings
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    files = {}
+    for schema_format, (renderer_path, _) in SCHEMA_FORMATS.items():
+        content = import_string(renderer_path)().render(schema, renderer_context={})
+        name = f'openapi.{hashlib.sha256(content).hexdigest()[:16]}.{schema_format}'
+        (directory / name).write_bytes(content)
+        # mtime=0 keeps the compressed bytes identical between builds of the same schema
+        (directory / f'{name}.gz').write_bytes(gzip.compress(content, compresslevel=9, mtime=0))
+        files[schema_format] = name
+
+    # Replaced atomically, so a worker never reads a manifest naming files that are not written yet
+    manifest = {'fingerprint': source_fingerprint(), 'files': files}
+    temporary = directory / f'{MANIFEST_NAME}.tmp'
+    temporary.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    os.replace(temporary, directory / MANIFEST_NAME)
+
+    current = set(files.values()) | {f'{name}.gz' for name in files.values()}
+    for path in directory.glob('openapi.*'):
+        if path.name not in current:
+            path.unlink()
+    return manifest, True
+
+
+def _load(directory):
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+    if not is_current(manifest):
+        logger.warning(f"The OpenAPI schema in {directory} is stale, generating it per request. Run `manage.py build_schema`.")
+        return None
+    try:
+        return {
+            schema_format: SchemaArtifact(
+                name, SCHEMA_FORMATS[schema_format][1],
+                (Path(directory) / name).read_bytes(), (Path(directory) / f'{name}.gz').read_bytes(),
+            )
+            for schema_format, name in manifest['files'].items()
+        }
+    except (OSError, KeyError) as e:
+        logger.warning(f"The OpenAPI schema in {directory} is incomplete, generating it per request: {str(e)}")
+        return None
+
+
+def precompiled_schema():
+    """
+       The precompiled schema artifacts by format, or None when they are disabled, missing or stale.
+       Loaded once per worker, and again only when the manifest changes.
+    """
+    if not settings.OPENAPI_SCHEMA_PRECOMPILED:
+        return None
+    directory = str(settings.OPENAPI_SCHEMA_DIR)
+    try:
+        mtime = os.stat(Path(directory) / MANIFEST_NAME).st_mtime_ns
+    except OSError:
+        return None
+
+    key = (directory, mtime)
+    try:
+        return _loaded[key]
+    except KeyError:
+        pass
+    with _loaded_lock:
+        if key not in _loaded:
+            _loaded.clear()
+            _loaded[key] = _load(directory)
+        return _loaded[key]
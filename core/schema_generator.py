@@ -0,0 +1,17 @@
+from drf_spectacular import generators
+from drf_spectacular.openapi import AutoSchema
+
+# Imported by drf-spectacular's views and `core.schema.build_schema` only, never at worker boot
+
+
+class SchemaGenerator(generators.SchemaGenerator):
+    """
+       DRF imports `DEFAULT_SCHEMA_CLASS` when routers inspect the viewsets at boot, so it stays at DRF's default and
+       views get drf-spectacular's AutoSchema here, while the schema is generated. Views using `@extend_schema` would
+       import drf-spectacular at boot anyway, and then need `DEFAULT_SCHEMA_CLASS` set to it again.
+    """
+    def create_view(self, callback, method, request=None):
+        view = super().create_view(callback, method, request)
+        if not isinstance(view.schema, AutoSchema):
+            view.schema = AutoSchema()
+        return view
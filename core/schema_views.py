@@ -0,0 +1,35 @@
+from django.conf import settings
+from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+
+from .schema import precompiled_schema
+from .views import precompiled_schema_url, schema_artifact_response
+
+# These views are routed through `core.views.lazy_view`, so drf-spectacular is imported on the first schema request
+
+
+# OpenAPI schema
+class SchemaView(SpectacularAPIView):
+    """
+       The OpenAPI schema, from the artifact built by `manage.py build_schema` when there is an up to date one,
+       generated per request otherwise. Its URL does not change between deploys, so clients revalidate with the ETag.
+    """
+    def get(self, request, *args, **kwargs):
+        artifacts = precompiled_schema()
+        if artifacts is None:
+            return super().get(request, *args, **kwargs)
+        renderer = self.perform_content_negotiation(request, force=True)[0]
+        artifact = artifacts['json' if 'json' in renderer.format else 'yaml']
+        return schema_artifact_response(request, artifact, f'public, max-age={settings.OPENAPI_SCHEMA_MAX_AGE}')
+
+
+# Schema UIs, pointed at the content-hashed schema so browsers fetch it once per deploy
+class SchemaSwaggerView(SpectacularSwaggerView):
+    def get(self, request, *args, **kwargs):
+        self.url = precompiled_schema_url()
+        return super().get(request, *args, **kwargs)
+
+
+class SchemaRedocView(SpectacularRedocView):
+    def get(self, request, *args, **kwargs):
+        self.url = precompiled_schema_url()
+        return super().get(request, *args, **kwargs)
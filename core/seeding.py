@@ -0,0 +1,278 @@
+import random
+import time
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum
+from accounts.models import UserProfile
+from orders.models import Order, OrderItem
+from payments.models import Payment, PaymentMethod
+from products.models import Category, Product, Cart, CartItem
+from reviews.models import Review
+
+User = get_user_model()
+
+ROOT_CATEGORIES = (
+    'Grains', 'Vegetables', 'Fruits', 'Dairy', 'Livestock', 'Poultry',
+    'Seeds', 'Fertilizers', 'Animal Feed', 'Farm Tools', 'Beverages', 'Crafts',
+)
+ADJECTIVES = ('Fresh', 'Organic', 'Local', 'Premium', 'Sun-dried', 'Hand-picked', 'Farm', 'Graded', 'Wholesale', 'Village')
+NOUNS = (
+    'Maize', 'Beans', 'Sorghum', 'Millet', 'Cassava', 'Kale', 'Tomatoes', 'Onions', 'Mangoes', 'Avocados',
+    'Bananas', 'Milk', 'Ghee', 'Eggs', 'Honey', 'Goat', 'Chicks', 'Hoe', 'Panga', 'Tea', 'Coffee', 'Baskets',
+)
+UNITS = ('1kg', '2kg', '5kg', '10kg', '50kg', 'crate', 'bunch', 'litre', 'dozen', 'piece')
+COMMENTS = (
+    'Good quality, will buy again.', 'Arrived on time.', 'Not as fresh as described.',
+    'Great value for the price.', 'Packaging could be better.', 'Exactly what I needed.', '',
+)
+ORDER_STATUSES = ('pending', 'processing', 'shipped', 'delivered', 'cancelled')
+ORDER_STATUS_WEIGHTS = (10, 5, 10, 70, 5)
+RATING_WEIGHTS = (5, 5, 12, 30, 48)  # Ratings 1 to 5
+PAYMENT_METHODS = (('Card', 'card'), ('M-Pesa', 'mobile_money'), ('Bank Transfer', 'bank_transfer'))
+
+# Dates are spread over a fixed window so the same seed gives the same data
+HISTORY_START = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+HISTORY_DAYS = 540
+
+
+def _batches(items, batch_size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _zipf_cum_weights(n, exponent):
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(n)))
+
+
+class MarketplaceSeeder:
+    """
+       Generate a synthetic marketplace with bulk inserts.
+       - Everything is drawn from one `random.Random(seed)`, so a seed always produces the same rows.
+       - Product popularity and user activity follow Zipf-like distributions with the given `skew`,
+         so a few products get most orders and reviews, like production.
+       - Rows are generated and inserted one batch at a time; only ids and prices are kept in memory
+         between tables.
+       - Signals and model `save()` overrides are bypassed, so derived values (order and item totals,
+         product ratings) are computed here.
+    """
+    def __init__(self, seed=0, batch_size=5000, skew=1.1, password='Password@123', log=print):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.skew = skew
+        self.password = password
+        self.log = log
+        self.counts = {}
+
+    def run(self, categories=60, products=10000, users=2000, carts=500, orders=5000, reviews=20000):
+        self.seed_categories(categories)
+        self.seed_products(products)
+        self.seed_users(users)
+        self.seed_carts(carts)
+        self.seed_orders(orders)
+        self.seed_reviews(reviews)
+        return self.counts
+
+    def _stage(self, name, count, started):
+        self.counts[name] = count
+        elapsed = time.perf_counter() - started
+        self.log(f'{name}: {count} rows in {elapsed:.1f}s ({count / elapsed if elapsed else 0:,.0f} rows/s)')
+
+    def _random_date(self):
+        return HISTORY_START + timedelta(seconds=self.rng.random() * HISTORY_DAYS * 86400)
+
+    def _popular_products(self, k):
+        return self.rng.choices(self.product_ids, cum_weights=self.product_weights, k=k)
+
+    def _active_users(self, k):
+        return self.rng.choices(self.user_ids, cum_weights=self.user_weights, k=k)
+
+    def seed_categories(self, count):
+        started = time.perf_counter()
+        roots = Category.objects.bulk_create([Category(name=name) for name in ROOT_CATEGORIES[:max(count, 1)]])
+        children = [
+            Category(name=f'{self.rng.choice(ADJECTIVES)} {root.name} {index}', parent_category=root)
+            for index, root in enumerate(self.rng.choice(roots) for _ in range(max(count - len(roots), 0)))
+        ]
+        children = Category.objects.bulk_create(children, batch_size=self.batch_size)
+        # Products are listed in leaf categories where there are any
+        self.category_ids = [category.pk for category in children or roots]
+        self._stage('categories', len(roots) + len(children), started)
+
+    def seed_products(self, count):
+        started = time.perf_counter()
+        self.product_ids = []
+        self.product_prices = array('q')  # Cents, by position in product_ids
+        rng = self.rng
+
+        def generate():
+            for index in range(count):
+                noun = rng.choice(NOUNS)
+                cents = max(int(rng.lognormvariate(6.5, 1.1)) * 10, 50)
+                yield Product(
+                    name=f'{rng.choice(ADJECTIVES)} {noun} {rng.choice(UNITS)} #{index}',
+                    description=f'{noun} sourced directly from smallholder farmers.',
+                    price=Decimal(cents) / 100,
+                    category_id=rng.choice(self.category_ids),
+                )
+
+        for batch in _batches(generate(), self.batch_size):
+            for product in Product.objects.bulk_create(batch):
+                self.product_ids.append(product.pk)
+                self.product_prices.append(int(product.price * 100))
+
+        # Popularity rank is independent of insertion order
+        order = list(range(len(self.product_ids)))
+        rng.shuffle(order)
+        self.product_ids = [self.product_ids[position] for position in order]
+        self.product_prices = array('q', (self.product_prices[position] for position in order))
+        self.product_position = {product_id: position for position, product_id in enumerate(self.product_ids)}
+        self.product_weights = _zipf_cum_weights(len(self.product_ids), self.skew)
+        self._stage('products', len(self.product_ids), started)
+
+    def seed_users(self, count):
+        started = time.perf_counter()
+        # Hashing once keeps the password usable without paying the hasher for every user
+        password = make_password(self.password)
+        rng = self.rng
+        self.user_ids = []
+
+        def generate():
+            for index in range(count):
+                yield User(
+                    email=f'user{index}.s{self.seed}@seed.ruralmart.test',
+                    phone_number=f'+{self.seed}{index:09d}'[:20],
+                    first_name=f'User{index}',
+                    last_name=rng.choice(('Otieno', 'Wanjiru', 'Mwangi', 'Achieng', 'Kamau', 'Njeri', 'Mutua')),
+                    roles='vendor' if rng.random() < 0.05 else 'buyer',
+                    password=password,
+                )
+
+        for batch in _batches(generate(), self.batch_size):
+            users = User.objects.bulk_create(batch)
+            UserProfile.objects.bulk_create([UserProfile(user_id=user.pk) for user in users])
+            self.user_ids.extend(user.pk for user in users)
+        rng.shuffle(self.user_ids)
+        self.user_weights = _zipf_cum_weights(len(self.user_ids), self.skew / 2)
+        self._stage('users', len(self.user_ids), started)
+
+    def seed_carts(self, count):
+        started = time.perf_counter()
+        rng = self.rng
+        items = 0
+        owners = rng.sample(self.user_ids, min(count, len(self.user_ids)))  # One cart per user
+        for batch in _batches(owners, self.batch_size):
+            carts = Cart.objects.bulk_create([Cart(user_id=user_id) for user_id in batch])
+            cart_items = [
+                CartItem(cart_id=cart.pk, product_id=product_id, quantity=rng.randint(1, 4))
+                for cart in carts
+                for product_id in dict.fromkeys(self._popular_products(rng.randint(1, 5)))
+            ]
+            items += len(CartItem.objects.bulk_create(cart_items, batch_size=self.batch_size))
+        self._stage('carts', len(owners), started)
+        self.counts['cart_items'] = items
+
+    def seed_orders(self, count):
+        started = time.perf_counter()
+        rng = self.rng
+        methods = [
+            PaymentMethod.objects.get_or_create(name=name, defaults={'category': category})[0].pk
+            for name, category in PAYMENT_METHODS
+        ]
+        items_created = payments_created = 0
+
+        for batch_users in _batches(self._active_users(count), self.batch_size):
+            orders, lines = [], []
+            for user_id in batch_users:
+                order_lines = []
+                for product_id in dict.fromkeys(self._popular_products(rng.choice((1, 1, 2, 2, 3, 4, 6)))):
+                    quantity = rng.randint(1, 5)
+                    unit_cents = self.product_prices[self.product_position[product_id]]
+                    order_lines.append((product_id, quantity, unit_cents))
+                status = rng.choices(ORDER_STATUSES, weights=ORDER_STATUS_WEIGHTS)[0]
+                total_cents = sum(quantity * unit_cents for _, quantity, unit_cents in order_lines)
+                orders.append(Order(user_id=user_id, status=status, total_amount=Decimal(total_cents) / 100))
+                lines.append(order_lines)
+
+            orders = Order.objects.bulk_create(orders)
+            order_items, payments = [], []
+            for order, order_lines in zip(orders, lines):
+                for product_id, quantity, unit_cents in order_lines:
+                    order_items.append(OrderItem(
+                        order_id=order.pk,
+                        product_id=product_id,
+                        quantity=quantity,
+                        unit_price=Decimal(unit_cents) / 100,
+                        total_price=Decimal(quantity * unit_cents) / 100,
+                    ))
+                if order.status != 'pending':
+                    payments.append(Payment(
+                        user_id=order.user_id,
+                        order_id=order.pk,
+                        amount=order.total_amount,
+                        payment_method_id=rng.choice(methods),
+                        status='cancelled' if order.status == 'cancelled' else 'completed',
+                        transaction_reference=f'seed-{self.seed}-{order.pk}',
+                        payment_gateway='paystack',
+                    ))
+            items_created += len(OrderItem.objects.bulk_create(order_items, batch_size=self.batch_size))
+            payments_created += len(Payment.objects.bulk_create(payments, batch_size=self.batch_size))
+
+        self._stage('orders', count, started)
+        self.counts['order_items'] = items_created
+        self.counts['payments'] = payments_created
+
+    def seed_reviews(self, count):
+        started = time.perf_counter()
+        rng = self.rng
+        # Reviews per user follow user activity; each user's products are distinct, so no row hits unique_review
+        reviews_per_user = Counter(self._active_users(count))
+
+        def generate():
+            for user_id, wanted in reviews_per_user.items():
+                wanted = min(wanted, len(self.product_ids))
+                product_ids = {}  # Ordered, so the output does not depend on the id values
+                for _ in range(4):
+                    product_ids.update(dict.fromkeys(self._popular_products(2 * (wanted - len(product_ids)))))
+                    if len(product_ids) >= wanted:
+                        break
+                for product_id in list(product_ids)[:wanted]:
+                    yield user_id, product_id
+
+        created = 0
+        for batch in _batches(generate(), self.batch_size):
+            reviews = []
+            for user_id, product_id in batch:
+                rating = rng.choices((1, 2, 3, 4, 5), weights=RATING_WEIGHTS)[0]
+                reviews.append(Review(
+                    user_id=user_id,
+                    product_id=product_id,
+                    rating=rating,
+                    comment=rng.choice(COMMENTS),
+                    helpful_count=int(rng.paretovariate(1.5)) - 1,
+                    created_at=self._random_date(),
+                ))
+            created += len(Review.objects.bulk_create(reviews))
+        self._stage('reviews', created, started)
+
+        # Ratings of every reviewed product, computed by the database in one statement
+        started = time.perf_counter()
+        product_reviews = Review.objects.filter(product=OuterRef('pk')).order_by().values('product')
+        updated = Product.objects.filter(id__in=Review.objects.values('product_id')).update(
+            rating_count=Subquery(product_reviews.annotate(count=Count('id')).values('count')),
+            rating_total=Subquery(product_reviews.annotate(total=Sum('rating')).values('total')),
+            rating_average=Subquery(product_reviews.annotate(average=Avg('rating')).values('average')),
+        )
+        self._stage('product_ratings', updated, started)
@@ -0,0 +1,70 @@
+import time
+
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+from orders.models import Order
+from orders.serializers import FastOrderSerializer, OrderSerializer
+from products.models import Category, Product
+from products.serializers import CategorySerializer, FastCategorySerializer, FastProductSerializer, ProductSerializer
+from .benchmarks import BenchmarkError, BenchmarkFixture, _percentile
+
+# name -> (path, queryset(fixture), related rows the DRF serializer reads, DRF serializer, fast serializer).
+# The DRF side prefetches them, so both sides are compared with their queries fixed.
+SCENARIOS = {
+    'product_list': ('/v1/products/', lambda f: Product.objects.order_by('name'), (), ProductSerializer, FastProductSerializer),
+    'category_list': ('/v1/categories/', lambda f: Category.objects.all(), (), CategorySerializer, FastCategorySerializer),
+    'order_history': (
+        '/v2/orders/', lambda f: Order.objects.filter(user=f.user).order_by('id'),
+        ('user', 'order_items__product'), OrderSerializer, FastOrderSerializer,
+    ),
+}
+
+
+def run_serializer_benchmarks(names=None, iterations=20):
+    """
+       Build each list endpoint's response data with its DRF serializer and with its fast serializer, checking
+       both render the same JSON, and report rows per CPU second (the throughput of one core, fetching included)
+       and the wall time p50 (ms) of each.
+       Must be called inside a transaction that is rolled back, like `run_benchmarks`.
+    """
+    names = names or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise BenchmarkError(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+
+    fixture = BenchmarkFixture()
+    results = {}
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for name in names:
+            path, queryset, related, drf_serializer, fast_serializer = SCENARIOS[name]
+            context = {'request': RequestFactory().get(path)}
+
+            def drf():
+                return drf_serializer(queryset(fixture).prefetch_related(*related), many=True, context=context).data
+
+            def fast():
+                serializer = fast_serializer(context)
+                return serializer.represent(serializer.values_queryset(queryset(fixture)))
+
+            if JSONRenderer().render(fast()) != JSONRenderer().render(drf()):
+                raise BenchmarkError(f'{name}: the fast serializer does not render the same JSON as {drf_serializer.__name__}')
+            results[name] = {'drf': _measure(drf, iterations), 'fast': _measure(fast, iterations)}
+            results[name]['speedup'] = round(results[name]['fast']['rows_per_cpu_s'] / results[name]['drf']['rows_per_cpu_s'], 2)
+    return results
+
+
+def _measure(build, iterations):
+    build()  # Warm up
+    latencies, rows = [], 0
+    cpu_started = time.process_time()
+    for _ in range(iterations):
+        started = time.perf_counter()
+        rows += len(build())
+        latencies.append((time.perf_counter() - started) * 1000)
+    cpu = time.process_time() - cpu_started
+    return {
+        'rows': rows // iterations,
+        'rows_per_cpu_s': round(rows / cpu) if cpu else 0,
+        'p50_ms': round(_percentile(sorted(latencies), 50), 2),
+    }
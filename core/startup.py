@@ -0,0 +1,63 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+
+# Boots the application the way a worker does, plus the URLconf that its first request would load
+_BOOT_SCRIPT = """
+import time
+started = time.perf_counter()
+from django.core.{kind} import get_{kind}_application
+get_{kind}_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(time.perf_counter() - started)
+"""
+
+# `-X importtime` lines: self and cumulative microseconds, then the module indented by its nesting depth
+_IMPORT_TIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+class StartupProfileError(Exception):
+    pass
+
+
+def profile_startup(asgi=False):
+    """
+       Boot the application in a fresh interpreter with `-X importtime` and return the boot time (ms) and, per imported
+       module, its own and cumulative import time (ms). Import tracing adds some overhead, so compare runs with each other
+       rather than with production boot times.
+    """
+    kind = 'asgi' if asgi else 'wsgi'
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _BOOT_SCRIPT.format(kind=kind)],
+        cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True,
+    )
+    if process.returncode != 0:
+        raise StartupProfileError(f'Booting the {kind} application failed:\n{process.stderr[-2000:]}')
+
+    modules = []
+    for line in process.stderr.splitlines():
+        match = _IMPORT_TIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            modules.append({
+                'module': module,
+                'self_ms': int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000,
+                'depth': len(indent) // 2,
+            })
+    return {'boot_ms': float(process.stdout.strip().splitlines()[-1]) * 1000, 'modules': modules}
+
+
+def import_time_by_package(modules):
+    """
+       Import time per top-level package, from the modules' own times so nested imports are not counted twice.
+    """
+    totals = defaultdict(float)
+    for module in modules:
+        totals[module['module'].split('.')[0]] += module['self_ms']
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
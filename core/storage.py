@@ -0,0 +1,49 @@
+import hashlib
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+# Files whose name is derived from their content (or is otherwise never reused) can be cached for good
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Content-hashed names (and the uuid-named direct uploads, see products/uploads.py): 32 hex characters and an extension
+_HASHED_NAME_RE = re.compile(r'(?:^|/)[0-9a-f]{32}\.\w+$')
+
+
+def is_hashed_name(name):
+    return bool(_HASHED_NAME_RE.search(name))
+
+
+class ContentHashedStorageMixin:
+    """
+       Storage mixin that names saved files by the SHA-256 of their content, in the directory the field uploads to:
+       `product_images/photo.JPG` becomes `product_images/<32 hex>.jpg`.
+       - A file with the same content is stored once, whichever product it was uploaded for.
+       - A name never points at different content, so the files are served with `IMMUTABLE_CACHE_CONTROL`
+         and replacing an image changes its URL.
+       Since files may be shared, a file must not be deleted because one product stopped using it.
+    """
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(directory, f'{digest.hexdigest()[:32]}{extension}')
+
+
+class HashedFileSystemStorage(ContentHashedStorageMixin, FileSystemStorage):
+    pass
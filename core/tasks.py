@@ -0,0 +1,235 @@
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+# For handling error reporting
+logger = logging.getLogger(__name__)
+
+# Registered tasks: name -> Task
+_registry = {}
+
+
+class Task:
+    """
+       A function that the worker (`manage.py run_worker`) runs outside the request.
+       - `enqueue(**kwargs)` stores a job; the kwargs must be JSON serializable. A job enqueued inside a transaction
+         is only visible to workers once the transaction commits, and is dropped if it rolls back.
+       - A failing job is retried up to `max_attempts` times, `retry_delay` seconds later, doubling after each attempt.
+       - With `batch_size`, the function takes a list of kwargs instead and the worker passes it up to that many
+         claimed jobs at once, e.g. to handle them with one query.
+    """
+    def __init__(self, func, name, queue, max_attempts, retry_delay, batch_size):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.batch_size = batch_size
+
+    def __call__(self, *args, **kwargs):
+        # Calling the task runs it inline
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f'<Task {self.name}>'
+
+    def enqueue(self, *, delay=None, run_at=None, priority=0, **kwargs):
+        """
+           Queue one run. `delay` (seconds) or `run_at` schedule it for later; higher `priority` runs first.
+        """
+        return Job.objects.create(**self._job_fields(kwargs, delay, run_at, priority))
+
+    def enqueue_many(self, payloads, *, delay=None, run_at=None, priority=0):
+        """
+           Queue one run per kwargs dict in `payloads`, with one insert.
+        """
+        return Job.objects.bulk_create([Job(**self._job_fields(kwargs, delay, run_at, priority)) for kwargs in payloads])
+
+    def _job_fields(self, kwargs, delay, run_at, priority):
+        if run_at is None:
+            run_at = timezone.now() + timedelta(seconds=delay or 0)
+        return {
+            'task': self.name, 'queue': self.queue, 'payload': kwargs,
+            'priority': priority, 'run_at': run_at, 'max_attempts': self.max_attempts,
+        }
+
+
+def task(name=None, queue='default', max_attempts=5, retry_delay=30, batch_size=None):
+    """
+       Register a function as a background task, named `<module>.<function>` unless `name` is given.
+       Task modules are found by importing each installed app's `tasks` module.
+    """
+    def decorator(func):
+        definition = Task(func, name or f'{func.__module__}.{func.__name__}', queue, max_attempts, retry_delay, batch_size)
+        _registry[definition.name] = definition
+        return definition
+    return decorator
+
+
+def get_task(name):
+    return _registry.get(name)
+
+
+def discover_tasks():
+    autodiscover_modules('tasks')
+
+
+def claim_jobs(worker_id, queues=None, limit=10):
+    """
+       Claim up to `limit` due jobs for this worker and mark them running.
+       `SKIP LOCKED` lets concurrent workers claim different jobs without waiting on each other's row locks.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = Job.objects.select_for_update(skip_locked=True).filter(status=Job.QUEUED, run_at__lte=now)
+        if queues:
+            due = due.filter(queue__in=queues)
+        jobs = list(due.order_by('-priority', 'run_at', 'id')[:limit])
+        if not jobs:
+            return []
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=Job.RUNNING, locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1,
+        )
+    for job in jobs:
+        job.status, job.locked_by, job.locked_at, job.attempts = Job.RUNNING, worker_id, now, job.attempts + 1
+    return jobs
+
+
+def run_jobs(jobs):
+    """
+       Run claimed jobs: one call per job, or per batch for tasks with a `batch_size`.
+       Succeeded jobs are deleted, failed ones retried with backoff or, after their last attempt, kept as failed.
+    """
+    by_task = {}
+    for job in jobs:
+        by_task.setdefault(job.task, []).append(job)
+    for name, group in by_task.items():
+        definition = get_task(name)
+        size = definition.batch_size if definition and definition.batch_size else 1
+        for start in range(0, len(group), size):
+            _run(definition, name, group[start:start + size])
+
+
+def _run(definition, name, jobs):
+    # Jobs claimed together wait for each other, the lock is timed from when each one starts
+    Job.objects.filter(pk__in=[job.pk for job in jobs]).update(locked_at=timezone.now())
+    started = time.perf_counter()
+    try:
+        if definition is None:
+            raise LookupError(f'Unknown task {name}, is its module named tasks.py?')
+        if definition.batch_size:
+            definition.func([job.payload for job in jobs])
+        else:
+            definition.func(**jobs[0].payload)
+    except Exception:
+        error = traceback.format_exc()
+        for job in jobs:
+            _retry_or_fail(job, definition, error)
+        return
+    Job.objects.filter(pk__in=[job.pk for job in jobs]).delete()
+    logger.info(f"{name} ran {len(jobs)} job(s) in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+def retry_delay(definition, attempts):
+    # Exponential backoff with jitter, so jobs failing together are not retried together
+    base = definition.retry_delay if definition else 30
+    delay = min(base * 2 ** (attempts - 1), settings.TASK_MAX_RETRY_DELAY)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _retry_or_fail(job, definition, error):
+    if job.attempts >= job.max_attempts:
+        logger.error(f"{job.task} job {job.pk} failed after {job.attempts} attempts:\n{error}")
+        Job.objects.filter(pk=job.pk).update(status=Job.FAILED, locked_by='', locked_at=None, last_error=error)
+        return
+    logger.warning(f"{job.task} job {job.pk} failed (attempt {job.attempts} of {job.max_attempts}), retrying:\n{error}")
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.QUEUED, locked_by='', locked_at=None, last_error=error,
+        run_at=timezone.now() + timedelta(seconds=retry_delay(definition, job.attempts)),
+    )
+
+
+def requeue_stale_jobs():
+    """
+       Release jobs left running for longer than `TASK_LOCK_TIMEOUT` seconds, e.g. by a worker that was killed.
+       They are retried like failed jobs, so a job that keeps killing its worker ends up failed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.TASK_LOCK_TIMEOUT)
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff)
+    released = {'locked_by': '', 'locked_at': None, 'last_error': 'Worker stopped responding while running the job.'}
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(status=Job.FAILED, **released)
+    requeued = stale.update(status=Job.QUEUED, **released)
+    return requeued + failed
+
+
+class Worker:
+    """
+       Runs queued jobs in `concurrency` threads, each polling for due jobs every `poll_interval` seconds
+       when the queue is empty. `stop()` lets the running jobs finish. With `burst`, the worker stops once no
+       job is due, e.g. to drain the queue from cron.
+    """
+    def __init__(self, queues=None, concurrency=1, batch=10, poll_interval=1.0, burst=False):
+        self.queues = queues
+        self.concurrency = concurrency
+        self.batch = batch
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.stopping = threading.Event()
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+
+    def stop(self):
+        self.stopping.set()
+
+    def run(self):
+        discover_tasks()
+        if self.concurrency == 1:
+            self.loop(self.name)
+            return
+        threads = [
+            threading.Thread(target=self.loop, args=(f'{self.name}:{index}',), name=f'worker-{index}')
+            for index in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def loop(self, worker_id):
+        self.last_stale_check = 0
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                try:
+                    ran = self.poll(worker_id)
+                except DatabaseError as e:
+                    # e.g. the database restarting; jobs left running are released by `requeue_stale_jobs`
+                    logger.warning(f"Worker {worker_id} could not reach the database, retrying: {str(e)}")
+                    ran = False
+                if not ran:
+                    if self.burst:
+                        break
+                    self.stopping.wait(self.poll_interval)
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+
+    def poll(self, worker_id):
+        if time.monotonic() - self.last_stale_check > settings.TASK_LOCK_TIMEOUT / 2:
+            requeue_stale_jobs()
+            self.last_stale_check = time.monotonic()
+        jobs = claim_jobs(worker_id, self.queues, self.batch)
+        run_jobs(jobs)
+        return bool(jobs)
@@ -0,0 +1,820 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import zlib
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skip
+
+import boto3
+import brotli
+import msgpack
+from PIL import Image
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Count, Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from orders.models import Order, OrderItem
+from products.models import Cart, Category, Product
+from reviews.models import Review
+from payments.models import Payment, PaymentMethod
+from .benchmarks import SCENARIOS, load_budgets
+from .checks import check_shared_cache
+from .concurrency_benchmarks import run_concurrency_benchmarks
+from .db_router import ReplicaRouter, reset_replica_health
+from .compression import negotiate_encoding
+from .compression_benchmarks import run_compression_benchmarks
+from .serializer_benchmarks import run_serializer_benchmarks
+from .middleware import CompressionMiddleware, ReplicaRoutingMiddleware, endpoint_query_stats
+from .models import IdempotencyKey, Job
+from .renderers import ORJSONRenderer
+from .startup import import_time_by_package, profile_startup
+from .tasks import Worker, claim_jobs, requeue_stale_jobs, run_jobs, task
+from .throttling import TokenBucketThrottle, throttle_counters
+
+try:
+    from moto import mock_aws
+except ImportError:  # Test-only dependency from requirements-dev.txt
+    mock_aws = skip('moto is not installed')
+
+User = get_user_model()
+
+
+# Test cases for the Idempotency-Key layer
+class IdempotencyKeyTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            first_name='John',
+            last_name='Doe',
+            email='johndoe@gmail.com',
+            phone_number='1234567890',
+            password='Password@123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_retried_order_creation_is_replayed(self):
+        """
+        Test that retrying an order creation with the same key creates a single order.
+        """
+        url = '/v2/orders/'
+        first = self.client.post(url, {}, format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+        second = self.client.post(url, {}, format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+
+    def test_replay_is_served_from_the_database_without_cache(self):
+        """
+        Test that a stored response is replayed even when the cache entry is gone.
+        """
+        url = '/v2/orders/'
+        first = self.client.post(url, {}, format='json', HTTP_IDEMPOTENCY_KEY='order-2')
+        cache.clear()
+        second = self.client.post(url, {}, format='json', HTTP_IDEMPOTENCY_KEY='order-2')
+
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+
+    def test_key_reused_with_different_payload(self):
+        """
+        Test that reusing a key for a different request is rejected.
+        """
+        url = '/v2/orders/'
+        self.client.post(url, {}, format='json', HTTP_IDEMPOTENCY_KEY='order-3')
+        response = self.client.post(url, {'status': 'shipped'}, format='json', HTTP_IDEMPOTENCY_KEY='order-3')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_key_still_in_progress(self):
+        """
+        Test that a replay arriving while the first request is running gets a conflict.
+        """
+        url = '/v2/orders/'
+        self.client.post(url, {}, format='json', HTTP_IDEMPOTENCY_KEY='order-4')
+        cache.clear()
+        IdempotencyKey.objects.filter(key='order-4').update(response_status=None, response_body=None)
+        response = self.client.post(url, {}, format='json', HTTP_IDEMPOTENCY_KEY='order-4')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_abandoned_claim_is_taken_over(self):
+        """
+        Test that a key claimed by a request that never finished can be used again after the claim timeout.
+        """
+        url = '/v2/orders/'
+        self.client.post(url, {}, format='json', HTTP_IDEMPOTENCY_KEY='order-5')
+        cache.clear()
+        IdempotencyKey.objects.filter(key='order-5').update(
+            response_status=None, response_body=None, created_at=timezone.now() - settings.IDEMPOTENCY_CLAIM_TIMEOUT,
+        )
+        response = self.client.post(url, {}, format='json', HTTP_IDEMPOTENCY_KEY='order-5')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(IdempotencyKey.objects.get(key='order-5').is_completed())
+
+    def test_anonymous_keys_are_unique(self):
+        """
+        Test that the same key cannot be stored twice without a user.
+        """
+        fields = {'key': 'anonymous-1', 'method': 'POST', 'path': '/v2/orders/', 'fingerprint': 'x', 'expires_at': timezone.now()}
+        IdempotencyKey.objects.create(**fields)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            IdempotencyKey.objects.create(**fields)
+
+    def test_requests_without_key_are_not_deduplicated(self):
+        """
+        Test that requests without the header behave as before.
+        """
+        url = '/v2/orders/'
+        self.client.post(url, {}, format='json')
+        self.client.post(url, {}, format='json')
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    @mock.patch('payments.views.ainitialize_payment', new_callable=mock.AsyncMock)
+    def test_retried_payment_initialization_skips_the_gateway(self, initialize_payment):
+        """
+        Test that retrying payment creation does not call Paystack twice or create a second payment.
+        """
+        initialize_payment.return_value = {
+            'data': {'reference': 'ref-1', 'authorization_url': 'https://checkout.paystack.com/ref-1'}
+        }
+        order = Order.objects.create(user=self.user)
+        payment_method = PaymentMethod.objects.create(name='Visa')
+        data = {'order_id': order.id, 'payment_method_id': payment_method.id}
+
+        first = self.client.post('/v3/create-payment/', data, format='json', HTTP_IDEMPOTENCY_KEY='pay-1')
+        second = self.client.post('/v3/create-payment/', data, format='json', HTTP_IDEMPOTENCY_KEY='pay-1')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(initialize_payment.call_count, 1)
+        self.assertEqual(Payment.objects.filter(order=order).count(), 1)
+
+
+# Test cases for the token bucket throttle
+@override_settings(THROTTLE_BUCKETS={'catalog': {'capacity': 2, 'refill_per_minute': 60}})
+class TokenBucketThrottleTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1_000_000.0
+        patcher = mock.patch.object(TokenBucketThrottle, 'timer', staticmethod(lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bucket_empties_and_refills(self):
+        url = '/v1/categories/'
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '1')
+
+        self.now += 1  # One token refilled
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_idle_bucket_does_not_overflow(self):
+        url = '/v1/categories/'
+        self.client.get(url)
+        self.now += 600  # Long idle period refills to capacity, not beyond
+        statuses = [self.client.get(url).status_code for _ in range(3)]
+        self.assertEqual(statuses, [status.HTTP_200_OK, status.HTTP_200_OK, status.HTTP_429_TOO_MANY_REQUESTS])
+
+    def test_rejection_skips_the_view(self):
+        url = '/v1/categories/'
+        self.client.get(url)
+        self.client.get(url)
+        before = throttle_counters().get(('catalog', 'throttled'), 0)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        self.assertEqual(throttle_counters()[('catalog', 'throttled')], before + 1)
+
+    def test_counter_expiring_before_the_refund_still_rejects(self):
+        url = '/v1/categories/'
+        self.client.get(url)
+        self.client.get(url)
+        with mock.patch.object(TokenBucketThrottle.cache, 'decr', side_effect=ValueError):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_spoofed_forwarded_for_does_not_reset_the_bucket(self):
+        url = '/v1/categories/'
+        statuses = [self.client.get(url, HTTP_X_FORWARDED_FOR=f'10.0.0.{i}').status_code for i in range(3)]
+        self.assertEqual(statuses[-1], status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Behind one proxy, only the address it appended counts
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            statuses = [self.client.get(url, HTTP_X_FORWARDED_FOR=f'10.0.0.{i}, 203.0.113.9').status_code for i in range(3)]
+        self.assertEqual(statuses, [status.HTTP_200_OK, status.HTTP_200_OK, status.HTTP_429_TOO_MANY_REQUESTS])
+
+    def test_unscoped_views_are_not_throttled(self):
+        user = User.objects.create_user(email='johndoe@gmail.com', phone_number='1234567890', password='Password@123')
+        self.client.force_authenticate(user=user)
+        for _ in range(5):
+            self.assertEqual(self.client.get('/v1/carts/').status_code, status.HTTP_200_OK)
+
+
+# Test cases for the query instrumentation middleware
+class QueryInstrumentationMiddlewareTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='johndoe@gmail.com', phone_number='1234567890', password='Password@123')
+        self.client.force_authenticate(user=self.user)
+        for _ in range(3):
+            Cart.objects.create(user=self.user)
+
+    @override_settings(QUERY_DEBUG_HEADERS=True)
+    def test_debug_headers_report_queries(self):
+        response = self.client.get('/v1/carts/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(int(response['X-DB-Query-Count']), 3)
+        self.assertGreater(int(response['X-DB-Duplicate-Queries']), 0)
+        self.assertIn('X-DB-Query-Time-Ms', response)
+
+    @override_settings(QUERY_DEBUG_HEADERS=True)
+    async def test_queries_of_async_views_are_counted(self):
+        # Under ASGI the queries run in the request's sync thread, where the wrappers must be installed
+        response = await self.async_client.get('/v1/products/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(int(response['X-DB-Query-Count']), 1)
+
+    @override_settings(QUERY_DEBUG_HEADERS=False)
+    def test_headers_are_off_by_default(self):
+        response = self.client.get('/v1/carts/')
+        self.assertNotIn('X-DB-Query-Count', response)
+
+    def test_stats_are_aggregated_per_action(self):
+        before = endpoint_query_stats().get('CartViewSet.list', {'requests': 0})
+        self.client.get('/v1/carts/')
+        self.client.get('/v1/carts/')
+        stats = endpoint_query_stats()['CartViewSet.list']
+        self.assertEqual(stats['requests'], before['requests'] + 2)
+        self.assertGreater(stats['max_queries'], 3)
+
+    @override_settings(QUERY_DUPLICATE_LOG_THRESHOLD=2)
+    def test_repeated_queries_are_logged_with_their_origin(self):
+        with self.assertLogs('core.middleware', level='WARNING') as logs:
+            self.client.get('/v1/carts/')
+        self.assertIn('CartViewSet.list', logs.output[0])
+        self.assertIn('cart_utils.py', logs.output[0])
+
+
+# Test cases for the Prometheus metrics endpoint
+@override_settings(METRICS_TOKEN='scrape-secret')
+class MetricsEndpointTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def scrape(self):
+        return self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+
+    def test_requests_are_exported_by_endpoint_and_status(self):
+        self.client.get('/v1/categories/')
+        response = self.scrape()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.content.decode()
+        self.assertIn('ruralmart_http_requests_total{endpoint="CategoryViewSet.list",method="GET",status="200"}', body)
+        self.assertIn('ruralmart_http_request_duration_seconds_bucket{endpoint="CategoryViewSet.list"', body)
+        self.assertIn('ruralmart_db_queries_per_request_bucket{endpoint="CategoryViewSet.list"', body)
+        self.assertIn('ruralmart_throttle_decisions_total{outcome="allowed",scope="catalog"}', body)
+
+    def test_unresolved_paths_share_one_label(self):
+        self.client.get('/no-such-page/')
+        body = self.scrape().content.decode()
+        self.assertIn('endpoint="unmatched"', body)
+        self.assertNotIn('no-such-page', body)
+
+    @mock.patch('payments.paystack_service.get_paystack_api')
+    def test_paystack_calls_and_cache_lookups_are_exported(self, get_paystack_api):
+        from payments.paystack_service import verify_payment_cached
+        get_paystack_api.return_value.transaction.verify.return_value = {'status': True, 'data': {'status': 'success'}}
+        verify_payment_cached('ref-metrics')
+        verify_payment_cached('ref-metrics')
+        body = self.scrape().content.decode()
+        self.assertIn('ruralmart_paystack_request_duration_seconds_count{operation="verify",outcome="ok"}', body)
+        self.assertIn('ruralmart_cache_lookups_total{cache="paystack_verify",result="hit"}', body)
+
+    def test_token_is_required(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.scrape().status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_are_hidden_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_404_NOT_FOUND)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_200_OK)
+
+
+# Test cases for the precompiled OpenAPI schema
+class PrecompiledSchemaTestCase(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        call_command('build_schema', output_dir=cls.directory, stdout=StringIO(), stderr=StringIO())
+        cls.manifest = json.loads(open(os.path.join(cls.directory, 'manifest.json'), encoding='utf-8').read())
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        overrides = override_settings(OPENAPI_SCHEMA_DIR=self.directory, OPENAPI_SCHEMA_PRECOMPILED=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_unchanged_sources_are_not_rebuilt(self):
+        out = StringIO()
+        call_command('build_schema', output_dir=self.directory, stdout=out, stderr=StringIO())
+        self.assertIn('up to date', out.getvalue())
+        call_command('build_schema', output_dir=self.directory, check=True, stdout=StringIO())
+
+    def test_schema_is_served_from_the_artifact(self):
+        response = self.client.get('/api/schema/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=300')
+        self.assertEqual(response['ETag'], f'"{self.manifest["files"]["yaml"]}"')
+
+        response = self.client.get(
+            '/api/schema/', HTTP_ACCEPT='application/vnd.oai.openapi+json', HTTP_IF_NONE_MATCH=f'"{self.manifest["files"]["json"]}"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_hashed_artifacts_are_immutable(self):
+        name = self.manifest['files']['json']
+        response = self.client.get(f'/api/schema/{name}')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertIn('/v1/products/', json.loads(response.content)['paths'])
+        self.assertEqual(self.client.get('/api/schema/openapi.0000000000000000.json').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertContains(self.client.get('/api/schema/swagger-ui/'), f'/api/schema/{name}')
+
+    @mock.patch.dict('core.schema._loaded', clear=True)
+    @mock.patch('core.schema.source_fingerprint', return_value='changed')
+    def test_stale_schema_is_generated_per_request(self, source_fingerprint):
+        with self.assertLogs('core.schema', level='WARNING'):
+            response = self.client.get('/api/schema/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', response)
+        with self.assertRaises(CommandError):
+            call_command('build_schema', output_dir=self.directory, check=True, stdout=StringIO())
+
+
+# Test cases for the synthetic marketplace generator
+class SeedMarketplaceTestCase(APITestCase):
+    def seed(self, seed=1):
+        call_command(
+            'seed_marketplace', seed=seed, categories=20, products=200, users=50, carts=10, orders=100, reviews=300,
+            stdout=StringIO(),
+        )
+
+    def test_generates_consistent_data(self):
+        self.seed()
+        self.assertEqual(Product.objects.count(), 200)
+        self.assertEqual(Order.objects.count(), 100)
+        self.assertEqual(Review.objects.count(), 300)
+        self.assertEqual(Payment.objects.count(), Order.objects.exclude(status='pending').count())
+
+        order = Order.objects.annotate(items_total=Sum('order_items__total_price')).first()
+        self.assertEqual(order.total_amount, order.items_total)
+        product = Product.objects.annotate(reviews_count=Count('reviews')).order_by('-reviews_count').first()
+        self.assertEqual(product.rating_count, product.reviews_count)
+        self.assertGreater(product.rating_count, 300 / 200)  # Popular products collect more than their share
+
+    def test_same_seed_generates_same_data(self):
+        def snapshot():
+            return list(Review.objects.order_by('id').values_list('user__email', 'product__name', 'rating', 'created_at'))
+        self.seed(seed=5)
+        first = snapshot()
+        for model in (Review, OrderItem, Order, Cart, Product, User):
+            model.objects.all().delete()
+        self.seed(seed=5)
+        self.assertEqual(snapshot(), first)
+
+
+# Test cases for the benchmark suite
+class RunBenchmarksTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        call_command('seed_marketplace', seed=2, categories=20, products=100, users=30, carts=5, orders=50, reviews=100, stdout=StringIO())
+
+    def test_query_budgets_hold(self):
+        """
+        Test that every scenario runs and stays within its checked-in query budget.
+        """
+        out = StringIO()
+        call_command('run_benchmarks', iterations=2, warmup=1, alloc_iterations=1, no_latency_budgets=True, stdout=out)
+        self.assertIn('All benchmarks are within budget.', out.getvalue())
+        self.assertEqual(set(load_budgets()), set(SCENARIOS))
+
+    def test_exceeded_budget_fails(self):
+        budgets_path = self.write_budgets({'order_history': {'max_queries': 1}})
+        with self.assertRaisesMessage(CommandError, 'order_history: queries'):
+            call_command(
+                'run_benchmarks', scenarios=['order_history'], iterations=1, warmup=0, alloc_iterations=1,
+                budgets=budgets_path, stdout=StringIO(),
+            )
+
+    def test_benchmark_data_is_rolled_back(self):
+        orders = Order.objects.count()
+        call_command(
+            'run_benchmarks', scenarios=['checkout'], iterations=2, warmup=1, alloc_iterations=1,
+            no_latency_budgets=True, stdout=StringIO(),
+        )
+        self.assertEqual(Order.objects.count(), orders)
+        self.assertFalse(User.objects.filter(email='benchmark@ruralmart.invalid').exists())
+
+    def test_compression_benchmark_reports_smaller_payloads(self):
+        with transaction.atomic():
+            results = run_compression_benchmarks(iterations=1)
+            transaction.set_rollback(True)
+        self.assertEqual(set(results), {'product_list', 'order_history'})
+        for encodings in results.values():
+            self.assertLess(encodings['gzip']['bytes'], encodings['identity']['bytes'] / 3)
+            self.assertLess(encodings['br']['bytes'], encodings['identity']['bytes'] / 3)
+
+    def test_serializer_benchmark_checks_parity(self):
+        with transaction.atomic():
+            results = run_serializer_benchmarks(iterations=1)
+            transaction.set_rollback(True)
+        self.assertEqual(set(results), {'product_list', 'category_list', 'order_history'})
+        self.assertEqual(results['order_history']['fast']['rows'], 20)
+        for result in results.values():
+            self.assertGreater(result['fast']['rows_per_cpu_s'], 0)
+
+    def write_budgets(self, budgets):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'budgets.json')
+        with open(path, 'w') as budgets_file:
+            json.dump(budgets, budgets_file)
+        return path
+
+
+# Test cases for the WSGI/ASGI concurrency benchmark; the servers' threads need committed rows
+class ConcurrencyBenchmarkTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Grains')
+        Product.objects.bulk_create([Product(name=f'Fresh Maize {index}', price=10, category=category) for index in range(6)])
+
+    def test_asgi_serves_slow_upstream_calls_concurrently(self):
+        results = run_concurrency_benchmarks(
+            ['payment_create', 'product_detail'], requests=8, concurrency=8, wsgi_threads=2, paystack_latency=0.1,
+        )
+        for modes in results.values():
+            for result in modes.values():
+                self.assertEqual(result['errors'], 0)
+        # Two threads need four rounds of Paystack calls, the event loop waits on all of them at once
+        self.assertGreater(results['payment_create']['wsgi']['p95_ms'], 300)
+        self.assertGreater(results['payment_create']['asgi']['throughput_rps'], results['payment_create']['wsgi']['throughput_rps'])
+        self.assertEqual(Payment.objects.count(), 0)
+        self.assertFalse(User.objects.filter(email='benchmark@ruralmart.invalid').exists())
+
+
+# Test cases for the read replica routing
+@override_settings(REPLICA_DATABASES=['replica_0'], REPLICA_STICKY_SECONDS=15, REPLICA_MAX_LAG_SECONDS=5, REPLICA_LAG_CHECK_INTERVAL=0)
+class ReplicaRoutingTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        reset_replica_health()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        patcher = mock.patch('core.db_router.replica_lag', return_value=0.5)
+        self.replica_lag = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def route(self, request, write=False):
+        """
+        Run a request through the middleware and return the database its reads went to.
+        """
+        used = []
+
+        def view(request):
+            if write:
+                self.router.db_for_write(User)
+            used.append(self.router.db_for_read(User))
+            return mock.Mock(status_code=200)
+
+        ReplicaRoutingMiddleware(view)(request)
+        return used[0]
+
+    def test_safe_requests_read_from_a_replica(self):
+        self.assertEqual(self.route(self.factory.get('/v1/products/')), 'replica_0')
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        token = {'HTTP_AUTHORIZATION': 'Bearer user-a'}
+        self.assertEqual(self.route(self.factory.post('/v1/cart-items/', **token), write=True), 'default')
+        self.assertEqual(self.route(self.factory.get('/v1/carts/', **token)), 'default')
+        # Other clients still read from the replica
+        self.assertEqual(self.route(self.factory.get('/v1/carts/', HTTP_AUTHORIZATION='Bearer user-b')), 'replica_0')
+
+    def test_reads_after_a_write_in_the_same_request_use_the_primary(self):
+        self.assertEqual(self.route(self.factory.get('/v1/products/'), write=True), 'default')
+
+    def test_lagging_or_unreachable_replicas_are_skipped(self):
+        self.replica_lag.return_value = 30
+        self.assertEqual(self.route(self.factory.get('/v1/products/')), 'default')
+        self.replica_lag.side_effect = DatabaseError('connection refused')
+        self.assertEqual(self.route(self.factory.get('/v1/products/')), 'default')
+
+    def test_migrations_only_run_on_the_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'products'))
+        self.assertFalse(self.router.allow_migrate('replica_0', 'products'))
+
+
+# Test cases for the startup profiler; boots the app in a separate interpreter
+class StartupProfileTestCase(SimpleTestCase):
+    def test_profile_reports_boot_and_import_times(self):
+        profile = profile_startup()
+        self.assertGreater(profile['boot_ms'], 0)
+        self.assertIn('django', dict(import_time_by_package(profile['modules'])))
+
+    def test_heavy_sdks_are_not_imported_at_boot(self):
+        imported = {module['module'] for module in profile_startup()['modules']}
+        self.assertIn('payments.views', imported)
+        for package in ('paystackapi', 'httpx', 'drf_spectacular'):
+            self.assertFalse([module for module in imported if module.split('.')[0] == package], package)
+
+
+# Test cases for content-hashed media storage
+class ContentHashedStorageTestCase(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        overrides = override_settings(MEDIA_ROOT=self.media_root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.category = Category.objects.create(name='Grains')
+
+    def image(self, color, name='Photo.PNG'):
+        content = BytesIO()
+        Image.new('RGB', (2, 2), color).save(content, format='PNG')
+        return SimpleUploadedFile(name, content.getvalue(), content_type='image/png')
+
+    def create_product(self, image):
+        response = self.client.post('/v1/products/', {
+            'name': 'Maize', 'description': 'Dry maize', 'price': '50.00', 'category': self.category.id, 'image': image,
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Product.objects.get(pk=response.data['id'])
+
+    def test_uploads_are_named_by_content_and_stored_once(self):
+        first = self.create_product(self.image('red'))
+        second = self.create_product(self.image('red', name='other.png'))
+        third = self.create_product(self.image('blue'))
+        self.assertRegex(first.image.name, r'^product_images/[0-9a-f]{32}\.png$')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, third.image.name)
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root, 'product_images'))), 2)
+
+    def test_hashed_media_is_served_as_immutable(self):
+        product = self.create_product(self.image('red'))
+        response = self.client.get(product.image.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+        os.makedirs(os.path.join(self.media_root, 'product_images'), exist_ok=True)
+        with open(os.path.join(self.media_root, 'product_images', 'default.jpg'), 'wb') as default_image:
+            default_image.write(b'jpeg')
+        response = self.client.get('/media/product_images/default.jpg')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        self.assertEqual(self.client.get('/media/product_images/missing.jpg').status_code, status.HTTP_404_NOT_FOUND)
+
+    @mock_aws
+    def test_s3_objects_are_stored_with_an_immutable_cache_control(self):
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='ruralmart-test-media')
+        with override_settings(
+            STORAGES={'default': {'BACKEND': 'core.s3_storage.HashedS3Storage'}, 'staticfiles': settings.STORAGES['staticfiles']},
+            AWS_STORAGE_BUCKET_NAME='ruralmart-test-media', AWS_S3_REGION_NAME='us-east-1',
+        ):
+            product = self.create_product(self.image('red'))
+            stored = boto3.client('s3', region_name='us-east-1').head_object(Bucket='ruralmart-test-media', Key=product.image.name)
+        self.assertEqual(stored['CacheControl'], 'public, max-age=31536000, immutable')
+
+
+# Calls made by the test tasks below
+task_calls = []
+
+
+@task(name='core.tests.record', max_attempts=2, retry_delay=60)
+def record_task(value, fail=False):
+    if fail:
+        raise ValueError(f'Task failed for {value}')
+    task_calls.append(value)
+
+
+@task(name='core.tests.record_batch', batch_size=3)
+def record_batch_task(payloads):
+    task_calls.append([payload['value'] for payload in payloads])
+
+
+# Test cases for the database-backed task queue
+class TaskQueueTestCase(APITestCase):
+    def setUp(self):
+        task_calls.clear()
+
+    def run_queue(self, limit=10):
+        run_jobs(claim_jobs('test-worker', limit=limit))
+
+    def test_due_jobs_run_by_priority_and_are_removed(self):
+        record_task.enqueue(value='later', delay=60)
+        record_task.enqueue(value='low')
+        record_task.enqueue(value='high', priority=5)
+        self.run_queue()
+        self.assertEqual(task_calls, ['high', 'low'])
+        self.assertEqual(list(Job.objects.values_list('payload__value', flat=True)), ['later'])
+
+    def test_batch_tasks_get_claimed_jobs_together(self):
+        record_batch_task.enqueue_many([{'value': value} for value in range(5)])
+        self.run_queue()
+        self.assertEqual(task_calls, [[0, 1, 2], [3, 4]])
+        self.assertFalse(Job.objects.exists())
+
+    def test_failing_jobs_are_retried_with_backoff_then_kept_as_failed(self):
+        record_task.enqueue(value='a', fail=True)
+        with self.assertLogs('core.tasks', 'WARNING'):
+            self.run_queue()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=40))
+        self.assertIn('Task failed for a', job.last_error)
+
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.run_queue()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_jobs_of_rolled_back_transactions_are_dropped(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                record_task.enqueue(value='a')
+                raise ValueError('rollback')
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(TASK_LOCK_TIMEOUT=60)
+    def test_jobs_of_dead_workers_are_requeued(self):
+        record_task.enqueue(value='a')
+        claim_jobs('dead-worker')
+        self.assertEqual(claim_jobs('test-worker'), [])
+        Job.objects.update(locked_at=timezone.now() - timedelta(seconds=120))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.run_queue()
+        self.assertEqual(task_calls, ['a'])
+
+
+# Test cases for the worker loop, which commits as it goes
+class TaskWorkerTestCase(TransactionTestCase):
+    def test_burst_worker_drains_the_queue(self):
+        task_calls.clear()
+        record_task.enqueue_many([{'value': value} for value in range(4)])
+        Worker(batch=2, burst=True).run()
+        self.assertEqual(sorted(task_calls), [0, 1, 2, 3])
+        self.assertFalse(Job.objects.exists())
+
+
+# Test cases for response compression
+@override_settings(COMPRESSION_MIN_BYTES=200)
+class CompressionMiddlewareTestCase(APITestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.payload = json.dumps([{'id': i, 'name': f'Product {i}', 'price': '50.00'} for i in range(50)]).encode('utf-8')
+
+    def respond(self, response, accept_encoding='gzip, deflate, br', path='/v1/products/'):
+        request = self.factory.get(path, HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_encoding_negotiation(self):
+        self.assertEqual(negotiate_encoding('gzip, deflate, br'), 'br')
+        self.assertEqual(negotiate_encoding('gzip;q=1.0, br;q=0.5'), 'gzip')
+        self.assertEqual(negotiate_encoding('br;q=0, *'), 'gzip')
+        self.assertIsNone(negotiate_encoding('identity'))
+        self.assertIsNone(negotiate_encoding(''))
+
+    def test_json_is_compressed_with_the_preferred_encoding(self):
+        response = self.respond(HttpResponse(self.payload, content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.payload)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = self.respond(HttpResponse(self.payload, content_type='application/json'), accept_encoding='gzip')
+        self.assertEqual(gzip.decompress(response.content), self.payload)
+
+    def test_small_encoded_and_binary_responses_are_left_alone(self):
+        for response in (
+            HttpResponse(b'{"id": 1}', content_type='application/json'),
+            HttpResponse(self.payload, content_type='image/png'),
+            HttpResponse(gzip.compress(self.payload), content_type='application/json', headers={'Content-Encoding': 'gzip'}),
+        ):
+            original = response.content
+            self.assertEqual(self.respond(response).content, original)
+        self.assertFalse(self.respond(HttpResponse(self.payload, content_type='application/json'), 'identity').has_header('Content-Encoding'))
+
+    def test_token_responses_are_not_compressed(self):
+        response = self.respond(HttpResponse(self.payload, content_type='application/json'), path='/users/auth/api/token/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, self.payload)
+
+    def test_streamed_responses_are_compressed_chunk_by_chunk(self):
+        rows = [self.payload[i:i + 500] for i in range(0, len(self.payload), 500)]
+        response = self.respond(StreamingHttpResponse(iter(rows), content_type='text/csv'), accept_encoding='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        chunks = list(response.streaming_content)
+        # Each chunk is flushed, so what has arrived so far already decodes to the rows sent
+        self.assertEqual(zlib.decompressobj(31).decompress(chunks[0]), rows[0])
+        self.assertEqual(gzip.decompress(b''.join(chunks)), self.payload)
+
+    async def test_async_streamed_responses_are_compressed(self):
+        async def rows():
+            yield self.payload[:1000]
+            yield self.payload[1000:]
+
+        async def get_response(request):
+            return StreamingHttpResponse(rows(), content_type='application/json')
+
+        request = self.factory.get('/v1/products/', HTTP_ACCEPT_ENCODING='br')
+        response = await CompressionMiddleware(get_response)(request)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(brotli.decompress(body), self.payload)
+
+    def test_api_responses_are_compressed(self):
+        category = Category.objects.create(name='Grains')
+        Product.objects.bulk_create([
+            Product(name=f'Maize {i}', description='Dry maize from the highlands', price=50, category=category) for i in range(20)
+        ])
+        plain = self.client.get('/v1/products/')
+        compressed = self.client.get('/v1/products/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(compressed.content)), plain.json())
+        self.assertLess(len(compressed.content), len(plain.content) / 3)
+
+
+# Test cases for the orjson and MessagePack renderers and the orjson parser
+class RendererTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Grains é')
+        Product.objects.create(name='Maize\u2028flour', description='Dry maize', price='50.5', category=category)
+        Product.objects.create(name='Rice', description='Brown rice', price=12, category=category)
+        self.user = User.objects.create(email='buyer@gmail.com', phone_number='0700000002', first_name='Jane', last_name='Doe')
+
+    def test_orjson_matches_drf_json(self):
+        data = {
+            'total': Decimal('12.50'), 'name': 'Café \u2029', 'message': gettext_lazy('Not found.'),
+            'duration': timedelta(seconds=90), 'ids': (1, 2), 7: None, 'nested': [{'price': '50.00', 'ok': True}],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+        when = timezone.now().replace(microsecond=0)
+        self.assertEqual(ORJSONRenderer().render({'at': when}), JSONRenderer().render({'at': when}))
+
+    def test_api_responses_are_unchanged(self):
+        response = self.client.get('/v1/products/')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_msgpack_is_negotiated(self):
+        response = self.client.get('/v1/products/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json.loads(self.client.get('/v1/products/').content))
+        self.assertEqual(self.client.get('/v1/categories/?format=msgpack')['Content-Type'], 'application/msgpack')
+
+    def test_orjson_parser(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/v1/carts/', '{"user": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('JSON parse error', response.data['detail'])
+        response = self.client.post('/v1/carts/', '{"quantity": NaN}', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+# Test cases for the shared cache deployment check
+class SharedCacheCheckTestCase(SimpleTestCase):
+    def test_process_local_cache_is_reported(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([warning.id for warning in check_shared_cache(None)], ['core.W001'])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379'}}):
+            self.assertEqual(check_shared_cache(None), [])
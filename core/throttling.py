@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import record_throttle
+
+# For handling error reporting
+logger = logging.getLogger(__name__)
+
+# Allowed/throttled request counts per scope for this worker, also exported to /metrics
+_counters = Counter()
+_counters_lock = threading.Lock()
+
+
+def throttle_counters():
+    """
+       Snapshot of this worker's counters, keyed by (scope, 'allowed' | 'throttled').
+    """
+    with _counters_lock:
+        return dict(_counters)
+
+
+def _count(scope, outcome):
+    with _counters_lock:
+        _counters[(scope, outcome)] += 1
+    record_throttle(scope, outcome)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+       Token bucket throttle keyed by user (or client IP for anonymous requests) and `throttle_scope`.
+       - Budgets come from `THROTTLE_BUCKETS`: a bucket holds `capacity` tokens and refills at
+         `refill_per_minute`. Views without a configured scope are not throttled.
+       - State lives in the shared cache as a start time and an atomically incremented count of
+         spent tokens; the tokens available are `capacity + refill * elapsed - spent`.
+         A request costs one `incr` and one `get`, and a rejection adds one `decr`.
+    """
+    cache = cache
+    timer = time.time
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scope', None)
+        bucket = settings.THROTTLE_BUCKETS.get(self.scope)
+        if bucket is None:
+            return True
+
+        capacity = bucket['capacity']
+        rate = bucket['refill_per_minute'] / 60.0
+        ident = f'user:{request.user.pk}' if request.user and request.user.is_authenticated else f'ip:{self.get_ident(request)}'
+        key = f'throttle:{self.scope}:{ident}'
+        # Counters outlive several refill periods; a bucket that expires restarts full
+        ttl = max(int(capacity / rate) * 10, 3600)
+        now = self.timer()
+
+        try:
+            spent = self.cache.incr(f'{key}:spent')
+            started = self.cache.get(f'{key}:start')
+        except ValueError:
+            spent, started = None, None
+        if spent is None or started is None:
+            # New (or expired) bucket; the start time is stored last so it never outlives the counter
+            self.cache.set(f'{key}:spent', 1, ttl)
+            self.cache.set(f'{key}:start', now, ttl + 60)
+            spent, started = 1, now
+
+        available = capacity + rate * (now - started) - spent
+        if available < 0:
+            try:
+                self.cache.decr(f'{key}:spent')
+            except ValueError:
+                pass  # The counter expired since the incr; the bucket is still empty for this request
+            self.wait_seconds = -available / rate
+            _count(self.scope, 'throttled')
+            logger.info(f"Throttled {ident} on {self.scope}, retry in {self.wait_seconds:.1f}s")
+            return False
+
+        if available > capacity - 1:
+            # Idle long enough to overflow: move the start so the bucket was full before this request
+            self.cache.set(f'{key}:start', now - (spent - 1) / rate, ttl + 60)
+        _count(self.scope, 'allowed')
+        return True
+
+    def wait(self):
+        return getattr(self, 'wait_seconds', None)
@@ -0,0 +1,102 @@
+import hmac
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.utils.module_loading import import_string
+from django.views.decorators.http import require_GET, require_safe
+from django.views.static import serve
+
+from .metrics import render_latest
+from .storage import IMMUTABLE_CACHE_CONTROL, is_hashed_name
+
+
+# Prometheus scrape endpoint
+@require_GET
+def metrics_view(request):
+    """
+       Serve the metrics in the Prometheus text format. Scrapers must send `METRICS_TOKEN` as
+       `Authorization: Bearer <token>`; without a token the endpoint only exists with `DEBUG` on.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            raise Http404('Metrics are not enabled.')
+    else:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8')):
+            return HttpResponse(status=401)
+    body, content_type = render_latest()
+    return HttpResponse(body, content_type=content_type)
+
+
+def schema_artifact_response(request, artifact, cache_control):
+    """
+       Serve a precompiled schema artifact, gzipped when the client accepts it, with 304s for matching ETags.
+    """
+    if artifact.etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = HttpResponse(artifact.compressed, content_type=artifact.content_type)
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(artifact.content, content_type=artifact.content_type)
+    response['ETag'] = artifact.etag
+    response['Cache-Control'] = cache_control
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+def precompiled_schema_url(schema_format='json'):
+    from .schema import precompiled_schema
+    artifacts = precompiled_schema()
+    if artifacts is None:
+        return None
+    return reverse('schema-artifact', kwargs={'filename': artifacts[schema_format].name})
+
+
+# Content-hashed schema artifact
+@require_GET
+def schema_artifact_view(request, filename):
+    from .schema import precompiled_schema
+    artifacts = precompiled_schema() or {}
+    for artifact in artifacts.values():
+        if artifact.name == filename:
+            # The name changes with the content, so it can be cached for good
+            return schema_artifact_response(request, artifact, IMMUTABLE_CACHE_CONTROL)
+    raise Http404('Unknown schema artifact.')
+
+
+# Uploaded media stored on the local filesystem
+@require_safe
+def media_view(request, path):
+    """
+       Serve media from local storage. Content-hashed files are cached for good, others for `MEDIA_MAX_AGE` seconds.
+       With S3 storage media URLs point at the bucket, so there is nothing to serve here.
+    """
+    if not isinstance(default_storage, FileSystemStorage):
+        raise Http404('Media is not stored locally.')
+    response = serve(request, path, document_root=default_storage.location)
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if is_hashed_name(path) else f'public, max-age={settings.MEDIA_MAX_AGE}'
+    return response
+
+
+
+# Deferred class-based view
+def lazy_view(view_path, **initkwargs):
+    """
+       URLconf entry for a class-based view whose module is imported on its first request instead of at worker boot,
+       for rarely used views with heavy dependencies (e.g. the schema views and drf-spectacular).
+    """
+    loaded = []
+
+    def view(request, *args, **kwargs):
+        if not loaded:
+            loaded.append(import_string(view_path).as_view(**initkwargs))
+        return loaded[0](request, *args, **kwargs)
+
+    view.__name__ = view_path.rsplit('.', 1)[1]
+    view.csrf_exempt = True
+    return view
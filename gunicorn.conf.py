@@ -0,0 +1,33 @@
+import os
+import shutil
+
+# Workers write their metrics to this directory so /metrics can merge them (see core/metrics.py).
+# Set before prometheus_client is imported, it picks its value storage at import time.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/ruralmart_metrics')
+
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def on_starting(server):
+    # Values left over from a previous run would be merged into the new one
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
+
+
+# With GUNICORN_PRELOAD=True the app is loaded once in the master and workers are forked from it: workers boot
+# without importing anything and share the loaded code's memory. Code changes then need a full restart.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'False') == 'True'
+
+
+def pre_fork(server, worker):
+    if server.cfg.preload_app:
+        # Connections opened while loading the app would be shared by every worker
+        from django.core.cache import caches
+        from django.db import connections
+        connections.close_all()
+        caches.close_all()
@@ -1,6 +1,8 @@
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from core.fast_serializers import DecimalString, FastReadSerializer, IsoDateTime
 from .models import Order, OrderItem
-from products.serializers import ProductSerializer
+from products.serializers import FastProductSerializer, ProductSerializer
 
 # OrderItem Serializer (for individual items in an order)
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -70,4 +72,52 @@ class OrderSerializer(serializers.ModelSerializer):
                 
         # Recalculate the total amount for the order after updating the items
         instance.update_total_amount()
-        return instance        
\ No newline at end of file
+        return instance
+
+
+# Fast read-only serializers for the order history, same output as the serializers above
+class FastOrderItemSerializer(FastReadSerializer):
+    fields = (
+        ('id', 'id', None),
+        ('product', 'product_id', None),  # Replaced by the nested product
+        ('quantity', 'quantity', None),
+        ('unit_price', 'unit_price', DecimalString(2)),
+        ('total_price', 'total_price', DecimalString(2)),
+    )
+
+
+class FastOrderSerializer(FastReadSerializer):
+    """
+       Orders come from one query, their items and products from a second and their users from a third,
+       whatever the number of orders.
+    """
+    fields = (
+        ('id', 'id', None),
+        ('user', 'user_id', None),  # Replaced by the user's string representation
+        ('order_date', 'order_date', IsoDateTime()),
+        ('status', 'status', None),
+        ('total_amount', 'total_amount', DecimalString(2)),
+    )
+
+    def represent(self, rows):
+        rows = list(rows)
+        item_serializer = FastOrderItemSerializer(self.context)
+        item_rows = OrderItem.objects.filter(order_id__in=[row['id'] for row in rows]).order_by('id').values(
+            'order_id', *item_serializer.lookups(), *FastProductSerializer.lookups('product__'),
+        ) if rows else []
+        build_item = item_serializer.compile()
+        build_product = FastProductSerializer(self.context).compile('product__')
+        items = {}
+        for row in item_rows:
+            item = build_item(row)
+            item['product'] = build_product(row)
+            items.setdefault(row['order_id'], []).append(item)
+
+        # `user` is the user's string representation, like `StringRelatedField`
+        users = get_user_model().objects.in_bulk({row['user_id'] for row in rows}) if rows else {}
+        orders = super().represent(rows)
+        for order in orders:
+            order['user'] = str(users[order['user']])
+            order['order_items'] = items.get(order['id'], [])
+        return orders
+
@@ -1,3 +1,57 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, APITestCase
+from products.models import Category, Product
+from .models import Order, OrderItem
+from .serializers import FastOrderSerializer, OrderSerializer
+
+User = get_user_model()
+
+
+# Contract tests for the fast order history serializer: it must render exactly what `OrderSerializer` renders
+class FastOrderSerializerContractTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='buyer@gmail.com', phone_number='0700000002', first_name='Jane', last_name='Doe')
+        other = User.objects.create(email='other@gmail.com', phone_number='0700000003', first_name='John', last_name='Doe')
+        category = Category.objects.create(name='Grains')
+        maize = Product.objects.create(name='Maize', description='Dry maize', price=50, category=category)
+        rice = Product.objects.create(name='Rice', description='Brown rice', price='12.5', category=category, image='')
+        # Built with bulk inserts, Order.save and OrderItem.save keep recalculating totals
+        orders = Order.objects.bulk_create([
+            Order(user=self.user, status='pending', total_amount='125'),
+            Order(user=self.user, status='completed', total_amount=0),
+            Order(user=other, status='pending', total_amount='100.00'),
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=orders[0], product=maize, quantity=2, unit_price=50, total_price=100),
+            OrderItem(order=orders[0], product=rice, quantity=2, unit_price='12.5', total_price=25),
+            OrderItem(order=orders[2], product=maize, quantity=2, unit_price=50, total_price=100),
+        ])
+
+    def test_order_parity(self):
+        request = APIRequestFactory().get('/v2/orders/')
+        orders = Order.objects.order_by('id')
+        fast = FastOrderSerializer({'request': request}).represent(orders.values(*FastOrderSerializer.lookups()))
+        expected = OrderSerializer(orders, many=True, context={'request': request}).data
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(expected))
+
+    def test_order_history_parity_and_queries(self):
+        self.client.force_authenticate(user=self.user)
+        # Orders, their items with products and their users, however many orders there are
+        with self.assertNumQueries(3):
+            response = self.client.get('/v2/orders/')
+        orders = Order.objects.filter(user=self.user)
+        expected = OrderSerializer(orders, many=True, context={'request': response.wsgi_request}).data
+        self.assertEqual(response.content, JSONRenderer().render(expected))
+        self.assertEqual(len(response.json()), 2)
+
+    def test_batch_fetch_only_returns_own_orders(self):
+        own = list(Order.objects.filter(user=self.user).order_by('id').values_list('id', flat=True))
+        other = Order.objects.exclude(user=self.user).get().id
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/v2/orders/?ids={own[1]},{other},{own[0]}')
+        self.assertEqual([order['id'] for order in response.data['results']], [own[1], own[0]])
+        self.assertEqual(response.data['missing'], [other])
+        self.assertEqual(response.data['results'][1]['order_items'][0]['product']['name'], 'Maize')
 
-# Create your tests here.
@@ -2,14 +2,17 @@ from rest_framework import viewsets, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import Order, OrderItem
-from .serializers import OrderSerializer, OrderItemSerializer
+from .serializers import OrderSerializer, OrderItemSerializer, FastOrderSerializer
 from django.shortcuts import get_object_or_404
+from core.fast_serializers import FastListMixin
+from core.idempotency import idempotent
 
 
 # Order ViewSet
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(FastListMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    fast_serializer_class = FastOrderSerializer
     permission_classes = [permissions.IsAuthenticated]  # Only authenticated users can access orders
 
     def get_queryset(self):
@@ -18,6 +21,11 @@ class OrderViewSet(viewsets.ModelViewSet):
         """
         return Order.objects.filter(user=self.request.user)
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        """Create an order, replaying the stored response for a retried Idempotency-Key"""
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """Override to set the user for the order"""
         serializer.save(user=self.request.user)
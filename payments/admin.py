@@ -1,6 +1,25 @@
 from django.contrib import admin
-from .models import Payment, PaymentMethod, Transaction
+from .models import Payment, PaymentMethod, Transaction, LedgerEntry, LedgerBalanceSnapshot
 
 admin.site.register(Payment)
 admin.site.register(PaymentMethod)
 admin.site.register(Transaction)
+
+
+# Ledger entries are append-only, so the admin only lists them
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'journal_id', 'account', 'amount', 'entry_type', 'created_at')
+    search_fields = ('account', 'journal_id')
+    list_filter = ('entry_type',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+admin.site.register(LedgerEntry, LedgerEntryAdmin)
+admin.site.register(LedgerBalanceSnapshot)
@@ -0,0 +1,213 @@
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Count, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from orders.models import OrderItem
+
+from .models import LedgerEntry, LedgerBalanceSnapshot
+
+# Ledger account names
+# - gateway:<name>  money held by the payment gateway (debit balance)
+# - customer:<id>   money paid in by a customer, net of refunds and of the vendors' sales it paid for (credit balance)
+# - vendor:<id>     money owed to a vendor for its sales (credit balance), settled by payouts
+
+
+def gateway_account(gateway):
+    return f'gateway:{gateway or "unknown"}'
+
+
+def customer_account(user_id):
+    return f'customer:{user_id}'
+
+
+def vendor_account(user_id):
+    return f'vendor:{user_id}'
+
+
+def post_journal(lines, entry_type, payment=None, transaction=None, memo=''):
+    """
+       Post a balanced journal to the ledger.
+       - `lines` is a list of (account, amount) pairs, debits positive and credits negative.
+       - Raises ValueError if the amounts do not sum to zero.
+    """
+    lines = [(account, Decimal(amount)) for account, amount in lines]
+    if len(lines) < 2 or sum(amount for _, amount in lines) != 0:
+        raise ValueError("A journal needs at least two lines that sum to zero.")
+
+    journal_id = uuid.uuid4()
+    entries = [
+        LedgerEntry(
+            journal_id=journal_id,
+            account=account,
+            amount=amount,
+            entry_type=entry_type,
+            payment=payment,
+            transaction=transaction,
+            memo=memo,
+        )
+        for account, amount in lines
+    ]
+    with db_transaction.atomic():
+        return LedgerEntry.objects.bulk_create(entries)
+
+
+def record_payment(transaction):
+    """
+       Post a completed gateway transaction: the gateway holds the money paid in by the customer.
+       Partial payments post one journal per transaction.
+    """
+    payment = transaction.payment
+    return post_journal(
+        [
+            (gateway_account(payment.payment_gateway), transaction.amount),
+            (customer_account(payment.user_id), -transaction.amount),
+        ],
+        'payment',
+        payment=payment,
+        transaction=transaction,
+        memo=f'Payment {transaction.transaction_id}',
+    )
+
+
+def record_sale(payment):
+    """
+       Post what a fully paid order owes its vendors: the customer's payment is moved to the vendor of
+       each item, to be settled by payouts. Items of products without a vendor stay with the marketplace.
+       Posted once per payment, returns None when there is nothing to post.
+    """
+    if LedgerEntry.objects.filter(payment=payment, entry_type='sale').exists():
+        return None
+    subtotals = (
+        OrderItem.objects.filter(order_id=payment.order_id, product__vendor__isnull=False)
+        .values_list('product__vendor_id').annotate(subtotal=Sum('total_price')).order_by()
+    )
+    lines = [(vendor_account(vendor_id), -subtotal) for vendor_id, subtotal in subtotals if subtotal]
+    if not lines:
+        return None
+    return post_journal(
+        [(customer_account(payment.user_id), -sum(amount for _, amount in lines))] + lines,
+        'sale',
+        payment=payment,
+        memo=f'Sale of order {payment.order_id}',
+    )
+
+
+def record_refund(payment, amount, memo=''):
+    """
+       Post a (partial) refund of a payment back to the customer.
+    """
+    return post_journal(
+        [
+            (customer_account(payment.user_id), amount),
+            (gateway_account(payment.payment_gateway), -amount),
+        ],
+        'refund',
+        payment=payment,
+        memo=memo or f'Refund for payment {payment.id}',
+    )
+
+
+def record_payout(vendor_id, amount, gateway='paystack', memo=''):
+    """
+       Post a payout that settles money owed to a vendor.
+    """
+    return post_journal(
+        [
+            (vendor_account(vendor_id), amount),
+            (gateway_account(gateway), -amount),
+        ],
+        'payout',
+        memo=memo or f'Payout to vendor {vendor_id}',
+    )
+
+
+def _latest_snapshot(account, up_to_entry_id=None):
+    snapshots = LedgerBalanceSnapshot.objects.filter(account=account)
+    if up_to_entry_id is not None:
+        snapshots = snapshots.filter(last_entry_id__lte=up_to_entry_id)
+    return snapshots.order_by('-last_entry_id').first()
+
+
+def account_balance(account, up_to_entry_id=None):
+    """
+       Balance of an account from its latest snapshot plus the entries posted since.
+       Pass `up_to_entry_id` to get the balance as it was after that entry.
+    """
+    snapshot = _latest_snapshot(account, up_to_entry_id)
+    balance = snapshot.balance if snapshot else Decimal('0.00')
+    tail = LedgerEntry.objects.filter(account=account, id__gt=snapshot.last_entry_id if snapshot else 0)
+    if up_to_entry_id is not None:
+        tail = tail.filter(id__lte=up_to_entry_id)
+    return balance + (tail.aggregate(total=Sum('amount'))['total'] or Decimal('0.00'))
+
+
+def account_statement(account, limit=50, before_id=None):
+    """
+       Most recent entries of an account, newest first, each with the running balance after it.
+    """
+    entries = LedgerEntry.objects.filter(account=account)
+    if before_id is not None:
+        entries = entries.filter(id__lt=before_id)
+    entries = list(entries.order_by('-id')[:limit])
+    if not entries:
+        return []
+
+    balance = account_balance(account, up_to_entry_id=entries[0].id)
+    statement = []
+    for entry in entries:
+        statement.append({
+            'id': entry.id,
+            'journal_id': str(entry.journal_id),
+            'entry_type': entry.entry_type,
+            'amount': entry.amount,
+            'balance': balance,
+            'memo': entry.memo,
+            'created_at': entry.created_at,
+        })
+        balance -= entry.amount
+    return statement
+
+
+def snapshot_balances(min_tail=1, settle_seconds=60):
+    """
+       Snapshot the balance of every account with at least `min_tail` entries since its last snapshot.
+       - Only entries older than `settle_seconds` are included, so a journal still being committed
+         with a lower id cannot end up behind a snapshot.
+       - A fixed number of queries however many accounts there are: the tails of all the accounts are
+         summed by one grouped aggregate and the snapshots written by one bulk insert.
+       Returns the number of snapshots written.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+    entries = LedgerEntry.objects.all()
+    first_recent_id = entries.filter(created_at__gte=cutoff).aggregate(first=Min('id'))['first']
+    if first_recent_id is not None:
+        entries = entries.filter(id__lt=first_recent_id)
+
+    latest_entry_id = (
+        LedgerBalanceSnapshot.objects.filter(account=OuterRef('account'))
+        .order_by('-last_entry_id').values('last_entry_id')[:1]
+    )
+    latest = {
+        snapshot.account: snapshot
+        for snapshot in LedgerBalanceSnapshot.objects.filter(last_entry_id=Subquery(latest_entry_id))
+    }
+    tails = (
+        entries.filter(id__gt=Coalesce(Subquery(latest_entry_id), Value(0)))
+        .values('account')
+        .annotate(total=Sum('amount'), count=Count('id'), last=Max('id'))
+        .filter(count__gte=min_tail)
+        .order_by()
+    )
+    snapshots = [
+        LedgerBalanceSnapshot(
+            account=tail['account'],
+            balance=(latest[tail['account']].balance if tail['account'] in latest else Decimal('0.00')) + tail['total'],
+            last_entry_id=tail['last'],
+        )
+        for tail in tails
+    ]
+    return len(LedgerBalanceSnapshot.objects.bulk_create(snapshots))
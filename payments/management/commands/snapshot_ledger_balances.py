@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from payments.ledger import snapshot_balances
+
+
+class Command(BaseCommand):
+    help = 'Snapshot ledger account balances so balance queries only sum a short tail of entries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-tail', type=int, default=1, help='Only snapshot accounts with at least this many new entries.')
+        parser.add_argument('--settle-seconds', type=int, default=60, help='Ignore entries younger than this many seconds.')
+
+    def handle(self, *args, **options):
+        written = snapshot_balances(min_tail=options['min_tail'], settle_seconds=options['settle_seconds'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} balance snapshots.'))
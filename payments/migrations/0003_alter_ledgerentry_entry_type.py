@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_ledgerbalancesnapshot_ledgerentry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='entry_type',
+            field=models.CharField(choices=[('payment', 'Payment'), ('sale', 'Sale'), ('refund', 'Refund'), ('payout', 'Payout'), ('adjustment', 'Adjustment')], max_length=20),
+        ),
+    ]
@@ -58,3 +58,63 @@ class Transaction(models.Model):
     
     def __str__(self):
         return f"Transaction {self.transaction_id} for Payment {self.payment.id}"    
+
+
+# Ledger entry model, one line of a balanced journal posting
+class LedgerEntry(models.Model):
+    """
+       Append-only double-entry ledger line.
+       - Positive amounts debit the account, negative amounts credit it.
+       - The lines sharing a `journal_id` always sum to zero.
+       - Rows are never updated or deleted; corrections are posted as new journals.
+    """
+    ENTRY_TYPES = [
+        ('payment', 'Payment'),
+        ('sale', 'Sale'),
+        ('refund', 'Refund'),
+        ('payout', 'Payout'),
+        ('adjustment', 'Adjustment'),
+    ]
+    journal_id = models.UUIDField(db_index=True)
+    account = models.CharField(max_length=100)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    entry_type = models.CharField(max_length=20, choices=ENTRY_TYPES)
+    payment = models.ForeignKey(Payment, on_delete=models.PROTECT, null=True, blank=True, related_name='ledger_entries')
+    transaction = models.ForeignKey(Transaction, on_delete=models.PROTECT, null=True, blank=True, related_name='ledger_entries')
+    memo = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['account', 'id'], name='ledger_account_id_idx'),
+        ]  # Balance tails and statements read one account in id order
+
+    def __str__(self):
+        return f"{self.account} {self.amount} ({self.entry_type})"
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            raise ValueError("Ledger entries are append-only and cannot be updated.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Ledger entries are append-only and cannot be deleted.")
+
+
+# Ledger balance snapshot model
+class LedgerBalanceSnapshot(models.Model):
+    """
+       Balance of an account including every entry up to `last_entry_id`.
+    """
+    account = models.CharField(max_length=100)
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+    last_entry_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['account', '-last_entry_id'], name='ledger_snapshot_latest_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.account} balance {self.balance} at entry {self.last_entry_id}"
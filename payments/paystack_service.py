@@ -1,28 +1,163 @@
-from paystackapi.paystack import Paystack
+import asyncio
+import functools
+import hashlib
+import hmac
+import threading
+import time
+import zlib
+
 from django.conf import settings
+from django.core.cache import cache
+from core.metrics import record_cache_lookup, time_paystack
+
+# The Paystack SDK and the HTTP clients (requests, httpx) are imported on first use rather than at worker boot
+
+
+# Webhook signature check
+def verify_webhook_signature(body, signature):
+    """
+       Paystack signs webhook bodies with an HMAC-SHA512 of the secret key, sent as `X-Paystack-Signature`.
+    """
+    if not settings.PAYSTACK_SECRET_KEY or not signature:
+        return False
+    expected = hmac.new(settings.PAYSTACK_SECRET_KEY.encode('utf-8'), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+# Paystack API client with the secret key, built on first use
+@functools.cache
+def get_paystack_api():
+    from paystackapi.paystack import Paystack
+    return Paystack(secret_key=settings.PAYSTACK_SECRET_KEY)
+
+
+# Paystack transaction statuses that never change; the others (ongoing, pending, abandoned...) may still succeed
+FINAL_STATUSES = ('success', 'failed', 'reversed')
+
+
+def verification_status(verification):
+    return (verification.get('data') or {}).get('status')
 
-# Initialize Paystack API with the secret key
-paystack_api = Paystack(secret_key=settings.PAYSTACK_SECRET_KEY)
 
 # Verify payment
 def verify_payment(transaction_reference):
+    from requests import RequestException
     try:
         # Call Paystack to verify the payment status
-        verification = paystack_api.transaction.verify(transaction_reference)
+        with time_paystack('verify') as call:
+            verification = get_paystack_api().transaction.verify(transaction_reference)
+            if not verification.get('status'):
+                call['outcome'] = 'error'
         return verification
-    except Paystack.exceptions.PaystackError as e:
+    except RequestException as e:
         return {"error": str(e)}
 
 
 # Initialize payment
 def initialize_payment(email, amount, order_id):
+    from requests import RequestException
     try:
         # Call Paystack to create a payment
-        payment = paystack_api.transaction.initialize(
-            email=email,
-            amount=amount * 100,
-            order_id=order_id
+        with time_paystack('initialize') as call:
+            payment = get_paystack_api().transaction.initialize(
+                email=email,
+                amount=amount * 100,
+                order_id=order_id
+            )
+            if not payment.get('status'):
+                call['outcome'] = 'error'
+        return payment
+    except RequestException as e:
+        return {"error": str(e)}
+
+
+# Async HTTP clients, one per event loop: under ASGI that is one pooled client per worker,
+# under WSGI every async view runs on a short-lived loop and the clients of closed loops are dropped
+_async_clients = {}
+
+
+def _async_client():
+    import httpx
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        for closed in [other for other in _async_clients if other.is_closed()]:
+            del _async_clients[closed]
+        client = _async_clients[loop] = httpx.AsyncClient(
+            base_url=settings.PAYSTACK_API_URL,
+            headers={'Authorization': f'Bearer {settings.PAYSTACK_SECRET_KEY}'},
+            timeout=settings.PAYSTACK_TIMEOUT,
         )
+    return client
+
+
+# Initialize payment without blocking the event loop
+async def ainitialize_payment(email, amount, order_id):
+    """
+       Async version of `initialize_payment` for the async views.
+       Paystack amounts are in the lowest currency unit; failed calls and `status: false` replies return `{'error': ...}`.
+    """
+    import httpx
+    try:
+        with time_paystack('initialize') as call:
+            response = await _async_client().post('/transaction/initialize', json={
+                'email': email,
+                'amount': int(amount * 100),
+                'order_id': order_id,
+            })
+            payment = response.json()
+            if not payment.get('status'):
+                call['outcome'] = 'error'
+                return {'error': payment.get('message', 'Payment initialization failed.')}
         return payment
-    except Paystack.exceptions.PaystackError as e:
-        return {"error": str(e)}        
\ No newline at end of file
+    except (httpx.HTTPError, ValueError) as e:
+        return {"error": str(e)}
+
+
+# Striped locks so concurrent verifications of one reference in a worker share a single upstream call
+_verify_locks = [threading.Lock() for _ in range(64)]
+
+
+def _verify_lock(transaction_reference):
+    return _verify_locks[zlib.crc32(transaction_reference.encode('utf-8')) % len(_verify_locks)]
+
+
+# Verify payment through the short-lived verification cache
+def verify_payment_cached(transaction_reference):
+    """
+       Verify a payment, reusing a recent upstream response for the same reference.
+       - Final verifications (see `FINAL_STATUSES`) are cached for `PAYSTACK_VERIFY_CACHE_TTL` seconds,
+         errors and payments still in progress are not.
+       - Concurrent calls for one reference are coalesced: threads of a worker wait on a lock,
+         other workers wait briefly for the first caller's result through the cache.
+    """
+    cache_key = f'paystack:verify:{transaction_reference}'
+    verification = cache.get(cache_key)
+    record_cache_lookup('paystack_verify', verification is not None)
+    if verification is not None:
+        return verification
+
+    with _verify_lock(transaction_reference):
+        verification = cache.get(cache_key)
+        if verification is not None:
+            return verification
+
+        lock_key = f'{cache_key}:lock'
+        owns_lock = cache.add(lock_key, 1, timeout=settings.PAYSTACK_VERIFY_LOCK_TIMEOUT)
+        if not owns_lock:
+            # Another worker is verifying this reference, wait for its result before calling upstream
+            deadline = time.monotonic() + settings.PAYSTACK_VERIFY_LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                verification = cache.get(cache_key)
+                if verification is not None:
+                    return verification
+
+        try:
+            verification = verify_payment(transaction_reference)
+            if 'error' not in verification and verification_status(verification) in FINAL_STATUSES:
+                cache.set(cache_key, verification, settings.PAYSTACK_VERIFY_CACHE_TTL)
+            return verification
+        finally:
+            if owns_lock:
+                cache.delete(lock_key)
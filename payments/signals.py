@@ -0,0 +1,31 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Transaction
+from django.db.models import Sum
+from .ledger import record_payment, record_sale
+import logging
+
+# For handling error reporting
+logger = logging.getLogger(__name__)
+
+# Signal to post completed transactions to the ledger
+@receiver(post_save, sender=Transaction)
+def post_transaction_to_ledger(sender, instance, created, **kwargs):
+    """
+    This function is triggered after a Transaction instance is saved.
+    A newly created completed transaction is posted to the ledger as a payment journal, and once the
+    payment is fully paid, what the order owes its vendors is posted as a sale journal.
+
+    Args:
+        sender: The model class that sent the signal (Transaction).
+        instance: The transaction that was saved.
+        created: A boolean indicating whether the instance was created (True) or updated (False).
+    """
+    if created and instance.status == 'completed':
+        record_payment(instance)
+        payment = instance.payment
+        paid = instance.amount
+        if paid < payment.amount:  # A partial payment, add up all of them
+            paid = payment.transactions.filter(status='completed').aggregate(total=Sum('amount'))['total']
+        if paid >= payment.amount:
+            record_sale(payment)
@@ -0,0 +1,49 @@
+from core.tasks import task
+from .models import Payment, Transaction
+from .paystack_service import FINAL_STATUSES, verification_status, verify_payment_cached
+
+
+def record_verification(payment, transaction_reference, verification):
+    """
+       Apply a Paystack verification to a payment: a successful one completes the payment and records its
+       transaction (which posts it to the ledger), a final failure fails the payment, and a payment still in
+       progress upstream stays pending so it can be verified again.
+       Returns the transaction, or None when the payment did not succeed.
+    """
+    verified_status = verification_status(verification)
+    if verified_status != 'success':
+        if verified_status in FINAL_STATUSES:
+            payment.status = 'failed'
+            payment.save()
+        return None
+
+    payment.status = 'completed'
+    payment.save()
+    # A concurrent verification may already have recorded the transaction
+    transaction, created = Transaction.objects.get_or_create(
+        payment=payment,
+        transaction_id=transaction_reference,
+        defaults={
+            'amount': payment.amount,
+            'status': 'completed',
+            'payment_gateway_response': verification,
+        }
+    )
+    return transaction
+
+
+@task(queue='payments', max_attempts=8, retry_delay=60)
+def reconcile_payment(transaction_reference):
+    """
+       Confirm a payment reported successful by the Paystack webhook with Paystack itself, and record it,
+       so it is settled even if the buyer never comes back to verify it. Paystack errors are retried with backoff.
+    """
+    payment = Payment.objects.filter(transaction_reference=transaction_reference).first()
+    if payment is None or Transaction.objects.filter(transaction_id=transaction_reference).exists():
+        return
+    verification = verify_payment_cached(transaction_reference)
+    if 'error' in verification:
+        raise RuntimeError(f"Paystack verification of {transaction_reference} failed: {verification['error']}")
+    if verification_status(verification) not in FINAL_STATUSES:
+        raise RuntimeError(f"Paystack has not settled {transaction_reference} yet: {verification_status(verification)}")
+    record_verification(payment, transaction_reference, verification)
@@ -1,3 +1,347 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+import threading
+import time
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from asgiref.sync import async_to_sync
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from core.models import Job
+from core.tasks import claim_jobs, run_jobs
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+from .models import Payment, PaymentMethod, Transaction, LedgerEntry, LedgerBalanceSnapshot
+from .paystack_service import ainitialize_payment, verify_payment_cached
+from .ledger import account_balance, account_statement, customer_account, gateway_account, record_refund, snapshot_balances, vendor_account
+
+User = get_user_model()
+
+SUCCESS_RESPONSE = {'status': True, 'data': {'status': 'success', 'reference': 'ref-1'}}
+ONGOING_RESPONSE = {'status': True, 'data': {'status': 'ongoing', 'reference': 'ref-1'}}
+
+
+# Test cases for the cached Paystack verification
+class VerifyPaymentCachedTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    @mock.patch('payments.paystack_service.verify_payment')
+    def test_successful_verification_is_cached(self, verify_payment):
+        verify_payment.return_value = SUCCESS_RESPONSE
+        self.assertEqual(verify_payment_cached('ref-1'), SUCCESS_RESPONSE)
+        self.assertEqual(verify_payment_cached('ref-1'), SUCCESS_RESPONSE)
+        self.assertEqual(verify_payment.call_count, 1)
+
+    @mock.patch('payments.paystack_service.verify_payment')
+    def test_errors_are_not_cached(self, verify_payment):
+        verify_payment.return_value = {'error': 'Gateway timeout'}
+        verify_payment_cached('ref-1')
+        verify_payment_cached('ref-1')
+        self.assertEqual(verify_payment.call_count, 2)
+
+    @mock.patch('payments.paystack_service.verify_payment')
+    def test_payments_in_progress_are_not_cached(self, verify_payment):
+        verify_payment.return_value = ONGOING_RESPONSE
+        verify_payment_cached('ref-1')
+        verify_payment_cached('ref-1')
+        self.assertEqual(verify_payment.call_count, 2)
+
+    @mock.patch('payments.paystack_service.verify_payment')
+    def test_concurrent_verifications_share_one_upstream_call(self, verify_payment):
+        def slow_verify(reference):
+            time.sleep(0.2)
+            return SUCCESS_RESPONSE
+        verify_payment.side_effect = slow_verify
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(verify_payment_cached('ref-1'))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [SUCCESS_RESPONSE] * 5)
+        self.assertEqual(verify_payment.call_count, 1)
+
+
+# Test cases for the process payment view
+class ProcessPaymentViewTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            first_name='John',
+            last_name='Doe',
+            email='johndoe@gmail.com',
+            phone_number='1234567890',
+            password='Password@123'
+        )
+        self.client.force_authenticate(user=self.user)
+        order = Order.objects.create(user=self.user)
+        self.payment = Payment.objects.create(
+            user=self.user,
+            order=order,
+            amount=100,
+            payment_method=PaymentMethod.objects.create(name='Visa'),
+            transaction_reference='ref-1',
+            payment_gateway='paystack'
+        )
+        self.data = {'payment_id': self.payment.id, 'transaction_reference': 'ref-1'}
+
+    @mock.patch('payments.paystack_service.verify_payment')
+    def test_recorded_transaction_skips_paystack(self, verify_payment):
+        verify_payment.return_value = SUCCESS_RESPONSE
+        first = self.client.post('/v3/process-payment/', self.data, format='json')
+        cache.clear()
+        second = self.client.post('/v3/process-payment/', self.data, format='json')
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data['transaction_id'], 'ref-1')
+        self.assertEqual(verify_payment.call_count, 1)
+        self.assertEqual(Transaction.objects.filter(transaction_id='ref-1').count(), 1)
+
+    @mock.patch('payments.paystack_service.verify_payment')
+    def test_payment_in_progress_is_verified_again(self, verify_payment):
+        verify_payment.return_value = ONGOING_RESPONSE
+        response = self.client.post('/v3/process-payment/', self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'pending')
+
+        verify_payment.return_value = SUCCESS_RESPONSE
+        response = self.client.post('/v3/process-payment/', self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(verify_payment.call_count, 2)
+
+    @mock.patch('payments.paystack_service.verify_payment')
+    def test_reference_of_another_payment_is_rejected(self, verify_payment):
+        other = User.objects.create_user(email='janedoe@gmail.com', phone_number='0987654321', password='Password@123')
+        other_payment = Payment.objects.create(
+            user=other, order=Order.objects.create(user=other), amount=100,
+            payment_method=self.payment.payment_method, transaction_reference='ref-2', payment_gateway='paystack',
+        )
+        Transaction.objects.create(payment=other_payment, transaction_id='ref-2', amount=100, status='completed')
+        response = self.client.post('/v3/process-payment/', {**self.data, 'transaction_reference': 'ref-2'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('transaction_id', response.data)
+        verify_payment.assert_not_called()
+
+    @mock.patch('payments.paystack_service.verify_payment')
+    def test_failed_payment_skips_paystack(self, verify_payment):
+        Payment.objects.filter(pk=self.payment.pk).update(status='failed')
+        response = self.client.post('/v3/process-payment/', self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        verify_payment.assert_not_called()
+
+
+# Test cases for the Paystack webhook, which leaves the verification to the background worker
+@override_settings(PAYSTACK_SECRET_KEY='webhook-secret')
+class PaystackWebhookTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create(first_name='John', last_name='Doe', email='johndoe@gmail.com', phone_number='1234567890')
+        self.payment = Payment.objects.create(
+            user=user, order=Order.objects.create(user=user), amount=100,
+            payment_method=PaymentMethod.objects.create(name='Visa'), transaction_reference='ref-1', payment_gateway='paystack',
+        )
+
+    def notify(self, payment_status, secret='webhook-secret'):
+        body = json.dumps({'event': 'charge.success', 'data': {'reference': 'ref-1', 'status': payment_status}}).encode('utf-8')
+        signature = hmac.new(secret.encode('utf-8'), body, hashlib.sha512).hexdigest()
+        return self.client.post('/v3/paystack-webhook/', body, content_type='application/json', HTTP_X_PAYSTACK_SIGNATURE=signature)
+
+    def run_queue(self):
+        run_jobs(claim_jobs('test-worker'))
+
+    @mock.patch('payments.paystack_service.verify_payment')
+    def test_successful_payments_are_verified_and_recorded_by_the_worker(self, verify_payment):
+        verify_payment.return_value = SUCCESS_RESPONSE
+        self.assertEqual(self.notify('success').status_code, status.HTTP_200_OK)
+        verify_payment.assert_not_called()
+        self.assertEqual(Job.objects.get().task, 'payments.tasks.reconcile_payment')
+
+        self.run_queue()
+        self.assertTrue(Transaction.objects.filter(transaction_id='ref-1', payment=self.payment).exists())
+        self.assertFalse(Job.objects.exists())
+
+    @mock.patch('payments.paystack_service.verify_payment')
+    def test_paystack_errors_are_retried(self, verify_payment):
+        verify_payment.return_value = {'error': 'Paystack is unavailable'}
+        self.notify('success')
+        with self.assertLogs('core.tasks', 'WARNING'):
+            self.run_queue()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('Paystack is unavailable', job.last_error)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_failed_payments_are_not_queued(self):
+        self.notify('failed')
+        self.assertFalse(Job.objects.exists())
+
+    def test_unsigned_notifications_are_rejected(self):
+        response = self.notify('success', secret='wrong-secret')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'pending')
+        self.assertFalse(Job.objects.exists())
+
+
+# Test cases for the async payment views
+class AsyncPaymentViewsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='johndoe@gmail.com', phone_number='1234567890', password='Password@123')
+        self.client.force_authenticate(user=self.user)
+        self.order = Order.objects.create(user=self.user)
+        self.payment_method = PaymentMethod.objects.create(name='Visa')
+
+    @mock.patch('payments.views.ainitialize_payment', new_callable=mock.AsyncMock)
+    def test_create_payment(self, initialize_payment):
+        initialize_payment.return_value = {'status': True, 'data': {'reference': 'ref-2', 'authorization_url': 'https://checkout.paystack.com/ref-2'}}
+        data = {'order_id': self.order.id, 'payment_method_id': self.payment_method.id}
+        response = self.client.post('/v3/create-payment/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['transaction_reference'], 'ref-2')
+        initialize_payment.assert_awaited_once_with(self.user.email, self.order.total_amount, self.order.id)
+        self.assertTrue(Payment.objects.filter(order=self.order, transaction_reference='ref-2').exists())
+
+    def test_payment_status_is_only_visible_to_its_owner(self):
+        payment = Payment.objects.create(
+            user=self.user, order=self.order, amount=100, payment_method=self.payment_method,
+            transaction_reference='ref-3', payment_gateway='paystack',
+        )
+        response = self.client.get(f'/v3/payment-status/{payment.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['payment_method']['name'], 'Visa')
+
+        other = User.objects.create_user(email='janedoe@gmail.com', phone_number='0987654321', password='Password@123')
+        self.client.force_authenticate(user=other)
+        response = self.client.get(f'/v3/payment-status/{payment.id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rejected_initialization_returns_an_error(self):
+        def paystack(request):
+            return httpx.Response(400, json={'status': False, 'message': 'Invalid email'})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(paystack), base_url='https://api.paystack.co')
+        with mock.patch('payments.paystack_service._async_client', return_value=client):
+            payment = async_to_sync(ainitialize_payment)('not-an-email', Decimal('10.00'), 1)
+        self.assertEqual(payment, {'error': 'Invalid email'})
+
+
+# Test cases for the payment ledger
+class LedgerTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name='John',
+            last_name='Doe',
+            email='johndoe@gmail.com',
+            phone_number='1234567890',
+            password='Password@123'
+        )
+        self.payment = Payment.objects.create(
+            user=self.user,
+            order=Order.objects.create(user=self.user),
+            amount=100,
+            payment_method=PaymentMethod.objects.create(name='Visa'),
+            payment_gateway='paystack'
+        )
+        self.customer = customer_account(self.user.id)
+        self.gateway = gateway_account('paystack')
+
+    def pay(self, reference, amount):
+        return Transaction.objects.create(payment=self.payment, transaction_id=reference, amount=amount, status='completed')
+
+    def test_completed_transactions_post_balanced_journals(self):
+        self.pay('ref-1', Decimal('60.00'))
+        self.pay('ref-2', Decimal('40.00'))
+        Transaction.objects.create(payment=self.payment, transaction_id='ref-3', amount=10, status='failed')
+
+        self.assertEqual(LedgerEntry.objects.count(), 4)
+        self.assertEqual(sum(entry.amount for entry in LedgerEntry.objects.all()), 0)
+        self.assertEqual(account_balance(self.gateway), Decimal('100.00'))
+        self.assertEqual(account_balance(self.customer), Decimal('-100.00'))
+
+    def test_balance_reads_snapshot_plus_tail(self):
+        self.pay('ref-1', Decimal('60.00'))
+        self.assertEqual(snapshot_balances(settle_seconds=0), 2)
+        record_refund(self.payment, Decimal('25.00'))
+
+        snapshot = LedgerBalanceSnapshot.objects.get(account=self.gateway)
+        self.assertEqual(snapshot.balance, Decimal('60.00'))
+        self.assertEqual(account_balance(self.gateway), Decimal('35.00'))
+        self.assertEqual(snapshot_balances(settle_seconds=0), 2)
+        self.assertEqual(account_balance(self.gateway), Decimal('35.00'))
+
+    def test_snapshots_take_a_fixed_number_of_queries(self):
+        self.pay('ref-1', Decimal('60.00'))
+        snapshot_balances(settle_seconds=0)
+        record_refund(self.payment, Decimal('25.00'))
+        record_refund(self.payment, Decimal('5.00'), memo='Second refund')
+        with self.assertNumQueries(4):
+            self.assertEqual(snapshot_balances(settle_seconds=0), 2)
+        self.assertEqual(
+            {snapshot.account: snapshot.balance for snapshot in LedgerBalanceSnapshot.objects.order_by('last_entry_id')},
+            {self.gateway: Decimal('30.00'), self.customer: Decimal('-30.00')},
+        )
+
+    def test_paid_order_credits_its_vendors(self):
+        vendor = User.objects.create(email='vendor@gmail.com', phone_number='0700000009', roles='vendor')
+        category = Category.objects.create(name='Grains')
+        OrderItem.objects.bulk_create([
+            OrderItem(order=self.payment.order, product=Product.objects.create(name='Maize', description='Dry maize', price=30, category=category, vendor=vendor), quantity=2, unit_price=30, total_price=60),
+            OrderItem(order=self.payment.order, product=Product.objects.create(name='Beans', description='Dry beans', price=40, category=category), quantity=1, unit_price=40, total_price=40),
+        ])
+        self.pay('ref-1', Decimal('60.00'))
+        self.assertEqual(account_balance(vendor_account(vendor.id)), Decimal('0.00'))  # Not fully paid yet
+
+        self.pay('ref-2', Decimal('40.00'))
+        self.assertEqual(account_balance(vendor_account(vendor.id)), Decimal('-60.00'))
+        self.assertEqual(account_balance(self.customer), Decimal('-40.00'))
+        self.assertEqual(sum(entry.amount for entry in LedgerEntry.objects.all()), 0)
+
+    def test_statement_running_balances(self):
+        self.pay('ref-1', Decimal('60.00'))
+        snapshot_balances(settle_seconds=0)
+        self.pay('ref-2', Decimal('40.00'))
+        record_refund(self.payment, Decimal('25.00'))
+
+        statement = account_statement(self.gateway)
+        self.assertEqual([line['balance'] for line in statement], [Decimal('75.00'), Decimal('100.00'), Decimal('60.00')])
+        older = account_statement(self.gateway, before_id=statement[0]['id'], limit=1)
+        self.assertEqual(older[0]['balance'], Decimal('100.00'))
+
+    def test_entries_are_append_only(self):
+        self.pay('ref-1', Decimal('60.00'))
+        entry = LedgerEntry.objects.first()
+        entry.amount = 1
+        with self.assertRaises(ValueError):
+            entry.save()
+        with self.assertRaises(ValueError):
+            entry.delete()
+
+    def test_ledger_account_view_is_admin_only(self):
+        self.pay('ref-1', Decimal('60.00'))
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(f'/v3/ledger/{self.gateway}/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(f'/v3/ledger/{self.gateway}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['balance'], Decimal('60.00'))
+        self.assertEqual(len(response.data['entries']), 1)
+        response = self.client.get(f'/v3/ledger/{self.gateway}/?limit=-5')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['entries']), 1)
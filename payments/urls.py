@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import CreatePaymentView, ProcessPaymentView, PaymentStatusView
+from .views import CreatePaymentView, ProcessPaymentView, PaymentStatusView, PayStackWebhookView, LedgerAccountView
 
 urlpatterns = [
     # Payment method urls
@@ -8,4 +8,8 @@ urlpatterns = [
     path('create-payment/', CreatePaymentView.as_view(), name='create-payment'),
     path('process-payment/', ProcessPaymentView.as_view(), name='process-payment'),
     path('payment-status/<int:payment_id>/', PaymentStatusView.as_view(), name='payment-status'),
+    path('paystack-webhook/', PayStackWebhookView.as_view(), name='paystack-webhook'),
+    
+    # Ledger URLs
+    path('ledger/<str:account>/', LedgerAccountView.as_view(), name='ledger-account'),
 ]
@@ -1,17 +1,29 @@
+from adrf.views import APIView as AsyncAPIView
 from rest_framework import status
+from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from .models import Payment, Transaction, PaymentMethod
 from .serializers import PaymentSerializer, TransactionSerializer, PaymentMethodSerializer
 from orders.models import Order
-from .paystack_service import initialize_payment
-from .paystack_service import verify_payment
+from .paystack_service import ainitialize_payment
+from .paystack_service import verify_payment_cached, verify_webhook_signature
+from .tasks import reconcile_payment, record_verification
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from core.idempotency import idempotent
+from accounts.permissions import IsAdminUser
+from .ledger import account_balance, account_statement
 
 # Create payment view
-class CreatePaymentView(APIView):
-    def post(self, request, *args, **kwargs):
+class CreatePaymentView(AsyncAPIView):
+    """
+       Async view: the Paystack call is awaited, so under ASGI a worker keeps serving other requests meanwhile.
+    """
+    throttle_scope = 'payment'
+    
+    @idempotent
+    async def post(self, request, *args, **kwargs):
         # Check if the user is authenticated
         if not request.user.is_authenticated:
             return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
@@ -25,18 +37,18 @@ class CreatePaymentView(APIView):
            return Response({'error': 'order_id and payment_method_id are required.'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            order = Order.objects.get(id=order_id, user=user)
-            payment_method = PaymentMethod.objects.get(id=payment_method_id)
+            order = await Order.objects.aget(id=order_id, user=user)
+            payment_method = await PaymentMethod.objects.aget(id=payment_method_id)
             
             # Initialize payment with Paystack
             try:
-                payment = initialize_payment(order.total_amount, user.email, order_id)
+                payment = await ainitialize_payment(user.email, order.total_amount, order_id)
                 if 'error' in payment:
                     return Response({'error': payment['error']}, status=status.HTTP_400_BAD_REQUEST)
             except Exception as e:
                 return Response({'error': f'Payment initialization failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)    
             
-            payment_record = Payment.objects.create(
+            payment_record = await Payment.objects.acreate(
                 user=user,
                 order=order,
                 amount=order.total_amount,
@@ -65,48 +77,55 @@ class ProcessPaymentView(APIView):
         payment_id = data.get('payment_id')
         transaction_reference = data.get('transaction_reference')
         
+        if not payment_id or not transaction_reference:
+            return Response({'error': 'payment_id and transaction_reference are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        
         try:
             payment = Payment.objects.get(id=payment_id, user=request.user)
             
+            # Only the payment's own reference, another one may be a payment made by someone else
+            if transaction_reference != payment.transaction_reference:
+                return Response({'error': 'transaction_reference does not match the payment.'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            # A recorded transaction is final, return it without asking Paystack again
+            transaction = Transaction.objects.filter(
+                payment=payment, transaction_id=transaction_reference
+            ).select_related('payment__payment_method').first()
+            if transaction:
+                transaction_serializer = TransactionSerializer(transaction)
+                return Response(transaction_serializer.data, status=status.HTTP_200_OK)
+            
+            # Failed (as reported by Paystack, see `record_verification`) and cancelled payments are terminal as well
+            if payment.status in ('failed', 'cancelled'):
+                return Response({'error': 'Payment verification failed.'}, status=status.HTTP_400_BAD_REQUEST)
+            
             # Verify the payment with Paystack
-            verification_response = verify_payment(transaction_reference)
+            verification_response = verify_payment_cached(transaction_reference)
             
             if 'error' in verification_response:
                 return Response({'error': verification_response['error']}, status=status.HTTP_400_BAD_REQUEST)
             
-               # If payment is successful
-            if verification_response['data']['status'] == 'success':
-                # Update the payment status
-                payment.status = 'completed'
-                payment.save()
-            
-                # Create a transaction record
-                transaction = Transaction.objects.create(
-                    payment=payment,
-                    transaction_id=transaction_reference,
-                    amount=payment.amount,
-                    status='completed',
-                    payment_gateway_response=verification_response
-                )
-            
-                # Serialize and return the transaction response
-                transaction_serializer = TransactionSerializer(transaction)
-                return Response(transaction_serializer.data, status=status.HTTP_200_OK)
-            else:
-                payment.status = 'failed'
-                payment.save()
+            transaction = record_verification(payment, transaction_reference, verification_response)
+            if transaction is None and payment.status == 'failed':
                 return Response({'error': 'Payment verification failed.'}, status=status.HTTP_400_BAD_REQUEST)
+            if transaction is None:
+                return Response({'error': 'Payment is not complete yet, try again later.'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Serialize and return the transaction response
+            transaction_serializer = TransactionSerializer(transaction)
+            return Response(transaction_serializer.data, status=status.HTTP_200_OK)
         except Payment.DoesNotExist:
             return Response({'error': 'Payment not found.'}, status=status.HTTP_404_NOT_FOUND) 
 
 
 # Payment status view
-class PaymentStatusView(APIView):
-    def get(self, request, *args, **kwargs):
+class PaymentStatusView(AsyncAPIView):
+    async def get(self, request, *args, **kwargs):
         payment_id = kwargs.get('payment_id')
         
         try:
-            payment = Payment.objects.get(id=payment_id, user=request.user)
+            # The payment method is nested in the response, lazy loading it is not allowed in async code
+            payment = await Payment.objects.select_related('payment_method').aget(id=payment_id, user=request.user)
             payment_serializer = PaymentSerializer(payment)
             return Response(payment_serializer.data, status=status.HTTP_200_OK)
         except Payment.DoesNotExist:
@@ -115,7 +134,14 @@ class PaymentStatusView(APIView):
 # Webhook for Paystack to notify your server of payment events
 @method_decorator(csrf_exempt, name='dispatch')
 class PayStackWebhookView(APIView):
+    # Paystack does not authenticate as a user, requests are checked against its signature instead
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
     def post(self, request, *args, **kwargs):
+        if not verify_webhook_signature(request.body, request.headers.get('X-Paystack-Signature')):
+            return Response({'error': 'Invalid signature.'}, status=status.HTTP_401_UNAUTHORIZED)
+
         # Extract relevant data from the request payload
         payment_reference = request.data.get('data', {}).get('reference')
         payment_status = request.data.get('data', {}).get('status')
@@ -137,6 +163,10 @@ class PayStackWebhookView(APIView):
             
             payment.save()
             
+            # Confirming the payment with Paystack and recording it is left to the worker, so Paystack gets a quick reply
+            if payment_status == 'success':
+                reconcile_payment.enqueue(transaction_reference=payment_reference)
+            
             return Response({'message': 'Payment status updated successfully.'}, status=status.HTTP_200_OK)
         except Payment.DoesNotExist:
             return Response({'error': 'Payment not found.'}, status=status.HTTP_404_NOT_FOUND) 
@@ -163,4 +193,29 @@ class PaymentMethodView(APIView):
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)                    
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+# Ledger account view
+class LedgerAccountView(APIView):
+    """
+       Balance and statement of a ledger account, for admin users only.
+       - `before` pages back through older entries, `limit` caps the page size (max 200).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        account = kwargs.get('account')
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 50)), 200))
+            before = request.query_params.get('before')
+            before = int(before) if before else None
+        except ValueError:
+            return Response({'error': 'limit and before must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'account': account,
+            'balance': account_balance(account),
+            'entries': account_statement(account, limit=limit, before_id=before),
+        }, status=status.HTTP_200_OK)
+
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:05
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Sum
+
+
+def backfill_ratings(apps, schema_editor):
+    """
+       Set the ratings of every reviewed product from its reviews, like `refresh_product_ratings`: review writes
+       only apply changes to the stored count, total and average, which must start out right.
+    """
+    Product = apps.get_model('products', 'Product')
+    Review = apps.get_model('reviews', 'Review')
+    rows = Review.objects.values('product_id').annotate(average=Avg('rating'), count=Count('id'), total=Sum('rating')).order_by()
+    products = [
+        Product(
+            id=row['product_id'],
+            rating_average=Decimal(str(row['average'])).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            rating_count=row['count'],
+            rating_total=row['total'],
+        )
+        for row in rows.iterator()
+    ]
+    Product.objects.bulk_update(products, ['rating_average', 'rating_count', 'rating_total'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_rating_average_product_rating_count'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_total',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -25,6 +25,10 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, db_index=True)
     image = models.ImageField(upload_to='product_images/', blank=True, null=True, default='product_images/default.jpg')
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products')
+    vendor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='products') # Credited in the ledger when the product is paid for
+    rating_average = models.DecimalField(max_digits=3, decimal_places=2, default=0, editable=False) # Maintained from reviews
+    rating_count = models.PositiveIntegerField(default=0, editable=False) # Number of reviews
+    rating_total = models.PositiveIntegerField(default=0, editable=False) # Sum of the review ratings, to update the average in place
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -49,6 +53,9 @@ class CartItem(models.Model):
     quantity = models.PositiveIntegerField(default=1)
     added_at = models.DateTimeField(auto_now_add=True)
     
+    def total_price(self):
+        return self.product.price * self.quantity
+    
     def __str__(self):
         return f"{self.quantity} x {self.product.name} in Cart {self.cart.id}"   
 
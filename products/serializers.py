@@ -1,6 +1,8 @@
 from rest_framework import serializers
+from core.fast_serializers import DecimalString, FastReadSerializer, FileUrl, IsoDateTime
 from .models import Category, Product, Cart, CartItem
 from .cart_utils import calculate_cart_total
+from .uploads import IMAGE_CONTENT_TYPES
 
 
 # Category serializer
@@ -16,9 +18,43 @@ class ProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = ['id', 'name', 'description', 'price', 'image', 'category', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
-        
+        fields = ['id', 'name', 'description', 'price', 'image', 'category', 'rating_average', 'rating_count', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'rating_average', 'rating_count', 'created_at', 'updated_at']
+
+
+# Fast read-only serializers for the list endpoints, same output as the serializers above
+class FastCategorySerializer(FastReadSerializer):
+    fields = (
+        ('id', 'id', None),
+        ('name', 'name', None),
+        ('created_at', 'created_at', IsoDateTime()),
+        ('updated_at', 'updated_at', IsoDateTime()),
+    )
+
+
+class FastProductSerializer(FastReadSerializer):
+    fields = (
+        ('id', 'id', None),
+        ('name', 'name', None),
+        ('description', 'description', None),
+        ('price', 'price', DecimalString(2)),
+        ('image', 'image', FileUrl()),
+        ('category', 'category_id', None),
+        ('rating_average', 'rating_average', DecimalString(2)),
+        ('rating_count', 'rating_count', None),
+        ('created_at', 'created_at', IsoDateTime()),
+        ('updated_at', 'updated_at', IsoDateTime()),
+    )
+
+
+# Product image upload serializers
+class ProductImageUploadTicketSerializer(serializers.Serializer):
+    content_type = serializers.ChoiceField(choices=list(IMAGE_CONTENT_TYPES))
+
+
+class ProductImageUploadCompleteSerializer(serializers.Serializer):
+    token = serializers.CharField()
+
 # Cart Serializer
 class CartSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField()  # Display user as a string (for authenticated users)
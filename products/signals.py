@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.object_cache import invalidate_cached_objects
+from .models import Category, Product
+
+
+# Drop the rows cached for `?ids=` multi-gets whenever a product or category changes
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_object_cache(sender, instance, **kwargs):
+    invalidate_cached_objects(sender, [instance.pk])
@@ -1,3 +1,213 @@
-from django.test import TestCase
+from unittest import skip
+
+import boto3
+import requests
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from .models import Category, Product
+from reviews.aggregates import refresh_product_ratings
+from reviews.models import Review
+from .serializers import CategorySerializer, FastCategorySerializer, FastProductSerializer, ProductSerializer
+
+try:
+    from moto import mock_aws
+except ImportError:  # Test-only dependency from requirements-dev.txt
+    mock_aws = skip('moto is not installed')
+
+User = get_user_model()
+
+BUCKET = 'ruralmart-test-media'
+
+S3_STORAGES = {
+    'default': {'BACKEND': 'core.s3_storage.HashedS3Storage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+# Test cases for direct product image uploads, against moto's in-memory S3
+@mock_aws
+@override_settings(STORAGES=S3_STORAGES, AWS_STORAGE_BUCKET_NAME=BUCKET, AWS_S3_REGION_NAME='us-east-1', PRODUCT_IMAGE_MAX_BYTES=1024)
+class ProductImageUploadTestCase(APITestCase):
+    def setUp(self):
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket=BUCKET)
+        category = Category.objects.create(name='Grains')
+        self.product = Product.objects.create(name='Maize', description='Dry maize', price=50, category=category)
+        self.admin = User.objects.create(email='admin@gmail.com', phone_number='0700000001', first_name='Admin', last_name='Doe', is_staff=True)
+        self.client.force_authenticate(user=self.admin)
+        self.url = f'/v1/products/{self.product.id}/image-upload/'
+
+    def ticket(self, content_type='image/jpeg'):
+        response = self.client.post(self.url, {'content_type': content_type}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def upload(self, ticket, content=b'\xff\xd8\xff image bytes', content_type='image/jpeg'):
+        # What the client does: a multipart POST straight to the bucket, not through the API
+        response = requests.post(ticket['url'], data=ticket['fields'], files={'file': ('photo.jpg', content, content_type)})
+        self.assertLess(response.status_code, 300)
+
+    def complete(self, token, product=None):
+        product = product or self.product
+        return self.client.post(f'/v1/products/{product.id}/image-upload/complete/', {'token': token}, format='json')
+
+    def test_uploaded_image_is_attached_to_the_product(self):
+        ticket = self.ticket()
+        self.assertTrue(ticket['fields']['key'].startswith(f'product_images/uploads/{self.product.id}/'))
+        self.upload(ticket)
+
+        response = self.complete(ticket['token'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.image.name, ticket['fields']['key'])
+        self.assertIn(BUCKET, response.data['image'])
+
+    def test_replaced_upload_is_deleted(self):
+        first = self.ticket()
+        self.upload(first)
+        self.complete(first['token'])
+        second = self.ticket()
+        self.upload(second)
+        self.complete(second['token'])
+        self.assertFalse(default_storage.exists(first['fields']['key']))
+        self.assertTrue(default_storage.exists(second['fields']['key']))
+
+    def test_completion_needs_the_object_and_a_token_for_this_product(self):
+        ticket = self.ticket()
+        response = self.complete(ticket['token'])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'The image has not been uploaded yet.')
+
+        self.upload(ticket)
+        other = Product.objects.create(name='Beans', description='Dry beans', price=80, category=self.product.category)
+        self.assertEqual(self.complete(ticket['token'], other).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.complete(ticket['token'] + 'x').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_oversized_uploads_are_rejected_and_removed(self):
+        ticket = self.ticket()
+        # moto does not enforce the POST policy, a real bucket would refuse this upload
+        self.upload(ticket, content=b'x' * 2048)
+        response = self.complete(ticket['token'])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(default_storage.exists(ticket['fields']['key']))
+
+    def test_tickets_are_for_admins_and_images_only(self):
+        response = self.client.post(self.url, {'content_type': 'application/pdf'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.admin.is_staff = False
+        self.admin.save()
+        response = self.client.post(self.url, {'content_type': 'image/png'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(STORAGES={**S3_STORAGES, 'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'}})
+    def test_tickets_need_s3_storage(self):
+        response = self.client.post(self.url, {'content_type': 'image/png'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+
+# Contract tests for the fast list serializers: they must render exactly what the DRF serializers render
+class FastReadSerializerContractTestCase(APITestCase):
+    def setUp(self):
+        grains = Category.objects.create(name='Grains')
+        Category.objects.create(name='Tubers')
+        Product.objects.create(name='Maize', description='Dry maize', price=50, category=grains)
+        Product.objects.create(name='Rice', description='Brown rice', price='1234.5', category=grains, image='')
+        Product.objects.create(name='Millet', description='Finger millet', price='0.99', category=grains, image='product_images/millet photo é.jpg')
+        Product.objects.filter(name='Maize').update(rating_average='4.5', rating_count=2)
+
+    def assertSameJSON(self, fast, expected):
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(expected))
+
+    def test_product_parity(self):
+        request = APIRequestFactory().get('/v1/products/')
+        for context in ({'request': request}, {}):
+            products = Product.objects.order_by('id')
+            fast = FastProductSerializer(context).represent(products.values(*FastProductSerializer.lookups()))
+            self.assertSameJSON(fast, ProductSerializer(products, many=True, context=context).data)
+
+    def test_category_parity(self):
+        categories = Category.objects.order_by('id')
+        fast = FastCategorySerializer().represent(categories.values(*FastCategorySerializer.lookups()))
+        self.assertSameJSON(fast, CategorySerializer(categories, many=True).data)
+
+    def test_list_endpoints_parity(self):
+        response = self.client.get('/v1/products/?ordering=-price')
+        expected = ProductSerializer(Product.objects.order_by('-price'), many=True, context={'request': response.wsgi_request}).data
+        self.assertEqual(response.content, JSONRenderer().render(expected))
+
+        response = self.client.get('/v1/categories/')
+        self.assertEqual(response.content, JSONRenderer().render(CategorySerializer(Category.objects.all(), many=True).data))
+
+
+# Test cases for `?ids=` multi-gets of products and categories
+class BatchFetchTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Grains')
+        self.products = [
+            Product.objects.create(name=name, description=name, price=10, category=self.category)
+            for name in ('Maize', 'Rice', 'Millet')
+        ]
+
+    def ids(self, *indexes):
+        return ','.join(str(self.products[index].id) for index in indexes)
+
+    def test_products_in_requested_order_with_missing_ids(self):
+        missing = self.products[-1].id + 100
+        response = self.client.get(f'/v1/products/?ids={self.ids(2, 0)},{missing},{self.products[2].id}&ordering=name')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([product['name'] for product in response.data['results']], ['Millet', 'Maize'])
+        self.assertEqual(response.data['missing'], [missing])
+        expected = ProductSerializer(self.products[2], context={'request': response.wsgi_request}).data
+        self.assertEqual(JSONRenderer().render(response.data['results'][0]), JSONRenderer().render(expected))
+
+    def test_products_are_served_from_the_object_cache(self):
+        with self.assertNumQueries(1):
+            self.client.get(f'/v1/products/?ids={self.ids(0, 1)}')
+        with self.assertNumQueries(0):
+            self.client.get(f'/v1/products/?ids={self.ids(1, 0)}')
+        # Only the product that is not cached yet is loaded
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/v1/products/?ids={self.ids(0, 1, 2)}')
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_changes_drop_cached_products(self):
+        ids = self.ids(0, 1)
+        self.client.get(f'/v1/products/?ids={ids}')
+        self.products[0].price = 25
+        self.products[0].save()
+        deleted = self.products[1].id
+        self.products[1].delete()
+        response = self.client.get(f'/v1/products/?ids={ids}')
+        self.assertEqual(response.data['results'][0]['price'], '25.00')
+        self.assertEqual(response.data['missing'], [deleted])
+
+        # Ratings are refreshed with bulk_update, which sends no signals
+        user = User.objects.create(email='buyer@gmail.com', phone_number='0700000002')
+        Review.objects.create(product=self.products[0], user=user, rating=4, comment='Good')
+        refresh_product_ratings([self.products[0].id])
+        response = self.client.get(f'/v1/products/?ids={self.ids(0)}')
+        self.assertEqual(response.data['results'][0]['rating_count'], 1)
+
+    def test_categories(self):
+        other = Category.objects.create(name='Tubers')
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/v1/categories/?ids={other.id},{self.category.id}')
+        self.assertEqual([category['name'] for category in response.data['results']], ['Tubers', 'Grains'])
+        with self.assertNumQueries(0):
+            self.client.get(f'/v1/categories/?ids={self.category.id}')
+
+    @override_settings(BATCH_MAX_IDS=2)
+    def test_invalid_ids(self):
+        for ids in ('1,two', ',', self.ids(0, 1, 2)):
+            response = self.client.get(f'/v1/products/?ids={ids}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('error', response.data)
+        self.assertEqual(self.client.get('/v1/categories/?ids=x').status_code, status.HTTP_400_BAD_REQUEST)
 
-# Create your tests here.
@@ -0,0 +1,102 @@
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from core.storage import IMMUTABLE_CACHE_CONTROL
+
+# Directly uploaded product images are stored under this prefix, one folder per product
+UPLOAD_PREFIX = 'product_images/uploads'
+
+# Image types clients may upload, with the extension their keys get
+IMAGE_CONTENT_TYPES = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/webp': 'webp',
+}
+
+_TOKEN_SALT = 'products.image-upload'
+
+
+class UploadError(Exception):
+    pass
+
+
+def direct_uploads_supported(storage=default_storage):
+    """
+       Whether media is stored in S3 (or an S3-compatible store), which direct uploads need.
+    """
+    # Imported here, the S3 backend imports boto3
+    from storages.backends.s3 import S3Storage
+    return isinstance(storage, S3Storage)
+
+
+def _key(storage, name):
+    # The bucket key of a storage name, i.e. with the storage's `location` prefix
+    return storage._normalize_name(name)
+
+
+def issue_upload_ticket(product, content_type, storage=default_storage):
+    """
+       A presigned POST that lets a client upload one image of `product` straight to the bucket, so the upload
+       does not hold a worker. The policy pins the key and content type and caps the size at `PRODUCT_IMAGE_MAX_BYTES`.
+       The ticket's signed `token` names the key, `complete_upload` only attaches keys issued this way.
+    """
+    name = f'{UPLOAD_PREFIX}/{product.pk}/{uuid.uuid4().hex}.{IMAGE_CONTENT_TYPES[content_type]}'
+    # Keys are never reused, so the object can be cached as immutable like the content-hashed ones
+    fields = {'Content-Type': content_type, 'Cache-Control': IMMUTABLE_CACHE_CONTROL}
+    conditions = [
+        {'Content-Type': content_type}, {'Cache-Control': IMMUTABLE_CACHE_CONTROL},
+        ['content-length-range', 1, settings.PRODUCT_IMAGE_MAX_BYTES],
+    ]
+    if storage.default_acl:
+        fields['acl'] = storage.default_acl
+        conditions.append({'acl': storage.default_acl})
+
+    post = storage.connection.meta.client.generate_presigned_post(
+        storage.bucket_name, _key(storage, name),
+        Fields=fields, Conditions=conditions, ExpiresIn=settings.PRODUCT_IMAGE_UPLOAD_EXPIRY,
+    )
+    return {
+        'url': post['url'],
+        'fields': post['fields'],
+        'token': signing.dumps({'product': product.pk, 'name': name}, salt=_TOKEN_SALT),
+        'expires_in': settings.PRODUCT_IMAGE_UPLOAD_EXPIRY,
+        'max_bytes': settings.PRODUCT_IMAGE_MAX_BYTES,
+    }
+
+
+def complete_upload(product, token, storage=default_storage):
+    """
+       Attach an uploaded image to `product` once the object is in the bucket.
+       The object is checked against the ticket's limits again, since S3-compatible stores do not all enforce POST policies.
+       The image it replaces is deleted if it was also uploaded directly.
+    """
+    from botocore.exceptions import ClientError
+
+    try:
+        # Leaves time for a slow upload that started just before the presigned POST expired
+        ticket = signing.loads(token, salt=_TOKEN_SALT, max_age=settings.PRODUCT_IMAGE_UPLOAD_EXPIRY + 3600)
+    except signing.BadSignature:
+        raise UploadError('Invalid or expired upload token.')
+    if ticket['product'] != product.pk:
+        raise UploadError('This upload token was issued for another product.')
+
+    name = ticket['name']
+    client = storage.connection.meta.client
+    try:
+        uploaded = client.head_object(Bucket=storage.bucket_name, Key=_key(storage, name))
+    except ClientError:
+        raise UploadError('The image has not been uploaded yet.')
+    if uploaded['ContentLength'] > settings.PRODUCT_IMAGE_MAX_BYTES or uploaded.get('ContentType') not in IMAGE_CONTENT_TYPES:
+        storage.delete(name)
+        raise UploadError('The uploaded file is not an accepted image.')
+
+    previous = product.image.name if product.image else None
+    if previous == name:
+        return product
+    product.image.name = name
+    product.save(update_fields=['image', 'updated_at'])
+    if previous and previous.startswith(f'{UPLOAD_PREFIX}/'):
+        storage.delete(previous)
+    return product
@@ -1,9 +1,21 @@
-from rest_framework import viewsets, filters
+from adrf.generics import aget_object_or_404
+from adrf.viewsets import GenericViewSet as AsyncGenericViewSet
+from asgiref.sync import sync_to_async
+from rest_framework import mixins, viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from .models import Product, Category, Cart, CartItem
-from .serializers import ProductSerializer, CategorySerializer, CartSerializer, CartItemSerializer
+from .serializers import (
+    ProductSerializer, CategorySerializer, CartSerializer, CartItemSerializer,
+    FastProductSerializer, FastCategorySerializer,
+    ProductImageUploadTicketSerializer, ProductImageUploadCompleteSerializer,
+)
 from .filters import ProductFilter
+from .uploads import UploadError, complete_upload, direct_uploads_supported, issue_upload_ticket
+from accounts.permissions import IsAdminUser
+from core.fast_serializers import BatchIdsError, FastListMixin, batch_response, fetch_by_ids, parse_ids
 from django_filters.rest_framework import DjangoFilterBackend
 from django.http import HttpResponse
 
@@ -16,10 +28,15 @@ def favicon_view(request):
     return HttpResponse(status=204)  # No Content response for favicon requests
 
 # Product viewset
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(mixins.CreateModelMixin, mixins.UpdateModelMixin, mixins.DestroyModelMixin, AsyncGenericViewSet):
+    """
+       Catalog reads (`list`, `retrieve`) are async and use the async ORM; writes are the usual sync mixins,
+       which run in a thread.
+    """
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
+    throttle_scope = 'catalog'
     
     # Filter backends
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -33,14 +50,66 @@ class ProductViewSet(viewsets.ModelViewSet):
     # Ordering set up
     ordering_fields = ['price', 'name', 'created_at']
     ordering = ['name']
+
+    async def afilter_queryset(self, queryset):
+        # The filterset validates category ids against the database, so all backends run in one trip to a thread
+        return await sync_to_async(self.filter_queryset)(queryset)
+
+    async def list(self, request, *args, **kwargs):
+        serializer = FastProductSerializer(context=self.get_serializer_context())
+        if 'ids' in request.query_params:
+            # Multi-get, e.g. for a cart or wishlist: `?ids=1,2,3`, served from the per-object cache when possible
+            try:
+                ids = parse_ids(request.query_params['ids'])
+            except BatchIdsError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return batch_response(*await sync_to_async(fetch_by_ids)(serializer, self.get_queryset(), ids, use_cache=True))
+
+        queryset = await self.afilter_queryset(self.get_queryset())
+        return Response(serializer.represent([row async for row in serializer.values_queryset(queryset)]))
+
+    async def retrieve(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        product = await aget_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        await sync_to_async(self.check_object_permissions)(request, product)
+        return Response(self.get_serializer(product).data)
+
+    @action(detail=True, methods=['post'], url_path='image-upload', permission_classes=[IsAdminUser], serializer_class=ProductImageUploadTicketSerializer)
+    def image_upload(self, request, pk=None):
+        """
+           Issue a presigned POST for uploading the product's image straight to object storage.
+           Once uploaded, the client posts the ticket's `token` to `image-upload/complete`.
+        """
+        if not direct_uploads_supported():
+            return Response({'error': 'Direct uploads need S3 media storage.'}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ticket = issue_upload_ticket(self.get_object(), serializer.validated_data['content_type'])
+        return Response(ticket, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'], url_path='image-upload/complete', permission_classes=[IsAdminUser], serializer_class=ProductImageUploadCompleteSerializer)
+    def complete_image_upload(self, request, pk=None):
+        if not direct_uploads_supported():
+            return Response({'error': 'Direct uploads need S3 media storage.'}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            product = complete_upload(self.get_object(), serializer.validated_data['token'])
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ProductSerializer(product, context=self.get_serializer_context()).data, status=status.HTTP_200_OK)
     
     
     
 # Category viewset
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(FastListMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    fast_serializer_class = FastCategorySerializer
+    batch_cache = True
     permission_classes = [AllowAny]
+    throttle_scope = 'catalog'
     
     
 # Cart viewset
@@ -0,0 +1,58 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import Avg, Case, Count, F, FloatField, Sum, Value, When
+from django.db.models.functions import Round
+from core.object_cache import invalidate_cached_objects
+from products.models import Product
+from .models import Review
+
+
+def refresh_product_ratings(product_ids):
+    """
+       Recompute `rating_average`, `rating_count` and `rating_total` for the given products, e.g. after a bulk import.
+       One aggregate query and one bulk update, however many products are passed.
+    """
+    product_ids = set(product_ids)
+    if not product_ids:
+        return 0
+
+    aggregates = {
+        row['product_id']: row
+        for row in Review.objects.filter(product_id__in=product_ids)
+        .values('product_id')
+        .annotate(average=Avg('rating'), count=Count('id'), total=Sum('rating'))
+        .order_by()
+    }
+    products = []
+    for product_id in product_ids:
+        row = aggregates.get(product_id)
+        average = Decimal(str(row['average'])).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) if row else Decimal('0.00')
+        products.append(Product(
+            id=product_id, rating_average=average, rating_count=row['count'] if row else 0, rating_total=row['total'] if row else 0,
+        ))
+    updated = Product.objects.bulk_update(products, ['rating_average', 'rating_count', 'rating_total'])
+    # bulk_update sends no signals
+    invalidate_cached_objects(Product, product_ids)
+    return updated
+
+
+def apply_rating_change(product_id, rating_delta, count_delta):
+    """
+       Update a product's ratings for one review written, changed or deleted, in a single UPDATE computed by the
+       database from the stored values. Call it in the same transaction as the review write, the row stays locked
+       until it commits so concurrent writes apply one after the other.
+    """
+    total = F('rating_total') + rating_delta
+    count = F('rating_count') + count_delta
+    updated = Product.objects.filter(pk=product_id).update(
+        rating_average=Case(
+            When(rating_count__lte=-count_delta, then=Value(0.0)),  # The last review was deleted
+            default=Round(total * Value(1.0) / count, 2),
+            output_field=FloatField(),
+        ),
+        rating_total=F('rating_total') + rating_delta,
+        rating_count=F('rating_count') + count_delta,
+    )
+    # update() sends no signals
+    invalidate_cached_objects(Product, [product_id])
+    return updated
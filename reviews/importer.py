@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from products.models import Product
+from .aggregates import refresh_product_ratings
+from .models import Review
+
+User = get_user_model()
+
+
+def _batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_reviews(rows, batch_size=1000):
+    """
+       Bulk import historic reviews.
+       - `rows` is an iterable of dicts with `user_email`, `product_id`, `rating` and optional `comment` and `created_at`.
+       - Each batch resolves users and products with one query each, inserts with
+         `bulk_create(ignore_conflicts=True)` so reviews that already exist are skipped by the
+         `unique_review` constraint, and refreshes the rating aggregates of its products once.
+       Returns a dict with the number of rows submitted for insert and skipped as invalid.
+    """
+    stats = {'submitted': 0, 'skipped': 0}
+    for batch in _batches(rows, batch_size):
+        emails = {row.get('user_email') for row in batch}
+        users = dict(User.objects.filter(email__in=emails).values_list('email', 'id'))
+        product_ids = set(Product.objects.filter(id__in={_to_int(row.get('product_id')) for row in batch}).values_list('id', flat=True))
+
+        reviews = []
+        for row in batch:
+            user_id = users.get(row.get('user_email'))
+            product_id = _to_int(row.get('product_id'))
+            rating = _to_int(row.get('rating'))
+            if user_id is None or product_id not in product_ids or rating is None or not 1 <= rating <= 5:
+                stats['skipped'] += 1
+                continue
+            review = Review(user_id=user_id, product_id=product_id, rating=rating, comment=row.get('comment') or '')
+            created_at = parse_datetime(row['created_at']) if row.get('created_at') else None
+            if created_at is not None:
+                review.created_at = timezone.make_aware(created_at) if timezone.is_naive(created_at) else created_at
+            reviews.append(review)
+
+        Review.objects.bulk_create(reviews, ignore_conflicts=True)
+        refresh_product_ratings(review.product_id for review in reviews)
+        stats['submitted'] += len(reviews)
+    return stats
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,19 @@
+import csv
+
+from django.core.management.base import BaseCommand
+from reviews.importer import import_reviews
+
+
+class Command(BaseCommand):
+    help = 'Bulk import historic reviews from a CSV file with user_email, product_id, rating, comment and created_at columns.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the CSV export.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of reviews inserted per query.')
+
+    def handle(self, *args, **options):
+        with open(options['path'], newline='', encoding='utf-8') as csv_file:
+            stats = import_reviews(csv.DictReader(csv_file), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Submitted {stats['submitted']} reviews, skipped {stats['skipped']} invalid rows. Existing reviews were left unchanged."
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_review_helpful_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='review',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from products.models import Product
 
 User = get_user_model()
@@ -11,14 +12,36 @@ class Review(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews')
     rating = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)]) # Rating from 1 to 5
     comment = models.TextField(blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    helpful_count = models.PositiveIntegerField(default=0) # Number of times readers marked the review helpful
+    created_at = models.DateTimeField(default=timezone.now) # Not auto_now_add so imported reviews keep their original date
     
     class Meta:
                constraints = [
                       models.UniqueConstraint(fields=['user', 'product'], name='unique_review')
                     ] # Ensure one review per user per product
                
+               indexes = [
+                      models.Index(fields=['product', '-created_at', 'id'], name='review_product_newest_idx'),
+                      models.Index(fields=['product', '-rating', '-created_at', 'id'], name='review_product_rating_idx'),
+                      models.Index(fields=['product', '-helpful_count', '-created_at', 'id'], name='review_product_helpful_idx'),
+                    ] # Keyset pagination of a product's reviews for each sort order
+               
                ordering = ['-created_at']
         
     def __str__(self):
         return f'Review by: {self.user.first_name} {self.user.last_name} for {self.product.name} - Rating: {self.rating}'    
+
+
+# Class to represent a reader marking a review helpful, once per user and review
+class HelpfulVote(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='helpful_votes')
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='helpful_votes')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'review'], name='unique_helpful_vote')
+        ]  # helpful_count only grows when a vote is inserted
+
+    def __str__(self):
+        return f'Helpful vote by {self.user_id} for review {self.review_id}'
@@ -0,0 +1,104 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ReviewKeysetPagination(BasePagination):
+    """
+       Keyset (seek) pagination for a product's reviews.
+       - The view provides the sort keys through `get_keyset_ordering()`, e.g. ['-created_at', 'id'].
+       - The cursor holds the sort key values of the last row, so each page is a single
+         indexed range scan no matter how deep the client pages.
+    """
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = view.get_keyset_ordering()
+        self.model = queryset.model
+        page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self.seek_filter(cursor))
+
+        rows = list(queryset.order_by(*self.ordering)[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def seek_filter(self, values):
+        """
+           Rows strictly after `values` in the sort order: (a > x) OR (a = x AND b > y) OR ...
+        """
+        condition = Q()
+        for index, key in enumerate(self.ordering):
+            field = key.lstrip('-')
+            lookup = 'lt' if key.startswith('-') else 'gt'
+            term = Q(**{f'{field}__{lookup}': values[index]})
+            for previous_key, previous_value in zip(self.ordering[:index], values[:index]):
+                term &= Q(**{previous_key.lstrip('-'): previous_value})
+            condition |= term
+        return condition
+
+    def encode_cursor(self, row):
+        values = [getattr(row, key.lstrip('-')) for key in self.ordering]
+        raw = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (ValueError, TypeError):
+            raise NotFound('Invalid cursor.')
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound('Invalid cursor.')
+        # Each value must parse as its sort field (e.g. a datetime), a forged one would break the query
+        try:
+            values = [self.model._meta.get_field(key.lstrip('-')).to_python(value) for key, value in zip(self.ordering, values)]
+        except ValidationError:
+            raise NotFound('Invalid cursor.')
+        if None in values:
+            raise NotFound('Invalid cursor.')
+        return values
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -11,13 +11,14 @@ User = get_user_model()
 class ReviewSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)  # Nested user serializer
     product = ProductSerializer(read_only=True)  # Nested product serializer
+    product_id = serializers.PrimaryKeyRelatedField(source='product', queryset=Product.objects.all(), write_only=True, required=False)
     rating = serializers.IntegerField(min_value=1, max_value=5)
     comment = serializers.CharField(allow_blank=True, required=False)
     created_at = serializers.DateTimeField(read_only=True)
     
     class Meta:
         model = Review
-        fields = ['id', 'user', 'product', 'rating', 'comment', 'created_at']
+        fields = ['id', 'user', 'product', 'product_id', 'rating', 'comment', 'created_at']
         read_only_fields = ['id', 'user', 'product', 'created_at']
         
     def create(self, validated_data):
@@ -33,11 +34,25 @@ class ReviewSerializer(serializers.ModelSerializer):
         validated_data.pop('product', None)
         return super().update(instance, validated_data)    
     
-    # Validate that a user cannot review the same product more than once
+    # Validate that a product is given when creating a review
+    # One review per user per product is enforced by the `unique_review` constraint on insert
     def validate(self, data):
-        user = self.context.get('request').user
-        product = data.get('product')
+        if self.instance is None and 'product' not in data:
+            raise serializers.ValidationError({"product_id": "This field is required."})
+        return data
+
+
+# Public review serializer (compact author, no nested user or product)
+class PublicReviewSerializer(serializers.ModelSerializer):
+    author = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Review
+        fields = ['id', 'product', 'author', 'rating', 'comment', 'helpful_count', 'created_at']
+        read_only_fields = fields
         
-        if Review.objects.filter(user=user, product=product).exists():
-            raise serializers.ValidationError("You have already reviewed this product.")
-        return data
\ No newline at end of file
+    def get_author(self, obj):
+        # First name and last name initial, e.g. "John D."
+        initial = f' {obj.user.last_name[:1]}.' if obj.user.last_name else ''
+        return f'{obj.user.first_name}{initial}'
+
@@ -1,3 +1,140 @@
-from django.test import TestCase
+import base64
+import json
+from decimal import Decimal
 
-# Create your tests here.
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from products.models import Category, Product
+from .models import Review
+from .importer import import_reviews
+
+User = get_user_model()
+
+
+# Test cases for the public product review listing
+class ProductReviewListTestCase(APITestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Grains')
+        self.product = Product.objects.create(name='Maize', description='Dry maize', price=50, category=category)
+        self.other_product = Product.objects.create(name='Beans', description='Dry beans', price=80, category=category)
+        self.users = [
+            User.objects.create(email=f'buyer{i}@gmail.com', phone_number=f'07000000{i:02d}', first_name=f'Buyer{i}', last_name='Doe')
+            for i in range(7)
+        ]
+        for i, user in enumerate(self.users):
+            Review.objects.create(user=user, product=self.product, rating=(i % 5) + 1, helpful_count=i * 2 % 7, comment=f'Review {i}')
+        Review.objects.create(user=self.users[0], product=self.other_product, rating=5)
+        self.url = f'/v4/products/{self.product.id}/reviews/'
+
+    def collect(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(review['id'] for review in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_listing_is_public_and_compact(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        review = response.data['results'][0]
+        self.assertEqual(review['author'], 'Buyer6 D.')
+        self.assertNotIn('user', review)
+        self.assertEqual(len(response.data['results']), 7)
+
+    def test_keyset_pages_cover_every_review_once(self):
+        for sort, ordering in [('newest', ['-created_at', 'id']), ('rating', ['-rating', '-created_at', 'id']), ('helpful', ['-helpful_count', '-created_at', 'id'])]:
+            expected = list(Review.objects.filter(product=self.product).order_by(*ordering).values_list('id', flat=True))
+            self.assertEqual(self.collect(f'{self.url}?sort={sort}&page_size=2'), expected)
+
+    def test_page_query_count(self):
+        with self.assertNumQueries(1):
+            self.client.get(f'{self.url}?page_size=3')
+
+    def test_invalid_sort_and_cursor(self):
+        self.assertEqual(self.client.get(f'{self.url}?sort=price').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(f'{self.url}?cursor=not-a-cursor').status_code, status.HTTP_404_NOT_FOUND)
+        for values in (['abc', 1], ['2021-03-01T10:00:00Z', 'abc'], [None, 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+            self.assertEqual(self.client.get(f'{self.url}?cursor={cursor}').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_missing_product(self):
+        response = self.client.get('/v4/products/999999/reviews/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_mark_review_helpful(self):
+        review = Review.objects.get(user=self.users[1], product=self.product)
+        self.client.force_authenticate(user=self.users[0])
+        response = self.client.post(f'/v4/reviews/{review.id}/helpful/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['helpful_count'], review.helpful_count + 1)
+
+        # Voting again does not count twice
+        response = self.client.post(f'/v4/reviews/{review.id}/helpful/')
+        self.assertEqual(response.data['helpful_count'], review.helpful_count + 1)
+        self.client.force_authenticate(user=self.users[2])
+        response = self.client.post(f'/v4/reviews/{review.id}/helpful/')
+        self.assertEqual(response.data['helpful_count'], review.helpful_count + 2)
+        self.assertEqual(self.client.post('/v4/reviews/999999/helpful/').status_code, status.HTTP_404_NOT_FOUND)
+
+
+# Test cases for review creation and bulk import
+class ReviewWriteTestCase(APITestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Grains')
+        self.product = Product.objects.create(name='Maize', description='Dry maize', price=50, category=category)
+        self.user = User.objects.create(email='buyer@gmail.com', phone_number='0700000000', first_name='Jane', last_name='Doe')
+        self.client.force_authenticate(user=self.user)
+
+    def test_duplicate_review_is_rejected_by_constraint(self):
+        first = self.client.post('/v4/reviews/', {'product_id': self.product.id, 'rating': 4}, format='json')
+        second = self.client.post('/v4/reviews/', {'product_id': self.product.id, 'rating': 2}, format='json')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('already reviewed', str(second.data))
+        self.assertEqual(Review.objects.filter(user=self.user).count(), 1)
+
+    def test_review_requires_product(self):
+        response = self.client.post('/v4/reviews/', {'rating': 4}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rating_aggregates_follow_writes(self):
+        response = self.client.post('/v4/reviews/', {'product_id': self.product.id, 'rating': 4}, format='json')
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_count, self.product.rating_average), (1, Decimal('4.00')))
+
+        other = User.objects.create(email='other@gmail.com', phone_number='0700000001', first_name='Tom', last_name='Doe')
+        self.client.force_authenticate(user=other)
+        other_review = self.client.post('/v4/reviews/', {'product_id': self.product.id, 'rating': 5}, format='json')
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_count, self.product.rating_average), (2, Decimal('4.50')))
+
+        self.client.patch(f"/v4/reviews/{other_review.data['id']}/", {'rating': 1}, format='json')
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_count, self.product.rating_average), (2, Decimal('2.50')))
+
+        self.client.delete(f"/v4/reviews/{other_review.data['id']}/")
+        self.client.force_authenticate(user=self.user)
+        self.client.delete(f"/v4/reviews/{response.data['id']}/")
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_count, self.product.rating_average, self.product.rating_total), (0, Decimal('0.00'), 0))
+
+    def test_bulk_import(self):
+        Review.objects.create(user=self.user, product=self.product, rating=5)
+        other = User.objects.create(email='other@gmail.com', phone_number='0700000001', first_name='Tom', last_name='Doe')
+        rows = [
+            {'user_email': 'buyer@gmail.com', 'product_id': str(self.product.id), 'rating': '1'},  # Already reviewed
+            {'user_email': 'other@gmail.com', 'product_id': str(self.product.id), 'rating': '2', 'created_at': '2021-03-01T10:00:00'},
+            {'user_email': 'ghost@gmail.com', 'product_id': str(self.product.id), 'rating': '3'},  # Unknown user
+            {'user_email': 'other@gmail.com', 'product_id': '999999', 'rating': '3'},  # Unknown product
+        ]
+        stats = import_reviews(rows, batch_size=2)
+
+        self.assertEqual(stats, {'submitted': 2, 'skipped': 2})
+        self.assertEqual(Review.objects.get(user=self.user).rating, 5)
+        self.assertEqual(Review.objects.get(user=other).created_at.year, 2021)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_count, self.product.rating_average), (2, Decimal('3.50')))
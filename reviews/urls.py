@@ -1,7 +1,10 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import ReviewViewSet
+from .views import ReviewViewSet, ProductReviewListView
 
 router = DefaultRouter()
 router.register(r'reviews', ReviewViewSet)
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('products/<int:product_id>/reviews/', ProductReviewListView.as_view(), name='product-reviews'),
+] + router.urls
@@ -1,8 +1,16 @@
 from rest_framework import viewsets
 from django.shortcuts import redirect
-from rest_framework.permissions import IsAuthenticated
-from .models import Review
-from .serializers import ReviewSerializer
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.generics import ListAPIView
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from products.models import Product
+from .models import HelpfulVote, Review
+from .aggregates import apply_rating_change
+from .pagination import ReviewKeysetPagination
+from .serializers import ReviewSerializer, PublicReviewSerializer
 from rest_framework.response import Response
 from rest_framework import status
 
@@ -35,8 +43,26 @@ class ReviewViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """
            Overriding this method to automatically set the logged-in user for the review.
+           A duplicate review is rejected by the `unique_review` constraint instead of a lookup before the insert.
         """
-        serializer.save(user=self.request.user)
+        try:
+            with transaction.atomic():
+                review = serializer.save(user=self.request.user)
+                apply_rating_change(review.product_id, review.rating, 1)
+        except IntegrityError:
+            raise ValidationError({"detail": "You have already reviewed this product."})
+        
+    def perform_update(self, serializer):
+        previous_rating = serializer.instance.rating
+        with transaction.atomic():
+            review = serializer.save()
+            if review.rating != previous_rating:
+                apply_rating_change(review.product_id, review.rating - previous_rating, 0)
+        
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            apply_rating_change(instance.product_id, -instance.rating, -1)
         
     def update(self, request, *args, **kwargs):
         """
@@ -65,3 +91,61 @@ class ReviewViewSet(viewsets.ModelViewSet):
         #     # Redirect to login or signup page based on some condition
         #     return redirect('/login/') 
         return super().create(request, *args, **kwargs)
+
+    @action(detail=True, methods=['post'])
+    def helpful(self, request, pk=None):
+        """
+            Mark any review as helpful. Each user counts once per review: the vote row and the counter
+            increment are written together, and a repeated vote leaves the counter unchanged.
+        """
+        if not Review.objects.filter(pk=pk).exists():
+            return Response({"detail": "Review not found."}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            with transaction.atomic():
+                HelpfulVote.objects.create(user=request.user, review_id=pk)
+                Review.objects.filter(pk=pk).update(helpful_count=F('helpful_count') + 1)
+        except IntegrityError:
+            pass  # Already voted, rejected by `unique_helpful_vote`
+        return Response({"helpful_count": Review.objects.values_list('helpful_count', flat=True).get(pk=pk)})
+
+
+# Public list of a product's reviews
+class ProductReviewListView(ListAPIView):
+    """
+        Lists the reviews of one product, without authentication.
+        - `sort` is one of `newest` (default), `rating` or `helpful`.
+        - Pages are fetched with the keyset `cursor` returned in `next`.
+    """
+    serializer_class = PublicReviewSerializer
+    permission_classes = [AllowAny]
+    pagination_class = ReviewKeysetPagination
+    throttle_scope = 'catalog'
+    
+    # Sort keys per `sort` value, each backed by an index starting with `product`
+    keyset_orderings = {
+        'newest': ['-created_at', 'id'],
+        'rating': ['-rating', '-created_at', 'id'],
+        'helpful': ['-helpful_count', '-created_at', 'id'],
+    }
+    
+    def get_keyset_ordering(self):
+        sort = self.request.query_params.get('sort', 'newest')
+        if sort not in self.keyset_orderings:
+            raise ValidationError({'sort': f"Must be one of: {', '.join(self.keyset_orderings)}."})
+        return self.keyset_orderings[sort]
+    
+    def get_queryset(self):
+        return (
+            Review.objects.filter(product_id=self.kwargs['product_id'])
+            .select_related('user')
+            .only('id', 'product_id', 'rating', 'comment', 'helpful_count', 'created_at', 'user__first_name', 'user__last_name')
+        )
+    
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # An empty first page is the only case where a missing product needs an extra query
+        if not response.data['results'] and 'cursor' not in request.query_params:
+            if not Product.objects.filter(pk=self.kwargs['product_id']).exists():
+                raise NotFound('Product not found.')
+        return response
+
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from importlib.util import find_spec
 import os
 from dotenv import load_dotenv
 from datetime import timedelta
@@ -59,19 +60,23 @@ INSTALLED_APPS = [
     'orders',
     'payments',
     'reviews',
+    'core',
     
     #Third party apps
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'rest_framework',
     'django_filters',
     'storages',
     'corsheaders',
-    'drf_spectacular',
+    # drf-spectacular is not an app here so workers do not import it at boot, see `core.schema_generator`
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware', 
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  
     'django.middleware.common.CommonMiddleware',  
@@ -79,7 +84,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',  
     'django.contrib.messages.middleware.MessageMiddleware',  
     'django.middleware.clickjacking.XFrameOptionsMiddleware',  
-      
+    'core.middleware.QueryInstrumentationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
 ]
 
 
@@ -88,7 +94,8 @@ ROOT_URLCONF = 'rural_mart.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        # drf-spectacular's Swagger UI and ReDoc templates, found without importing it
+        'DIRS': [Path(find_spec('drf_spectacular').origin).parent / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -140,6 +147,22 @@ DATABASES = {
     }
 }
 
+# Read replicas, e.g. DB_REPLICA_HOSTS=replica-1.internal,replica-2.internal
+# Safe-method requests read from a replica (see core.db_router); writes and migrations stay on default
+REPLICA_DATABASES = []
+for index, replica_host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': replica_host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 15))  # Reads stay on the primary this long after a client writes
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 5))  # Replicas further behind are skipped
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', 2))  # Seconds a lag measurement is reused per worker
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -159,6 +182,22 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# The first hasher hashes new and upgraded passwords, the others only verify existing hashes.
+# A successful login rehashes the password when its hasher or work factor differs from the first one.
+PASSWORD_HASHERS = list(dict.fromkeys([
+    os.getenv('PASSWORD_HASHER', 'accounts.hashers.ConfigurablePBKDF2PasswordHasher'),
+    'accounts.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]))
+
+# PBKDF2 work factor, defaults to Django's own value when unset
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', 0)) or None
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -183,6 +222,41 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'  # URL for serving media files
 MEDIA_ROOT = BASE_DIR / 'media'  # Directory for uploaded media files
 
+MEDIA_MAX_AGE = int(os.getenv('MEDIA_MAX_AGE', 3600))  # Browser cache lifetime of media without a content-hashed name
+
+# Uploads are named by their content hash (see core/storage.py), so media can be cached as immutable.
+# Media is stored in S3 (or an S3-compatible store such as MinIO) when a bucket is configured, otherwise in MEDIA_ROOT.
+# With S3, product images can be uploaded by clients straight to the bucket (see products/uploads.py).
+STORAGES = {
+    'default': {'BACKEND': 'core.storage.HashedFileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+if os.getenv('AWS_STORAGE_BUCKET_NAME'):
+    STORAGES['default'] = {'BACKEND': 'core.s3_storage.HashedS3Storage'}
+    AWS_STORAGE_BUCKET_NAME = os.getenv('AWS_STORAGE_BUCKET_NAME')
+    AWS_S3_REGION_NAME = os.getenv('AWS_S3_REGION_NAME')
+    AWS_S3_ENDPOINT_URL = os.getenv('AWS_S3_ENDPOINT_URL')
+
+# Direct product image uploads: largest accepted image (bytes) and how long a presigned POST is valid (seconds)
+PRODUCT_IMAGE_MAX_BYTES = int(os.getenv('PRODUCT_IMAGE_MAX_BYTES', 5 * 1024 * 1024))
+PRODUCT_IMAGE_UPLOAD_EXPIRY = int(os.getenv('PRODUCT_IMAGE_UPLOAD_EXPIRY', 900))
+
+# Cache configuration
+# A Redis cache shared by all workers when REDIS_URL is set, otherwise a per-process memory cache
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -194,13 +268,36 @@ AUTH_USER_MODEL = 'accounts.user'
 # Rest framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson instead of the stdlib json module; MessagePack for clients that ask for it, when installed
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ] + (['core.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.TokenBucketThrottle',
+    ],
+    # Reverse proxies in front of the app: anonymous requests are throttled per X-Forwarded-For entry this far
+    # from the end, the one the outermost trusted proxy appended. 0 keys on REMOTE_ADDR, the header can be forged.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
+}
+
+# Token bucket budgets per view `throttle_scope`, per user or per client IP for anonymous requests
+THROTTLE_BUCKETS = {
+    'login': {'capacity': 30, 'refill_per_minute': 20},  # Generous per IP, many rural users share carrier NAT addresses
+    'register': {'capacity': 20, 'refill_per_minute': 5},
+    'payment': {'capacity': 10, 'refill_per_minute': 10},
+    'catalog': {'capacity': 120, 'refill_per_minute': 300},
 }
 
 
@@ -211,12 +308,66 @@ SIMPLE_JWT = {
     "ALGORITHM": os.getenv('JWT_ALGORITHM', 'HS256'),
     "SIGNING_KEY": os.getenv('JWT_SIGNING_KEY'),
     "AUTH_HEADER_TYPES": (os.getenv('AUTH_HEADER_TYPE', 'Bearer'),),
+    # Refresh tokens check the in-memory blacklist filter instead of querying the blacklist table
+    "TOKEN_REFRESH_SERIALIZER": 'accounts.blacklist.FilteredTokenRefreshSerializer',
 }
 
 
+# Seconds an authenticated user is cached by CachedJWTAuthentication
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 60))
+
+# Seconds products and categories fetched with `?ids=` stay in the per-object cache; saving or deleting one drops it
+OBJECT_CACHE_TTL = int(os.getenv('OBJECT_CACHE_TTL', 300))
+
+# Most ids a `?ids=1,2,3` multi-get may list
+BATCH_MAX_IDS = int(os.getenv('BATCH_MAX_IDS', 100))
+
+# Embed email, role and active/staff flags in tokens so requests resolve the user without a query.
+# Role changes then only take effect once the user's tokens are reissued.
+JWT_EMBED_USER_CLAIMS = os.getenv('JWT_EMBED_USER_CLAIMS', 'False') == 'True'
+
+
 # Paystack configuration
 PAYSTACK_SECRET_KEY = os.getenv('PAYSTACK_SECRET_KEY')
 PAYSTACK_PUBLIC_KEY = os.getenv('PAYSTACK_PUBLIC_KEY')
+PAYSTACK_API_URL = os.getenv('PAYSTACK_API_URL', 'https://api.paystack.co')
+PAYSTACK_TIMEOUT = float(os.getenv('PAYSTACK_TIMEOUT', 10))  # Seconds, for the async client
+PAYSTACK_VERIFY_CACHE_TTL = int(os.getenv('PAYSTACK_VERIFY_CACHE_TTL', 30))  # Seconds a verify response is reused per reference
+PAYSTACK_VERIFY_LOCK_TIMEOUT = int(os.getenv('PAYSTACK_VERIFY_LOCK_TIMEOUT', 10))  # Seconds other workers wait for an in-flight verify
+
+
+# Query instrumentation configuration
+# Return X-DB-Query-Count, X-DB-Query-Time-Ms and X-DB-Duplicate-Queries headers (debug only by default)
+QUERY_DEBUG_HEADERS = os.getenv('QUERY_DEBUG_HEADERS', str(DEBUG)) == 'True'
+# Log requests running more queries than this, or repeating one query more than this, with where they ran from
+QUERY_COUNT_LOG_THRESHOLD = int(os.getenv('QUERY_COUNT_LOG_THRESHOLD', 50))
+QUERY_DUPLICATE_LOG_THRESHOLD = int(os.getenv('QUERY_DUPLICATE_LOG_THRESHOLD', 5))
+
+
+# Response compression configuration
+# Smallest response body (bytes) that is compressed; brotli is used when installed and accepted, otherwise gzip
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', 1024))
+# Path prefixes whose responses are never compressed, as they carry tokens (login, registration, token refresh)
+COMPRESSION_EXCLUDED_PATHS = ['/users/auth/']
+
+
+# Metrics configuration
+# Bearer token required to scrape /metrics; unset, /metrics is a 404 unless DEBUG is on
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+
+# Idempotency configuration
+# How long a stored response is replayed for a retried `Idempotency-Key`
+IDEMPOTENCY_KEY_TTL = timedelta(hours=int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', 24)))
+# How long a key stays claimed by a request that has not finished, e.g. because its worker crashed
+IDEMPOTENCY_CLAIM_TIMEOUT = timedelta(seconds=int(os.getenv('IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS', 120)))
+
+
+# Background task configuration (see core/tasks.py)
+# Seconds a job may run before it is considered abandoned and retried; keep it above the slowest task's run time
+TASK_LOCK_TIMEOUT = int(os.getenv('TASK_LOCK_TIMEOUT', 300))
+# Longest wait between retries of a failing job, in seconds
+TASK_MAX_RETRY_DELAY = int(os.getenv('TASK_MAX_RETRY_DELAY', 3600))
 
 
 # CORS configuration
@@ -228,6 +379,7 @@ CORS_ALLOW_HEADERS = [
     'content-type',
     'accept',
     'Authorization',
+    'Idempotency-Key',
 ]
 
 # Allow specific HTTP methods
@@ -262,9 +414,16 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'API documentation for RuralMart Marketplace',
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
+    # Gives the views drf-spectacular's AutoSchema, as DRF's DEFAULT_SCHEMA_CLASS is left at its default
+    'DEFAULT_GENERATOR_CLASS': 'core.schema_generator.SchemaGenerator',
     
     # OTHER SETTINGS
 }
 
+# Precompiled OpenAPI schema, built by `manage.py build_schema` in the release step
+OPENAPI_SCHEMA_DIR = Path(os.getenv('OPENAPI_SCHEMA_DIR', BASE_DIR / 'build' / 'openapi'))
+OPENAPI_SCHEMA_PRECOMPILED = os.getenv('OPENAPI_SCHEMA_PRECOMPILED', str(not DEBUG)) == 'True'  # Off in development, where code changes often
+OPENAPI_SCHEMA_MAX_AGE = int(os.getenv('OPENAPI_SCHEMA_MAX_AGE', 300))  # Seconds clients reuse /api/schema/ before revalidating
+
 
 
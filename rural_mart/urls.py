@@ -14,9 +14,10 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+from django.urls import path, re_path, include
+from core.views import lazy_view, media_view, metrics_view, schema_artifact_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,8 +26,11 @@ urlpatterns = [
     path('v2/', include('orders.urls')),
     path('v3/', include('payments.urls')),
     path('v4/', include('reviews.urls')),
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('api/schema/', lazy_view('core.schema_views.SchemaView'), name='schema'),
+    re_path(r'^api/schema/(?P<filename>openapi\.[0-9a-f]+\.(?:json|yaml))$', schema_artifact_view, name='schema-artifact'),
     # Optional UI:
-    path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path('api/schema/swagger-ui/', lazy_view('core.schema_views.SchemaSwaggerView', url_name='schema'), name='swagger-ui'),
+    path('api/schema/redoc/', lazy_view('core.schema_views.SchemaRedocView', url_name='schema'), name='redoc'),
+    path('metrics', metrics_view, name='metrics'),
+    re_path(rf'^{settings.MEDIA_URL.strip("/")}/(?P<path>.+)$', media_view, name='media'),
 ]